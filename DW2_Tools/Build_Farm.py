@@ -0,0 +1,288 @@
+# DW2_Tools/Build_Farm.py
+
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .Utility import DW2_BIN, coalesce_patches
+from .Image_Model import image_regions
+from .Image_Output import write_variant
+from .Stage_Data import STAGE_DATA_SIZE
+from .Stage_Validator import validate_stage
+from .Mod_Audit import detect_mod_kind, UNIT_DATA_SIZE
+from .Name_Editor import read_name_mod, name_patches
+from .Item_Editor import read_item_file
+from .Patch_Files import read_patch_info, iter_patch_records, ips_truncation, check_patch
+
+PATCH_EXTS = (".ppf", ".ips")
+
+MANIFEST_NAME = "manifest.json"
+
+# Bump when the manifest layout changes
+MANIFEST_VERSION = 1
+
+# Images are hashed this much at a time
+HASH_CHUNK = 1024 * 1024
+
+
+# Recipes
+
+def load_recipe(path: str) -> dict:
+    """
+    Read a JSON or TOML (.toml) recipe, paths in it are relative to the recipe
+
+        base = "DW2.bin"              # optional, DW2_BIN by default
+        output_dir = "builds"         # optional, next to the recipe by default
+        common = ["fixes.ppf"]        # optional, applied first in every variant
+
+        [[variants]]
+        name = "hard"
+        mods = ["hard.DW2YTR", "hard.DW2UnitMod", {region = "guard", hex = "0a0b..."}]
+
+    A mod is a stage/unit/name/item mod file, a PPF or IPS patch, or an inline
+    {region, hex} table with a region's full logical bytes, later mods win
+
+    TOML recipes need Python 3.11 (tomllib), JSON works everywhere
+    """
+    if path.lower().endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:
+            raise ValueError("TOML recipes need Python 3.11 or newer, use a JSON recipe instead.")
+        with open(path, "rb") as f:
+            recipe = tomllib.load(f)
+    else:
+        with open(path, encoding="utf-8") as f:
+            recipe = json.load(f)
+
+    root = os.path.dirname(os.path.abspath(path))
+    variants = recipe.get("variants") or []
+    if not variants:
+        raise ValueError("Recipe has no variants.")
+
+    def resolve(mod):
+        if isinstance(mod, str):
+            return os.path.join(root, mod)
+        if isinstance(mod, dict) and "region" in mod and "hex" in mod:
+            return {"region": mod["region"], "hex": mod["hex"]}
+        raise ValueError(f"Invalid mod entry {mod!r}.")
+
+    common = [resolve(mod) for mod in recipe.get("common", [])]
+    names = set()
+    resolved = []
+    for variant in variants:
+        name = variant.get("name")
+        if not name or os.path.basename(name) != name:
+            raise ValueError(f"Variant name {name!r} is not a plain file name.")
+        if name in names:
+            raise ValueError(f"Variant {name} is listed twice.")
+        names.add(name)
+        resolved.append({"name": name, "mods": common + [resolve(mod) for mod in variant.get("mods", [])]})
+
+    return {
+        "base": os.path.join(root, recipe["base"]) if "base" in recipe else DW2_BIN,
+        "output_dir": os.path.join(root, recipe.get("output_dir", "builds")),
+        "variants": resolved,
+    }
+
+
+# Mod stacks
+
+def region_patches(region, data: bytes) -> list[tuple[int, bytes]]:
+    """(offset, bytes) patches laying a region's logical bytes over its extents"""
+    if len(data) != region.size:
+        raise ValueError(f"{region.label} is {region.size} bytes, got {len(data)}.")
+    patches = []
+    pos = 0
+    for offset, length in region.extents:
+        patches.append((offset, data[pos:pos + length]))
+        pos += length
+    return patches
+
+
+def _read_table(path: str, size: int, what: str) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read(size)
+    if len(data) != size:
+        raise ValueError(f"{what} file {os.path.basename(path)} is too short.")
+    return data
+
+
+def mod_patches(mod, regions: dict, base) -> tuple[list[tuple[int, bytes]], list[str], int | None]:
+    """
+    (patches, warnings, truncate size) of one mod of a stack, base is the
+    open base image PPF/IPS patches are checked against
+    """
+    if isinstance(mod, dict):
+        key = mod["region"]
+        if key not in regions:
+            raise ValueError(f"Unknown region {key}.")
+        return region_patches(regions[key], bytes.fromhex(mod["hex"])), [], None
+
+    name = os.path.basename(mod)
+    if mod.lower().endswith(PATCH_EXTS):
+        with open(mod, "rb") as f:
+            info = read_patch_info(f)
+            check_patch(info, base)
+            patches = [(offset, data) for offset, data, _undo in iter_patch_records(f, info)]
+            truncate = ips_truncation(f) if info.format == "IPS" else None
+        return patches, [], truncate
+
+    detected = detect_mod_kind(mod)
+    if detected is None:
+        raise ValueError(f"{name} is not a DW2 mod or patch file.")
+    kind, stage_index = detected
+
+    if kind == "stage":
+        data = _read_table(mod, STAGE_DATA_SIZE, "Stage mod")
+        violations = validate_stage(data, stage_index)
+        warnings = [f"{name}: {len(violations)} stage validation problems"] if violations else []
+        return region_patches(regions[f"stage:{stage_index}"], data), warnings, None
+    if kind == "unit":
+        return region_patches(regions["units"], _read_table(mod, UNIT_DATA_SIZE, "Unit mod")), [], None
+    if kind == "item":
+        return region_patches(regions["items"], read_item_file(mod)), [], None
+    return name_patches(read_name_mod(mod), regions["names"]), [], None
+
+
+def _file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(HASH_CHUNK):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def build_variant(name: str, base_path: str, out_path: str, mods: list, regions=None) -> dict:
+    """
+    Build one variant image: the whole mod stack is collected and coalesced
+    first (later mods win), then the base is cloned and written in one pass
+
+    regions are the base image's (image_regions(base_path) by default), a
+    base whose tables can't be located fails the variant
+
+    Runs in a worker process, errors are returned in the manifest entry
+    """
+    started = time.perf_counter()
+    entry = {
+        "name": name,
+        "path": out_path,
+        "mods": [],
+        "warnings": [],
+        "error": None,
+    }
+    try:
+        regions = {region.key: region for region in (image_regions(base_path) if regions is None else regions)}
+        patches = []
+        truncate = None
+        with open(base_path, "rb") as base:
+            for mod in mods:
+                found, warnings, size = mod_patches(mod, regions, base)
+                patches += found
+                entry["warnings"] += warnings
+                truncate = size if size is not None else truncate
+                entry["mods"].append(
+                    {"region": mod["region"]} if isinstance(mod, dict)
+                    else {"file": mod, "sha256": _file_sha256(mod)}
+                )
+        runs = coalesce_patches(patches)
+        stacked = time.perf_counter()
+
+        method, writes = write_variant(base_path, out_path, runs)
+        if truncate is not None:
+            os.truncate(out_path, truncate)
+        written = time.perf_counter()
+
+        entry.update(
+            clone=method,
+            writes=writes,
+            patched_bytes=sum(len(data) for _offset, data in runs),
+            size=os.path.getsize(out_path),
+            sha256=_file_sha256(out_path),
+        )
+        entry["timings"] = {
+            "stack": round(stacked - started, 4),
+            "write": round(written - stacked, 4),
+            "hash": round(time.perf_counter() - written, 4),
+        }
+    except Exception as e:
+        entry["error"] = str(e)
+    entry["seconds"] = round(time.perf_counter() - started, 4)
+    return entry
+
+
+def build_recipe(recipe_path: str, workers: int | None = None) -> dict:
+    """
+    Build every variant of a recipe in a process pool (one worker per core by
+    default) and write manifest.json with each image's hash and timings
+    """
+    recipe = load_recipe(recipe_path)
+    os.makedirs(recipe["output_dir"], exist_ok=True)
+    base = recipe["base"]
+    started = time.perf_counter()
+    try:
+        # located once, workers would race on the ISO index cache
+        regions = image_regions(base)
+    except ValueError:
+        regions = None  # every variant resolves again and reports the error
+
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        jobs = [
+            pool.submit(
+                build_variant, variant["name"], base,
+                os.path.join(recipe["output_dir"], f"{variant['name']}.bin"), variant["mods"], regions,
+            )
+            for variant in recipe["variants"]
+        ]
+        entries = [job.result() for job in as_completed(jobs)]
+
+    order = {variant["name"]: i for i, variant in enumerate(recipe["variants"])}
+    entries.sort(key=lambda entry: order[entry["name"]])
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "recipe": os.path.abspath(recipe_path),
+        "base": base,
+        "base_sha256": _file_sha256(base),
+        "workers": workers,
+        "seconds": round(time.perf_counter() - started, 4),
+        "variants": entries,
+    }
+    with open(os.path.join(recipe["output_dir"], MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def format_manifest(manifest: dict) -> str:
+    """One line per variant, failures and warnings indented under it"""
+    lines = [f"{len(manifest['variants'])} variants in {manifest['seconds']:.2f}s on {manifest['workers']} workers."]
+    for entry in manifest["variants"]:
+        if entry["error"]:
+            lines.append(f"{entry['name']}: FAILED {entry['error']}")
+            continue
+        lines.append(
+            f"{entry['name']}: {entry['patched_bytes']} bytes in {entry['writes']} writes "
+            f"({entry['clone']}, {entry['seconds']:.2f}s) sha256 {entry['sha256'][:16]}"
+        )
+        lines += [f"    {warning}" for warning in entry["warnings"]]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """python -m DW2_Tools.Build_Farm <recipe.json|recipe.toml> [workers]"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python -m DW2_Tools.Build_Farm <recipe.json|recipe.toml> [workers]")
+        return 2
+
+    workers = int(argv[1]) if len(argv) > 1 else None
+    manifest = build_recipe(argv[0], workers)
+    print(format_manifest(manifest))
+    return 1 if any(entry["error"] for entry in manifest["variants"]) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
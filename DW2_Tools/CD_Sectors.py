@@ -0,0 +1,344 @@
+# DW2_Tools/CD_Sectors.py
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from .Utility import DW2_BIN
+from .Image_Regions import table_regions
+
+SECTOR_SIZE = 2352
+SYNC = b"\x00" + b"\xff" * 10 + b"\x00"
+
+# Byte positions inside a raw sector
+HEADER = 12         # 4 byte address + mode, P/Q start here (zeroed for Mode 2)
+SUBHEADER = 16
+SUBMODE = 18        # bit 5 set = Form 2
+FORM2_FLAG = 0x20
+MODE1_RESERVED = 2068  # 8 zero bytes between Mode 1 EDC and ECC
+P_PARITY = 2076     # 2 x 86 bytes
+Q_PARITY = 2248     # 2 x 52 bytes
+
+# (first data byte, EDC position) per checked sector kind
+EDC_SPANS = {
+    "mode1": (0, 2064),
+    "mode2 form1": (SUBHEADER, 2072),
+    "mode2 form2": (SUBHEADER, 2348),
+}
+
+# Sectors checked per vector pass, each pass transposes one chunk so every
+# byte position of every sector in it is one contiguous column
+SCAN_SECTORS = 4096
+
+
+def _tables():
+    """ecm style lookup tables: GF(2^8) forward/backward steps and the EDC CRC"""
+    f_lut = bytearray(256)
+    b_lut = bytearray(256)
+    edc_lut = [0] * 256
+    for i in range(256):
+        j = ((i << 1) ^ (0x11D if i & 0x80 else 0)) & 0xFF
+        f_lut[i] = j
+        b_lut[i ^ j] = i
+        edc = i
+        for _ in range(8):
+            edc = (edc >> 1) ^ (0xD8018001 if edc & 1 else 0)
+        edc_lut[i] = edc
+    # the 32 bit EDC table split in four byte lanes, one translate() each
+    lanes = [bytes((edc >> (8 * k)) & 0xFF for edc in edc_lut) for k in range(4)]
+    return bytes(f_lut), bytes(b_lut), lanes
+
+
+ECC_F, ECC_B, EDC_LANES = _tables()
+
+# (major count, minor count, major mult, minor inc) of the P and Q product code
+P_BLOCK = (86, 24, 2, 86)
+Q_BLOCK = (52, 43, 86, 88)
+
+
+def _block_positions(major_count, minor_count, major_mult, minor_inc):
+    """positions[minor][major] of the ECC input bytes, relative to HEADER"""
+    size = major_count * minor_count
+    positions = [[0] * major_count for _ in range(minor_count)]
+    for major in range(major_count):
+        index = (major >> 1) * major_mult + (major & 1)
+        for minor in range(minor_count):
+            positions[minor][major] = index
+            index += minor_inc
+            if index >= size:
+                index -= size
+    return positions
+
+
+P_POSITIONS = _block_positions(*P_BLOCK)
+Q_POSITIONS = _block_positions(*Q_BLOCK)
+
+
+class ScanResult(NamedTuple):
+    sectors: int
+    checked: dict[str, int]                 # sector kind -> sectors verified
+    bad: list[tuple[int, tuple[str, ...]]]  # (sector, failed checks) in sector order
+
+
+# Vector checks, every value below is one byte per sector packed in a Python
+# int (little endian), XOR runs over the whole chunk at once and GF(2^8)
+# multiplies are bytes.translate lookups
+
+def _load(data: bytes) -> int:
+    return int.from_bytes(data, "little")
+
+
+def _lookup(value: int, size: int, table: bytes) -> int:
+    return _load(value.to_bytes(size, "little").translate(table))
+
+
+def _edc(columns, n: int, start: int, end: int) -> list[int]:
+    """
+    EDC of bytes [start, end) of every sector as four byte lanes (low byte
+    first), the lanes are kept in one int so each CRC step is one shift
+    """
+    l0, l1, l2, l3 = EDC_LANES
+    shift = 8 * n
+    mask = (1 << shift) - 1
+    state = 0
+    for pos in range(start, end):
+        index = ((state & mask) ^ _load(columns[pos])).to_bytes(n, "little")
+        state = (state >> shift) ^ _load(
+            index.translate(l0) + index.translate(l1) + index.translate(l2) + index.translate(l3)
+        )
+    return [(state >> (shift * k)) & mask for k in range(4)]
+
+
+def _ecc(source, positions, n: int) -> tuple[int, int]:
+    """
+    Both parity vectors of one product code block, major order (major * n + sector),
+    source(pos) is the column of ECC input byte pos
+    """
+    size = len(positions[0]) * n
+    a = b = 0
+    for minor in positions:
+        t = _load(b"".join(source(pos) for pos in minor))
+        a ^= t
+        b ^= t
+        a = _lookup(a, size, ECC_F)
+    a = _lookup(_lookup(a, size, ECC_F) ^ b, size, ECC_B)
+    return a, a ^ b
+
+
+def _failed(diff: int, n: int) -> set[int]:
+    """Sectors (0..n-1) with a non zero byte in an n byte difference vector"""
+    if not diff:
+        return set()
+    return {i for i, value in enumerate(diff.to_bytes(n, "little")) if value}
+
+
+def transpose(chunk: bytes) -> list[bytes]:
+    """One column per byte position of a run of raw sectors, columns[pos][i] is byte pos of sector i"""
+    return [chunk[pos::SECTOR_SIZE] for pos in range(SECTOR_SIZE)]
+
+
+def expected_columns(columns, n: int, kind: str) -> dict[str, dict[int, bytes]]:
+    """
+    Columns every sector of one kind holds when its error correction data is
+    intact, by check: "layout" (Mode 2 subheader copy, Mode 1 reserved zeros),
+    "EDC", "ECC P" and "ECC Q" (Form 2 has no ECC)
+
+    Each check is computed from the expected bytes before it, so the same
+    columns both verify a sector and regenerate a stripped one
+    """
+    if kind == "mode1":
+        layout = {pos: bytes(n) for pos in range(MODE1_RESERVED, MODE1_RESERVED + 8)}
+    else:
+        layout = {SUBHEADER + 4 + k: columns[SUBHEADER + k] for k in range(4)}
+    expected = {"layout": layout}
+    known = dict(layout)
+
+    start, edc_pos = EDC_SPANS[kind]
+    lanes = _edc([known.get(pos, column) for pos, column in enumerate(columns)], n, start, edc_pos)
+    expected["EDC"] = {edc_pos + k: lane.to_bytes(n, "little") for k, lane in enumerate(lanes)}
+    if kind == "mode2 form2":
+        return expected
+    known.update(expected["EDC"])
+
+    zero = bytes(n)
+    zero_header = kind != "mode1"
+
+    def source(pos):
+        pos += HEADER
+        if zero_header and pos < SUBHEADER:
+            return zero
+        return known.get(pos, columns[pos])
+
+    # P covers header..EDC, Q also covers the P parity
+    for name, positions, parity in (("ECC P", P_POSITIONS, P_PARITY), ("ECC Q", Q_POSITIONS, Q_PARITY)):
+        majors = len(positions[0])
+        first, second = _ecc(source, positions, n)
+        first = first.to_bytes(majors * n, "little")
+        second = second.to_bytes(majors * n, "little")
+        found = {}
+        for major in range(majors):
+            found[parity + major] = first[major * n:(major + 1) * n]
+            found[parity + majors + major] = second[major * n:(major + 1) * n]
+        expected[name] = found
+        known.update(found)
+    return expected
+
+
+def mismatched(columns, n: int, found: dict[int, bytes]) -> set[int]:
+    """Sectors whose stored columns differ from the expected ones of one check"""
+    diff = 0
+    for pos, column in found.items():
+        if column != columns[pos]:
+            diff |= _load(column) ^ _load(columns[pos])
+    return _failed(diff, n)
+
+
+def check_sectors(chunk: bytes, kind: str) -> dict[int, list[str]]:
+    """
+    Verify EDC and (except Form 2) P/Q ECC of a run of raw sectors of one kind,
+    returns {sector index in chunk: failed checks} for the bad ones
+    """
+    n = len(chunk) // SECTOR_SIZE
+    columns = transpose(chunk)
+    failed: dict[int, list[str]] = {}
+
+    for check, found in expected_columns(columns, n, kind).items():
+        if check == "layout":
+            continue
+        bad = mismatched(columns, n, found)
+        if kind == "mode2 form2":
+            # Form 2 EDC is optional, 0 means not used
+            bad &= edc_present(columns, n, found)
+        for sector in sorted(bad):
+            failed.setdefault(sector, []).append(check)
+    return failed
+
+
+def edc_present(columns, n: int, edc: dict[int, bytes]) -> set[int]:
+    """Sectors with a non zero stored EDC"""
+    stored = 0
+    for pos in edc:
+        stored |= _load(columns[pos])
+    return _failed(stored, n)
+
+
+def sector_kind(sector: bytes) -> str | None:
+    """mode1 / mode2 form1 / mode2 form2, None for sectors without EDC (audio, mode 0, no sync)"""
+    if sector[:12] != SYNC:
+        return None
+    mode = sector[15]
+    if mode == 1:
+        return "mode1"
+    if mode == 2:
+        return "mode2 form2" if sector[SUBMODE] & FORM2_FLAG else "mode2 form1"
+    return None
+
+
+def _scan_range(bin_path: str, first: int, last: int) -> tuple[dict[str, int], list]:
+    """Check sectors [first, last), one SCAN_SECTORS chunk at a time, sectors grouped by kind"""
+    checked: dict[str, int] = {}
+    bad = []
+    with open(bin_path, "rb") as f:
+        for chunk_first in range(first, last, SCAN_SECTORS):
+            count = min(SCAN_SECTORS, last - chunk_first)
+            f.seek(chunk_first * SECTOR_SIZE)
+            chunk = f.read(count * SECTOR_SIZE)
+            count = len(chunk) // SECTOR_SIZE
+
+            groups: dict[str, list[int]] = {}
+            for i in range(count):
+                kind = sector_kind(chunk[i * SECTOR_SIZE:i * SECTOR_SIZE + SUBMODE + 1])
+                if kind is not None:
+                    groups.setdefault(kind, []).append(i)
+
+            for kind, members in groups.items():
+                checked[kind] = checked.get(kind, 0) + len(members)
+                if len(members) == count:
+                    data = chunk[:count * SECTOR_SIZE]
+                else:
+                    data = b"".join(chunk[i * SECTOR_SIZE:(i + 1) * SECTOR_SIZE] for i in members)
+                for index, checks in check_sectors(data, kind).items():
+                    bad.append((chunk_first + members[index], tuple(checks)))
+    return checked, bad
+
+
+def scan_image(bin_path: str = DW2_BIN, workers: int | None = None) -> ScanResult:
+    """
+    Verify EDC and P/Q ECC of every data sector of a raw 2352 byte image, the
+    image is split in sector ranges checked by a process pool (one worker per core)
+    """
+    size = os.path.getsize(bin_path)
+    if size % SECTOR_SIZE:
+        raise ValueError("Not a raw 2352 byte sector image, EDC/ECC can't be checked.")
+    sectors = size // SECTOR_SIZE
+
+    workers = workers or os.cpu_count() or 1
+    step = max(SCAN_SECTORS, -(-sectors // (workers * 4)) // SCAN_SECTORS * SCAN_SECTORS)
+    firsts = list(range(0, sectors, step))
+    lasts = [min(first + step, sectors) for first in firsts]
+
+    checked: dict[str, int] = {}
+    bad = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for part_checked, part_bad in pool.map(_scan_range, [bin_path] * len(firsts), firsts, lasts):
+            for kind, count in part_checked.items():
+                checked[kind] = checked.get(kind, 0) + count
+            bad += part_bad
+    bad.sort()
+    return ScanResult(sectors, checked, bad)
+
+
+def sector_regions(sector: int, regions=None) -> list[str]:
+    """Labels of the tables with bytes in a raw sector"""
+    regions = table_regions() if regions is None else regions
+    start = sector * SECTOR_SIZE
+    end = start + SECTOR_SIZE
+    return [
+        region.label for region in regions
+        if any(offset < end and start < offset + length for offset, length in region.extents)
+    ]
+
+
+def format_scan_report(result: ScanResult, regions=None, index=None) -> str:
+    """
+    Counts per sector kind, then one line per bad sector with the checks that
+    failed and the tables (and, with an IsoIndex, the file) it holds
+    """
+    regions = table_regions() if regions is None else regions
+    checked = ", ".join(f"{count} {kind}" for kind, count in sorted(result.checked.items()))
+    lines = [
+        f"{result.sectors} sectors, checked {checked or 'none'}.",
+        f"{len(result.bad)} sectors with bad EDC/ECC." if result.bad else "Every sector's EDC/ECC is valid.",
+    ]
+    for sector, checks in result.bad:
+        line = f"Sector {sector} ({sector * SECTOR_SIZE:#x}): {', '.join(checks)}"
+        tables = sector_regions(sector, regions)
+        if tables:
+            line += f" [{', '.join(tables)}]"
+        if index is not None:
+            found = index.locate(sector * SECTOR_SIZE + index.layout.data_offset)
+            if found is not None:
+                line += f" {found[0]}"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """python -m DW2_Tools.CD_Sectors [image] [workers]"""
+    argv = sys.argv[1:] if argv is None else argv
+    bin_path = argv[0] if argv else DW2_BIN
+    workers = int(argv[1]) if len(argv) > 1 else None
+
+    result = scan_image(bin_path, workers)
+    try:
+        from .ISO9660_Index import load_iso_index
+        index = load_iso_index(bin_path)
+    except Exception:
+        index = None
+    print(format_scan_report(result, index=index))
+    return 1 if result.bad else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
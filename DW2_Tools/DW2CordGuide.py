@@ -3,6 +3,10 @@ import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
 from .Utility import MAPS_DIR
+from .Stage_Heatmap import HEATMAP_BIN, heatmap_key, stage_heatmap
+
+# Order line colors per Stage_Graph.order_segments kind
+ORDER_LINE_COLORS = {"follow": "cyan", "attack": "yellow", "problem": "magenta"}
 
 # Map StageEditor stage names to map images used here
 STAGE_TO_IMAGE = {
@@ -53,9 +57,26 @@ class ImageMarkerApp:
         self.clear_button = tk.Button(root, text="Clear Markers", command=self.clear_markers)
         self.clear_button.pack(pady=5)
 
+        # Density heatmap instead of individual markers
+        self.heatmap_var = tk.BooleanVar(value=False)
+        self.heatmap_check = tk.Checkbutton(root, text="Density heatmap", variable=self.heatmap_var,
+                                            command=self.redraw_heatmap)
+        self.heatmap_check.pack(pady=5)
+
+        # Arrows from each unit to the slot it attacks or follows
+        self.order_lines_var = tk.BooleanVar(value=False)
+        self.order_lines_check = tk.Checkbutton(root, text="Order lines", variable=self.order_lines_var,
+                                                command=self.redraw_order_lines)
+        self.order_lines_check.pack(pady=5)
+
         # Initialize variables
         self.image = None
         self.markers = []
+        self.heatmap_item = None
+        self.heatmap_source = None  # (stage name, stage data) set by the Stage Editor
+        self.heatmap_cache = {}     # stage name -> (heatmap_key, PhotoImage)
+        self.order_segments = []    # (x1, y1, x2, y2, kind) set by the Stage Editor
+        self.order_lines = []
 
         # Bind mouse click to mark image
         self.canvas.bind("<Button-1>", self.mark_image_with_click)
@@ -94,6 +115,60 @@ class ImageMarkerApp:
                 )
                 self.markers.append(marker)
 
+    def set_heatmap_source(self, stage_name: str, data: bytes):
+        """Stage data the heatmap is drawn from, redrawn right away when heatmap mode is on"""
+        self.heatmap_source = (stage_name, data)
+        self.redraw_heatmap()
+
+    def _heatmap_image(self, stage_name: str, data: bytes):
+        """One 800 * 800 PhotoImage per stage, rebuilt only when the stage's slots changed"""
+        key = heatmap_key(data)
+        cached = self.heatmap_cache.get(stage_name)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+        image = tk.PhotoImage(data=stage_heatmap(data), format="png").zoom(HEATMAP_BIN)
+        self.heatmap_cache[stage_name] = (key, image)
+        return image
+
+    def redraw_heatmap(self):
+        """Show the spawn density heatmap over the map (hiding markers), or the markers again"""
+        if self.heatmap_item is not None:
+            self.canvas.delete(self.heatmap_item)
+            self.heatmap_item = None
+
+        show = self.heatmap_var.get() and self.heatmap_source is not None
+        for marker in self.markers:
+            self.canvas.itemconfigure(marker, state="hidden" if show else "normal")
+        if show:
+            image = self._heatmap_image(*self.heatmap_source)
+            self.heatmap_item = self.canvas.create_image(0, 0, anchor=tk.NW, image=image)
+            for line in self.order_lines:
+                self.canvas.tag_raise(line)
+
+    def set_order_segments(self, segments):
+        """Orders of the current stage, drawn when order lines are switched on"""
+        self.order_segments = segments
+        self.redraw_order_lines()
+
+    def redraw_order_lines(self):
+        """Draw an arrow per order, broken chains in ORDER_LINE_COLORS["problem"]"""
+        for line in self.order_lines:
+            self.canvas.delete(line)
+        self.order_lines = []
+        if not self.order_lines_var.get():
+            return
+
+        # problem arrows last so they sit on top
+        for x1, y1, x2, y2, kind in sorted(self.order_segments, key=lambda seg: seg[4] == "problem"):
+            line = self.canvas.create_line(
+                x1, self.original_height - y1,
+                x2, self.original_height - y2,
+                fill=ORDER_LINE_COLORS[kind],
+                width=3 if kind == "problem" else 1,
+                arrow=tk.LAST,
+            )
+            self.order_lines.append(line)
+
     def validate_int(self, new_value, current_value):
         """ Validate if the input value is an integer """
         if new_value.isdigit() or new_value == "":
@@ -105,6 +180,8 @@ class ImageMarkerApp:
         """ Clear previous image and markers """
         self.canvas.delete("all")
         self.markers = []
+        self.heatmap_item = None
+        self.order_lines = []
 
         # Load image using tkinter's PhotoImage
         self.image = tk.PhotoImage(file=os.path.join(MAPS_DIR,image_path))
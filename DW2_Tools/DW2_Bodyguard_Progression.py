@@ -4,31 +4,41 @@ import os
 import tkinter as tk
 from tkinter import ttk
 
-from .Utility import DW2_BIN, setup_lilac_styles, LILAC  # central bin path
+from .Utility import setup_lilac_styles, LILAC
+from .Image_Model import ImageModel
+
+# Field labels for one tier, the 15 byte block is 5 tiers of these 3 bytes
+GUARD_FIELD_LABELS = [
+    "Rank (name ID value)",
+    "Guard Model",
+    "Guard Motion/Moveset",
+]
+GUARD_TIERS = 5
 
 class GuardTool:
     """
     Dynasty Warriors 2 Bodyguard Progression Editor
 
-    It uses DW2_BIN from Utility, seeks the 15 byte guard progression block and edits it, and
+    It reads the 15 byte guard progression block from the shared ImageModel and edits it, and
     can also patch AI_GUARD_FOLLOW to make player guards follow in formation
     """
 
     # Static meta
     AI_GUARD_FOLLOW = 0x15F71028
     FOLLOW_VALUE = b"\x11"
+    GUARD_PROG_OFFSET = 0x160CF338
+    GUARD_PROG_SIZE = len(GUARD_FIELD_LABELS) * GUARD_TIERS  # 15
 
-    def __init__(self, root):
+    def __init__(self, root, model: ImageModel | None = None):
         self.root = root
+        self.model = model or ImageModel()
         self.root.title("Dynasty Warriors 2 Bodyguard Progression Editor")
         self.root.geometry("1250x700")
         self.root.resizable(False, False)
 
         setup_lilac_styles()
         
-        self.bin_path = DW2_BIN
-
-        self.guard_prog_offset = 0x160CF338
+        self.guard_prog_offset = self.GUARD_PROG_OFFSET
 
         self.spin_widgets: list[ttk.Spinbox] = []
         self.hex_values: list[str] = [f"{i:02X}" for i in range(256)]
@@ -43,6 +53,23 @@ class GuardTool:
                 text=f"DW2.bin not found at: {self.bin_path}", foreground="red"
             )
 
+        # reload when another tool changes the progression block
+        self.model.subscribe("guard", self.guard_changed, owner=self)
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
+
+    @property
+    def bin_path(self) -> str:
+        # follows the model when it is pointed at an output image
+        return self.model.bin_path
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.model.unsubscribe(self)
+
+    def guard_changed(self, key=None):
+        """Guard progression was written by another tool, reload the spinboxes"""
+        self._read_data()
+
     def _build_gui(self):
         # Full window lilac background for labels
         self.bg = ttk.Frame(self.root, style="Lilac.TFrame")
@@ -103,32 +130,11 @@ class GuardTool:
         self.status_label = ttk.Label(self.bg, text="", style="Lilac.TLabel")
         self.status_label.place(x=20, y=400)
 
-        # Labels for each field across 5 tiers
-        self.labels = [
-            # Tier 1
-            "Rank (name ID value)",  # 0
-            "Guard Model",  # 1
-            "Guard Motion/Moveset",  # 2
-            # Tier 2
-            "Rank (name ID value)",
-            "Guard Model",
-            "Guard Motion/Moveset",
-            # Tier 3
-            "Rank (name ID value)",
-            "Guard Model",
-            "Guard Motion/Moveset",
-            # Tier 4
-            "Rank (name ID value)",
-            "Guard Model",
-            "Guard Motion/Moveset",
-            # Tier 5
-            "Rank (name ID value)",
-            "Guard Model",
-            "Guard Motion/Moveset"
-        ]
+        # Labels for each field across 5 tiers (Rank, Model, Motion per tier)
+        self.labels = GUARD_FIELD_LABELS * GUARD_TIERS
 
-        num_tiers = 5
-        fields_per_tier = 3  # Rank, Model, Motion
+        num_tiers = GUARD_TIERS
+        fields_per_tier = len(GUARD_FIELD_LABELS)  # Rank, Model, Motion
 
         # Layout settings
         top_y = 110  # y for the tier headers
@@ -252,12 +258,8 @@ class GuardTool:
             return
 
         try:
-            with open(self.bin_path, "rb") as f:
-                # Read 15 bytes of guard data
-                f.seek(self.guard_prog_offset)
-                values = list(f.read(15))
-                if len(values) != 15:
-                    raise ValueError("Could not read 15 bytes of guard data.")
+            # 15 bytes of guard data
+            values = list(self.model.read("guard"))
 
             # Populate spinboxes
             for sb, val in zip(self.spin_widgets, values):
@@ -291,9 +293,7 @@ class GuardTool:
             if len(values) != 15:
                 raise ValueError(f"Expected 15 values, got {len(values)}")
 
-            with open(self.bin_path, "r+b") as f:
-                f.seek(self.guard_prog_offset)
-                f.write(bytes(values))
+            self.model.write_region("guard", bytes(values), source=self)
 
             self.status_label.config(
                 text="Guard progression data written successfully.",
@@ -314,9 +314,7 @@ class GuardTool:
             return
 
         try:
-            with open(self.bin_path, "r+b") as f:
-                f.seek(self.AI_GUARD_FOLLOW)
-                f.write(self.FOLLOW_VALUE)
+            self.model.write_region("follow", self.FOLLOW_VALUE, source=self)
 
             self.status_label.config(
                 text="Player guards now set to follow like AI guards.",
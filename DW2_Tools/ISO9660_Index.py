@@ -0,0 +1,283 @@
+# DW2_Tools/ISO9660_Index.py
+
+import json
+import os
+from bisect import bisect_right
+from typing import NamedTuple
+
+from .Utility import DW2_BIN, ISO_INDEX_CACHE, image_fingerprint
+from .Image_Regions import table_regions
+
+# Sector layouts, raw CD sectors carry a 12 byte sync pattern + 4 byte header
+RAW_SECTOR_SIZE = 2352
+ISO_SECTOR_SIZE = 2048
+SYNC = b"\x00" + b"\xff" * 10 + b"\x00"
+MODE1_DATA_OFFSET = 16
+MODE2_DATA_OFFSET = 24  # Mode 2 Form 1, 8 byte subheader after the header
+
+# The primary volume descriptor is logical sector 16 of the data track
+PVD_LBA = 16
+VOLUME_ID = b"CD001"
+VD_PRIMARY = 1
+VD_TERMINATOR = 255
+
+# Sectors searched for the volume descriptor, covers a 2 second pregap and more
+MAX_PREGAP = 300
+
+DIR_FLAG = 0x02
+
+# Bump when the cached index layout changes
+INDEX_VERSION = 1
+
+
+class SectorLayout(NamedTuple):
+    """
+    Where logical 2048 byte sectors sit in the image: sector lba starts at
+    (lba + lba_base) * sector_size + data_offset
+    """
+    sector_size: int
+    data_offset: int
+    lba_base: int  # image sectors before the data track's sector 0 (pregap)
+
+    def offset(self, lba: int, pos: int = 0) -> int:
+        return (lba + self.lba_base) * self.sector_size + self.data_offset + pos
+
+
+class FileEntry(NamedTuple):
+    path: str
+    lba: int
+    size: int
+
+
+def detect_layout(f) -> SectorLayout:
+    """Find the sector size, user data offset and pregap from the primary volume descriptor"""
+    f.seek(0)
+    raw = f.read(len(SYNC)) == SYNC
+
+    if not raw:
+        f.seek(PVD_LBA * ISO_SECTOR_SIZE)
+        if f.read(6)[1:] == VOLUME_ID:
+            return SectorLayout(ISO_SECTOR_SIZE, 0, 0)
+        raise ValueError("Not a raw 2352 byte BIN or a 2048 byte ISO image.")
+
+    for sector in range(PVD_LBA, PVD_LBA + MAX_PREGAP):
+        f.seek(sector * RAW_SECTOR_SIZE)
+        head = f.read(MODE2_DATA_OFFSET + 6)
+        if len(head) < MODE2_DATA_OFFSET + 6:
+            break
+        if head[:len(SYNC)] != SYNC:
+            continue
+        data_offset = MODE1_DATA_OFFSET if head[15] == 1 else MODE2_DATA_OFFSET
+        descriptor = head[data_offset:data_offset + 6]
+        if descriptor[0] == VD_PRIMARY and descriptor[1:] == VOLUME_ID:
+            return SectorLayout(RAW_SECTOR_SIZE, data_offset, sector - PVD_LBA)
+    raise ValueError("No ISO9660 primary volume descriptor found.")
+
+
+def _read_logical(f, layout: SectorLayout, lba: int, size: int) -> bytes:
+    """size bytes of user data starting at logical sector lba"""
+    pieces = []
+    while size > 0:
+        f.seek(layout.offset(lba))
+        chunk = f.read(min(size, ISO_SECTOR_SIZE))
+        if not chunk:
+            raise IOError(f"Unexpected EOF reading sector {lba}.")
+        pieces.append(chunk)
+        size -= len(chunk)
+        lba += 1
+    return b"".join(pieces)
+
+
+def _dir_records(data: bytes):
+    """(name, lba, size, is_dir) of every record in a directory extent"""
+    pos = 0
+    while pos < len(data):
+        length = data[pos]
+        if length == 0:
+            # records never cross sectors, the rest of this one is padding
+            pos = (pos // ISO_SECTOR_SIZE + 1) * ISO_SECTOR_SIZE
+            continue
+        record = data[pos:pos + length]
+        name_len = record[32]
+        name = record[33:33 + name_len]
+        pos += length
+        if name in (b"\x00", b"\x01"):  # . and ..
+            continue
+        yield (
+            name.decode("ascii", "replace").split(";")[0],
+            int.from_bytes(record[2:6], "little"),
+            int.from_bytes(record[10:14], "little"),
+            bool(record[25] & DIR_FLAG),
+        )
+
+
+def read_directory_tree(f, layout: SectorLayout) -> list[FileEntry]:
+    """Every file of the volume, read breadth first from the root directory"""
+    pvd = _read_logical(f, layout, PVD_LBA, ISO_SECTOR_SIZE)
+    root = pvd[156:156 + 34]
+    pending = [("", int.from_bytes(root[2:6], "little"), int.from_bytes(root[10:14], "little"))]
+    seen = set()
+    files = []
+    while pending:
+        prefix, lba, size = pending.pop(0)
+        if lba in seen:
+            continue
+        seen.add(lba)
+        for name, child_lba, child_size, is_dir in _dir_records(_read_logical(f, layout, lba, size)):
+            path = f"{prefix}/{name}"
+            if is_dir:
+                pending.append((path, child_lba, child_size))
+            else:
+                files.append(FileEntry(path, child_lba, child_size))
+    files.sort(key=lambda entry: entry.lba)
+    return files
+
+
+class IsoIndex:
+    """
+    ISO9660 file index of one image, maps absolute image offsets to
+    (file, offset within file) and back
+    """
+
+    def __init__(self, layout: SectorLayout, files: list[FileEntry]):
+        self.layout = layout
+        self.files = sorted(files, key=lambda entry: entry.lba)
+        self.by_path = {entry.path: entry for entry in self.files}
+        self._lbas = [entry.lba for entry in self.files]
+
+    @classmethod
+    def build(cls, f) -> "IsoIndex":
+        layout = detect_layout(f)
+        return cls(layout, read_directory_tree(f, layout))
+
+    def to_dict(self) -> dict:
+        return {
+            "version": INDEX_VERSION,
+            "layout": list(self.layout),
+            "files": [list(entry) for entry in self.files],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "IsoIndex":
+        return cls(SectorLayout(*data["layout"]), [FileEntry(*entry) for entry in data["files"]])
+
+    def locate(self, offset: int) -> tuple[str, int] | None:
+        """(file path, position in file) of an absolute image offset, None outside files"""
+        layout = self.layout
+        sector, in_sector = divmod(offset, layout.sector_size)
+        pos = in_sector - layout.data_offset
+        if not 0 <= pos < ISO_SECTOR_SIZE:
+            return None  # sector header or EDC/ECC
+        lba = sector - layout.lba_base
+        i = bisect_right(self._lbas, lba) - 1
+        if i < 0:
+            return None
+        entry = self.files[i]
+        file_pos = (lba - entry.lba) * ISO_SECTOR_SIZE + pos
+        if file_pos >= entry.size:
+            return None
+        return entry.path, file_pos
+
+    def image_offset(self, path: str, file_pos: int) -> int:
+        """Absolute image offset of a position inside a file"""
+        entry = self.by_path[path]
+        if not 0 <= file_pos < entry.size:
+            raise ValueError(f"{path} is {entry.size} bytes, position {file_pos} is outside it.")
+        lba, pos = divmod(file_pos, ISO_SECTOR_SIZE)
+        return self.layout.offset(entry.lba + lba, pos)
+
+
+# Cache, one small JSON file holding every indexed image and the table locations
+
+def _load_cache(cache_path: str) -> dict:
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    cache.setdefault("images", {})
+    cache.setdefault("tables", {})
+    return cache
+
+
+def _save_cache(cache: dict, cache_path: str):
+    tmp = cache_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, cache_path)
+
+
+def load_iso_index(bin_path: str = DW2_BIN, cache_path: str = ISO_INDEX_CACHE) -> IsoIndex:
+    """Index of an image, parsed once and then read from the cache by fingerprint"""
+    fingerprint = image_fingerprint(bin_path)
+    cache = _load_cache(cache_path)
+    cached = cache["images"].get(fingerprint)
+    if cached is not None and cached.get("version") == INDEX_VERSION:
+        return IsoIndex.from_dict(cached)
+
+    with open(bin_path, "rb") as f:
+        index = IsoIndex.build(f)
+    cache["images"][fingerprint] = index.to_dict()
+    _save_cache(cache, cache_path)
+    return index
+
+
+def table_locations(index: IsoIndex, regions=None) -> dict[str, list[tuple[str, int, int]]]:
+    """(file path, position in file, length) of every extent of every region"""
+    regions = table_regions() if regions is None else regions
+    locations = {}
+    for region in regions:
+        pieces = []
+        for offset, length in region.extents:
+            found = index.locate(offset)
+            if found is None:
+                raise ValueError(f"{region.label} at {offset:#x} is not inside a file of this image.")
+            pieces.append((found[0], found[1], length))
+        locations[region.key] = pieces
+    return locations
+
+
+def load_table_locations(reference_path: str = DW2_BIN, cache_path: str = ISO_INDEX_CACHE) -> dict:
+    """
+    Table locations by file, learned once from the reference image (the dump the
+    absolute offsets in Utility and the editors were taken from) and cached
+    """
+    cache = _load_cache(cache_path)
+    if cache["tables"]:
+        return {key: [tuple(piece) for piece in pieces] for key, pieces in cache["tables"].items()}
+
+    locations = table_locations(load_iso_index(reference_path, cache_path))
+    cache = _load_cache(cache_path)
+    cache["tables"] = locations
+    _save_cache(cache, cache_path)
+    return locations
+
+
+def resolve_regions(bin_path: str = DW2_BIN, cache_path: str = ISO_INDEX_CACHE,
+                    reference_path: str = DW2_BIN) -> list:
+    """
+    table_regions() with extents moved to where each table's file sits in
+    bin_path, for dumps with another pregap, track layout or sector size
+    """
+    locations = load_table_locations(reference_path, cache_path)
+    index = load_iso_index(bin_path, cache_path)
+    regions = []
+    for region in table_regions():
+        extents = tuple(
+            (index.image_offset(path, pos), length)
+            for path, pos, length in locations[region.key]
+        )
+        regions.append(region._replace(extents=extents))
+    return regions
+
+
+def format_locations(locations: dict, regions=None) -> str:
+    """Report of where every table lives, one line per extent"""
+    regions = {region.key: region for region in (table_regions() if regions is None else regions)}
+    lines = []
+    for key, pieces in locations.items():
+        label = regions[key].label if key in regions else key
+        first_path, first_pos, _length = pieces[0]
+        total = sum(length for _path, _pos, length in pieces)
+        lines.append(f"{label}: {first_path} + {first_pos:#x} ({len(pieces)} extents, {total} bytes)")
+    return "\n".join(lines)
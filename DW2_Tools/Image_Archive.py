@@ -0,0 +1,357 @@
+# DW2_Tools/Image_Archive.py
+
+import hashlib
+import os
+import struct
+import sys
+import zlib
+from typing import NamedTuple
+
+from .CD_Sectors import (
+    SECTOR_SIZE, SYNC, SCAN_SECTORS, sector_kind, transpose, expected_columns,
+    mismatched, edc_present,
+)
+
+ARCHIVE_MAGIC = b"DW2ECM02"
+ARCHIVE_EXT = ".dw2ecm"
+
+# magic, image size, base size (0 = no base), base sha256, image sha256
+HEADER = struct.Struct("<8sQQ32s32s")
+# compressed length of the chunk that follows
+CHUNK = struct.Struct("<I")
+# op code, count (sectors, or bytes for OP_TAIL)
+OP = struct.Struct("<BI")
+
+# Ops, one per run of sectors stored the same way
+OP_BASE = 0         # same bytes as the base image at the same offset, nothing stored
+OP_RAW = 1          # stored whole, EDC/ECC don't match the data (edited in place)
+OP_MODE1 = 2
+OP_FORM1 = 3
+OP_FORM2 = 4
+OP_FORM2_NOEDC = 5  # Form 2 without EDC (stored as zeros)
+OP_TAIL = 6         # bytes after the last whole sector
+
+# Sector kind and the (start, end) spans kept for every stripped op, sync,
+# the Mode 2 subheader copy, EDC, reserved bytes and ECC are regenerated
+STRIPPED = {
+    OP_MODE1: ("mode1", ((12, 2064),)),
+    OP_FORM1: ("mode2 form1", ((12, 20), (24, 2072))),
+    OP_FORM2: ("mode2 form2", ((12, 20), (24, 2348))),
+    OP_FORM2_NOEDC: ("mode2 form2", ((12, 20), (24, 2348))),
+}
+KIND_OPS = {"mode1": OP_MODE1, "mode2 form1": OP_FORM1, "mode2 form2": OP_FORM2}
+
+COMPRESS_LEVEL = 6
+
+
+class ArchiveStats(NamedTuple):
+    sectors: int
+    base: int       # sectors shared with the base image
+    stripped: int   # sectors stored as user data only
+    raw: int        # sectors stored whole
+    size: int       # archive bytes
+
+
+class ArchiveInfo(NamedTuple):
+    image_size: int
+    base_size: int
+    base_sha256: str | None
+    sha256: str
+
+
+# Packing
+
+def _sector_ops(data: bytes, base: bytes | None) -> list[int]:
+    """Op of every whole sector of a chunk"""
+    n = len(data) // SECTOR_SIZE
+    if base is not None and data[:n * SECTOR_SIZE] == base[:n * SECTOR_SIZE]:
+        return [OP_BASE] * n
+
+    ops = [OP_RAW] * n
+    groups: dict[str, list[int]] = {}
+    for i in range(n):
+        sector = data[i * SECTOR_SIZE:(i + 1) * SECTOR_SIZE]
+        if base is not None and sector == base[i * SECTOR_SIZE:(i + 1) * SECTOR_SIZE]:
+            ops[i] = OP_BASE
+            continue
+        kind = sector_kind(sector)
+        if kind is not None:
+            groups.setdefault(kind, []).append(i)
+
+    # a sector is stripped only when regenerating it gives back the exact bytes
+    for kind, members in groups.items():
+        m = len(members)
+        columns = transpose(b"".join(data[i * SECTOR_SIZE:(i + 1) * SECTOR_SIZE] for i in members))
+        expected = expected_columns(columns, m, kind)
+        bad = set()
+        for check, found in expected.items():
+            if check == "EDC" and kind == "mode2 form2":
+                continue
+            bad |= mismatched(columns, m, found)
+        if kind == "mode2 form2":
+            edc = expected["EDC"]
+            with_edc = edc_present(columns, m, edc)
+            bad |= mismatched(columns, m, edc) & with_edc
+        for j, i in enumerate(members):
+            if j in bad:
+                continue
+            if kind == "mode2 form2" and j not in with_edc:
+                ops[i] = OP_FORM2_NOEDC
+            else:
+                ops[i] = KIND_OPS[kind]
+    return ops
+
+
+def _pack_chunk(data: bytes, base: bytes | None) -> tuple[bytes, list[int]]:
+    """Compressed chunk record and the op of every sector in it"""
+    n = len(data) // SECTOR_SIZE
+    ops = _sector_ops(data, base)
+
+    runs = []
+    payload = []
+    for i, op in enumerate(ops):
+        if runs and runs[-1][0] == op:
+            runs[-1][1] += 1
+        else:
+            runs.append([op, 1])
+        sector = data[i * SECTOR_SIZE:(i + 1) * SECTOR_SIZE]
+        if op == OP_RAW:
+            payload.append(sector)
+        elif op != OP_BASE:
+            payload += [sector[start:end] for start, end in STRIPPED[op][1]]
+
+    tail = data[n * SECTOR_SIZE:]
+    if tail:
+        runs.append([OP_TAIL, len(tail)])
+        payload.append(tail)
+
+    body = struct.pack("<I", len(runs)) + b"".join(OP.pack(op, count) for op, count in runs)
+    blob = zlib.compress(body + b"".join(payload), COMPRESS_LEVEL)
+    return CHUNK.pack(len(blob)) + blob, ops
+
+
+def archive_image(image_path: str, archive_path: str, base_path: str | None = None) -> ArchiveStats:
+    """
+    Store an image ECM style: sectors shared with base_path (same offset) take
+    no space, sectors whose sync/EDC/ECC regenerate exactly keep only their
+    header and user data, the rest is stored whole, every chunk zlib compressed
+
+    Streams one SCAN_SECTORS chunk at a time, the base is hashed whole as it
+    is read so a restore can refuse any other base
+    """
+    size = os.path.getsize(image_path)
+    base_size = os.path.getsize(base_path) if base_path else 0
+    digest = hashlib.sha256()
+    base_digest = hashlib.sha256()
+    counts = {OP_BASE: 0, OP_RAW: 0}
+    chunk_bytes = SCAN_SECTORS * SECTOR_SIZE
+
+    with open(image_path, "rb") as src, open(archive_path, "wb") as out:
+        base = open(base_path, "rb") if base_path else None
+        try:
+            out.write(HEADER.pack(ARCHIVE_MAGIC, size, base_size, bytes(32), bytes(32)))
+            offset = 0
+            while offset < size:
+                data = src.read(chunk_bytes)
+                if not data:
+                    break
+                digest.update(data)
+                base_data = None
+                if base is not None and offset < base_size:
+                    base_data = base.read(len(data))
+                    base_digest.update(base_data)
+                record, ops = _pack_chunk(data, base_data)
+                out.write(record)
+                for op in ops:
+                    key = op if op in counts else "stripped"
+                    counts[key] = counts.get(key, 0) + 1
+                offset += len(data)
+
+            # base bytes past the end of the image
+            while base is not None:
+                data = base.read(chunk_bytes)
+                if not data:
+                    break
+                base_digest.update(data)
+
+            base_sha = base_digest.digest() if base is not None else bytes(32)
+            out.seek(0)
+            out.write(HEADER.pack(ARCHIVE_MAGIC, size, base_size, base_sha, digest.digest()))
+        finally:
+            if base is not None:
+                base.close()
+
+    return ArchiveStats(
+        sectors=size // SECTOR_SIZE,
+        base=counts[OP_BASE],
+        stripped=counts.get("stripped", 0),
+        raw=counts[OP_RAW],
+        size=os.path.getsize(archive_path),
+    )
+
+
+# Restoring
+
+def read_archive_info(f) -> ArchiveInfo:
+    """Header of an open archive, leaves f at the first chunk"""
+    f.seek(0)
+    head = f.read(HEADER.size)
+    if len(head) < HEADER.size or head[:8] != ARCHIVE_MAGIC:
+        raise ValueError("Not a DW2 image archive.")
+    _magic, size, base_size, base_sha, sha = HEADER.unpack(head)
+    return ArchiveInfo(size, base_size, base_sha.hex() if base_size else None, sha.hex())
+
+
+def _regenerate(op: int, kept: list[bytes]) -> list[bytes]:
+    """Whole sectors back from the kept spans of a group of sectors with the same op"""
+    kind, spans = STRIPPED[op]
+    m = len(kept)
+    buf = bytearray(m * SECTOR_SIZE)
+    width = sum(end - start for start, end in spans)
+    for i, data in enumerate(kept):
+        base = i * SECTOR_SIZE
+        buf[base:base + len(SYNC)] = SYNC
+        pos = 0
+        for start, end in spans:
+            buf[base + start:base + end] = data[pos:pos + end - start]
+            pos += end - start
+        if pos != width:
+            raise ValueError("Archive chunk is truncated.")
+
+    columns = transpose(bytes(buf))
+    for check, found in expected_columns(columns, m, kind).items():
+        if check == "EDC" and op == OP_FORM2_NOEDC:
+            continue
+        for pos, column in found.items():
+            buf[pos::SECTOR_SIZE] = column
+    return [bytes(buf[i * SECTOR_SIZE:(i + 1) * SECTOR_SIZE]) for i in range(m)]
+
+
+def _unpack_chunk(blob: bytes, offset: int, base) -> bytes:
+    """Image bytes of one chunk, offset is where it starts in the image"""
+    body = zlib.decompress(blob)
+    (run_count,) = struct.unpack_from("<I", body)
+    runs = [OP.unpack_from(body, 4 + i * OP.size) for i in range(run_count)]
+    pos = 4 + run_count * OP.size
+
+    pieces: list[bytes | None] = []
+    stripped: dict[int, list[tuple[int, bytes]]] = {}
+    sector = offset
+    for op, count in runs:
+        if op == OP_BASE:
+            if base is None:
+                raise ValueError("This archive needs its base image.")
+            base.seek(sector)
+            data = base.read(count * SECTOR_SIZE)
+            if len(data) != count * SECTOR_SIZE:
+                raise ValueError("Base image is shorter than the archive expects.")
+            pieces.append(data)
+            sector += len(data)
+        elif op == OP_RAW:
+            pieces.append(body[pos:pos + count * SECTOR_SIZE])
+            pos += count * SECTOR_SIZE
+            sector += count * SECTOR_SIZE
+        elif op == OP_TAIL:
+            pieces.append(body[pos:pos + count])
+            pos += count
+        elif op in STRIPPED:
+            width = sum(end - start for start, end in STRIPPED[op][1])
+            for _ in range(count):
+                stripped.setdefault(op, []).append((len(pieces), body[pos:pos + width]))
+                pieces.append(None)
+                pos += width
+            sector += count * SECTOR_SIZE
+        else:
+            raise ValueError(f"Unknown archive op {op}.")
+
+    # every stripped sector of a kind in the chunk is regenerated in one vector pass
+    for op, members in stripped.items():
+        sectors = _regenerate(op, [data for _index, data in members])
+        for (index, _data), data in zip(members, sectors):
+            pieces[index] = data
+    return b"".join(pieces)
+
+
+def restore_image(archive_path: str, out_path: str, base_path: str | None = None) -> int:
+    """
+    Rebuild the exact image an archive was made from, one chunk at a time,
+    raises ValueError when the base image's sha256 isn't the one archived or
+    the result's sha256 doesn't match the original. Returns the image size
+
+    The image is written next to out_path and only renamed over it once its
+    sha256 matches, a failed restore leaves out_path untouched
+    """
+    with open(archive_path, "rb") as f:
+        info = read_archive_info(f)
+        if info.base_sha256 is not None:
+            if not base_path:
+                raise ValueError("This archive needs its base image.")
+            base_digest = hashlib.sha256()
+            with open(base_path, "rb") as base:
+                while chunk := base.read(SCAN_SECTORS * SECTOR_SIZE):
+                    base_digest.update(chunk)
+            if base_digest.hexdigest() != info.base_sha256:
+                raise ValueError("The base image is not the one this archive was made from.")
+
+        digest = hashlib.sha256()
+        offset = 0
+        tmp = out_path + ".tmp"
+        base = open(base_path, "rb") if info.base_sha256 is not None else None
+        try:
+            with open(tmp, "wb") as out:
+                while offset < info.image_size:
+                    head = f.read(CHUNK.size)
+                    if len(head) < CHUNK.size:
+                        raise ValueError("Archive is truncated.")
+                    (length,) = CHUNK.unpack(head)
+                    data = _unpack_chunk(f.read(length), offset, base)
+                    if not data:
+                        raise ValueError("Archive chunk is empty.")
+                    digest.update(data)
+                    out.write(data)
+                    offset += len(data)
+            if offset != info.image_size or digest.hexdigest() != info.sha256:
+                raise ValueError("Restored image does not match the archived one.")
+            os.replace(tmp, out_path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        finally:
+            if base is not None:
+                base.close()
+    return offset
+
+
+def format_stats(stats: ArchiveStats, image_size: int) -> str:
+    ratio = stats.size / image_size if image_size else 0
+    return (
+        f"{stats.sectors} sectors: {stats.base} shared with the base, "
+        f"{stats.stripped} stripped, {stats.raw} stored whole.\n"
+        f"Archive is {stats.size} bytes ({ratio:.2%} of the image)."
+    )
+
+
+def main(argv=None):
+    """
+    python -m DW2_Tools.Image_Archive pack <image> <archive> [base image]
+    python -m DW2_Tools.Image_Archive unpack <archive> <image> [base image]
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) < 3 or argv[0] not in ("pack", "unpack"):
+        print("usage: python -m DW2_Tools.Image_Archive pack|unpack <source> <destination> [base image]")
+        return 2
+
+    command, source, destination = argv[:3]
+    base = argv[3] if len(argv) > 3 else None
+    if command == "pack":
+        stats = archive_image(source, destination, base)
+        print(format_stats(stats, os.path.getsize(source)))
+    else:
+        size = restore_image(source, destination, base)
+        print(f"Restored {size} bytes to {destination}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
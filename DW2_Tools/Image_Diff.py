@@ -0,0 +1,143 @@
+# DW2_Tools/Image_Diff.py
+
+import hashlib
+import mmap
+from typing import NamedTuple
+
+from .Image_Regions import table_regions, read_region
+from .Stage_Editor import FIELD_DEFS as STAGE_FIELD_DEFS
+from .Stage_Data import SLOTS_PER_SIDE, UNUSED_BYTES, decode_slot
+from .Unit_Editor import FIELD_DEFS as UNIT_FIELD_DEFS
+from .Item_Editor import FIELD_DEFS as ITEM_FIELD_DEFS, ITEM_STRUCT
+from .Name_Editor import split_name_fields, decode_name
+from .DW2_Bodyguard_Progression import GUARD_FIELD_LABELS
+
+STAGE_LABELS = {name: label for name, label, _row in STAGE_FIELD_DEFS}
+
+
+class FieldDiff(NamedTuple):
+    region: str       # region label, e.g. YTR_Stage or Unit data
+    record: str       # slot/item description
+    field: str        # field label
+    old: object
+    new: object
+
+
+def region_digest(source, region) -> bytes:
+    """Hash of a region's logical bytes"""
+    return hashlib.blake2b(read_region(source, region), digest_size=16).digest()
+
+
+def _stage_diffs(region, old: bytes, new: bytes) -> list[FieldDiff]:
+    diffs = []
+    size = region.record_size
+    for slot in range(len(old) // size):
+        a = old[slot * size:(slot + 1) * size]
+        b = new[slot * size:(slot + 1) * size]
+        if a == b:
+            continue
+        record = f"slot {slot} (side {slot // SLOTS_PER_SIDE + 1} slot {slot % SLOTS_PER_SIDE})"
+        fields_a, fields_b = decode_slot(a, 0), decode_slot(b, 0)
+        diffs += [
+            FieldDiff(region.label, record, STAGE_LABELS[name], fields_a[name], fields_b[name])
+            for name in fields_a if fields_a[name] != fields_b[name]
+        ]
+        unused_a = bytes(a[i] for i in UNUSED_BYTES)
+        unused_b = bytes(b[i] for i in UNUSED_BYTES)
+        if unused_a != unused_b:
+            diffs.append(FieldDiff(region.label, record, "Unused bytes", unused_a.hex(), unused_b.hex()))
+    return diffs
+
+
+def _unit_diffs(region, old: bytes, new: bytes) -> list[FieldDiff]:
+    diffs = []
+    size = region.record_size
+    for slot in range(len(old) // size):
+        a = old[slot * size:(slot + 1) * size]
+        b = new[slot * size:(slot + 1) * size]
+        if a != b:
+            diffs += [
+                FieldDiff(region.label, f"slot {hex(slot)}", label, a[i], b[i])
+                for i, (_name, label, _row) in enumerate(UNIT_FIELD_DEFS) if a[i] != b[i]
+            ]
+    return diffs
+
+
+def _item_diffs(region, old: bytes, new: bytes) -> list[FieldDiff]:
+    diffs = []
+    items_a = list(ITEM_STRUCT.iter_unpack(old))
+    items_b = list(ITEM_STRUCT.iter_unpack(new))
+    for (_name, label, _col, _row), a, b in zip(ITEM_FIELD_DEFS, items_a, items_b):
+        diffs += [
+            FieldDiff(region.label, label, field, va, vb)
+            for field, va, vb in zip(("ID", "Value", "Effect"), a, b) if va != vb
+        ]
+    return diffs
+
+
+def _name_diffs(region, old: bytes, new: bytes) -> list[FieldDiff]:
+    return [
+        FieldDiff(region.label, f"slot {slot}", "Name", decode_name(a), decode_name(b))
+        for slot, (a, b) in enumerate(zip(split_name_fields(old), split_name_fields(new)))
+        if a != b
+    ]
+
+
+def _byte_diffs(region, old: bytes, new: bytes) -> list[FieldDiff]:
+    diffs = []
+    for i, (a, b) in enumerate(zip(old, new)):
+        if a == b:
+            continue
+        if region.kind == "guard":
+            tier, field = divmod(i, len(GUARD_FIELD_LABELS))
+            diffs.append(FieldDiff(region.label, f"Tier {tier + 1}", GUARD_FIELD_LABELS[field],
+                                   f"{a:02X}", f"{b:02X}"))
+        else:
+            diffs.append(FieldDiff(region.label, f"byte {i}", "Value", f"{a:02X}", f"{b:02X}"))
+    return diffs
+
+
+DECODERS = {
+    "stage": _stage_diffs,
+    "units": _unit_diffs,
+    "items": _item_diffs,
+    "names": _name_diffs,
+    "guard": _byte_diffs,
+    "follow": _byte_diffs,
+}
+
+
+def diff_images(path_a: str, path_b: str, regions=None) -> list[FieldDiff]:
+    """
+    Field level differences between two DW2.bin images, limited to the regions
+    the tools edit, Both images are memory mapped, region hashes are compared
+    first and only regions that differ are decoded record by record
+    """
+    regions = table_regions() if regions is None else regions
+    diffs = []
+
+    with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+        with mmap.mmap(fa.fileno(), 0, access=mmap.ACCESS_READ) as ma, \
+                mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as mb:
+            for region in regions:
+                if region_digest(ma, region) == region_digest(mb, region):
+                    continue
+                old = read_region(ma, region)
+                new = read_region(mb, region)
+                diffs += DECODERS[region.kind](region, old, new)
+
+    return diffs
+
+
+def format_diff_report(diffs: list[FieldDiff]) -> str:
+    if not diffs:
+        return "No differences in the edited tables."
+
+    lines = [f"{len(diffs)} field differences:"]
+    current = None
+    for d in diffs:
+        if (d.region, d.record) != current:
+            current = (d.region, d.record)
+            lines.append(f"{d.region} {d.record}:")
+        lines.append(f"    {d.field}: {d.old} -> {d.new}")
+    return "\n".join(lines)
@@ -0,0 +1,324 @@
+# DW2_Tools/Image_Model.py
+
+import os
+
+from .Utility import DW2_BIN, write_patches
+from .Table_Cache import image_key, cached_tables, save_tables, drop_tables
+
+# Patches a model write joins across, one raw sector trailer + header (see NAME_MAX_GAP)
+MODEL_MAX_GAP = 0x140
+
+
+class ImageModel:
+    """
+    One cached copy of every table region of DW2.bin, shared by all open tools
+
+    Regions are read the first time a tool asks for them and kept as logical
+    bytes (Image_Regions layout), Writes go through the model so the cache
+    and the file never disagree, then every subscriber of a changed region
+    is called with the region key, tools only refresh the views that changed
+
+    With a WriteQueue, writes update the cache and notify right away but
+    reach DW2.bin when the queue flushes, without one they are written at once
+
+    Tools that write DW2.bin themselves (Mod Manager, table import) call
+    flush() before writing and refresh() with the regions they touched
+
+    set_image() points the model (and its queue) at another image, e.g. an
+    output clone made by Image_Output, so edits stop mutating the base image,
+    or another dump whose tables sit at other offsets
+
+    With table_cache, the first read loads every region at once from the
+    Table_Cache file (one small read) while it matches the image, and the
+    file is rewritten each time the cached regions and the image agree again
+    (after a flush, an unqueued write or a refresh), Before the model writes,
+    the image is checked against the key the tables were last synced at, when
+    something else changed it the cache file is dropped instead of saved until
+    a full refresh reads every region again
+    """
+
+    def __init__(self, bin_path: str = DW2_BIN, regions=None, queue=None, table_cache: bool = True):
+        if regions is None:
+            # Image_Regions imports the editors, which import this module
+            from .Image_Regions import table_regions
+            regions = table_regions()
+
+        self.bin_path = bin_path
+        self.queue = queue
+        self.table_cache = table_cache
+        self.regions = {region.key: region for region in regions}
+        self._cache: dict[str, bytes] = {}
+        # image_key() the cached regions were last known to match, None once stale
+        self._table_key = None
+        # region key -> list of (owner, callback)
+        self._subscribers: dict[str, list] = {}
+
+        if queue is not None:
+            queue.add_listener(self._queue_changed)
+            queue.add_flush_listener(self._queue_flushing)
+
+    def set_image(self, bin_path: str, regions=None) -> list[str]:
+        """
+        Read and write bin_path from now on, pending writes still go to the old
+        image first, cached regions are re-read so a different image shows up
+        in every tool (an exact clone changes nothing and notifies nobody)
+
+        regions default to image_regions(bin_path), pass the current regions
+        for a clone of the current image
+        """
+        regions = {region.key: region for region in (image_regions(bin_path) if regions is None else regions)}
+        missing = [self.regions[key].label for key in self.regions if key not in regions]
+        if missing:
+            raise ValueError(f"No offsets for {', '.join(missing)} in {bin_path}.")
+
+        self.flush()
+        self.bin_path = bin_path
+        if self.queue is not None:
+            self.queue.bin_path = bin_path
+        self.regions = regions
+        return self.refresh(self._cache.keys())
+
+    # Reading
+
+    def read(self, key: str) -> bytes:
+        """Logical bytes of one region, read from DW2.bin on first use"""
+        if key not in self._cache:
+            self.load([key])
+        return self._cache[key]
+
+    def load(self, keys=None):
+        """Read every region in keys (all regions by default) that isn't cached yet, in one open"""
+        keys = [key for key in (self.regions if keys is None else keys) if key not in self._cache]
+        if not keys:
+            return
+        if self.table_cache and not self._cache:
+            # cold start, every region from the cache file or extracted once,
+            # the key is taken first so a change while reading only makes it stale
+            self._table_key = image_key(self.bin_path)
+            tables = cached_tables(self.bin_path, self.regions.values())
+            for key, region in self.regions.items():
+                self._cache[key] = self._with_pending(region, tables[key])
+            return
+        with open(self.bin_path, "rb") as f:
+            for key in keys:
+                self._cache[key] = self._read(f, key)
+
+    def _read(self, f, key: str) -> bytes:
+        region = self.regions[key]
+        pieces = []
+        for offset, length in region.extents:
+            f.seek(offset)
+            pieces.append(f.read(length))
+        data = b"".join(pieces)
+        if len(data) != region.size:
+            raise IOError(f"Unexpected EOF reading {region.label}.")
+        return self._with_pending(region, data)
+
+    def _with_pending(self, region, data: bytes) -> bytes:
+        # edits still waiting in the queue take precedence over the file
+        if self.queue is not None and self.queue.dirty:
+            buf = bytearray(data)
+            if _overlay(region, buf, self.queue.runs):
+                data = bytes(buf)
+        return data
+
+    def keys_of_kind(self, kind: str) -> list[str]:
+        return [key for key, region in self.regions.items() if region.kind == kind]
+
+    # Change notifications
+
+    def subscribe(self, key: str, callback, owner=None):
+        """Call callback(key) whenever the region changes, owner is used to skip self notifications"""
+        self._subscribers.setdefault(key, []).append((owner, callback))
+
+    def unsubscribe(self, owner):
+        """Drop every subscription registered for owner (when its window closes)"""
+        for key, subscribers in self._subscribers.items():
+            self._subscribers[key] = [(o, cb) for o, cb in subscribers if o is not owner]
+
+    def publish(self, keys, source=None):
+        """Notify subscribers of each key, except those registered by source"""
+        for key in keys:
+            for owner, callback in list(self._subscribers.get(key, ())):
+                if source is None or owner is not source:
+                    callback(key)
+
+    # Writing
+
+    def write_patches(self, patches, source=None) -> list[str]:
+        """
+        Write absolute (offset, bytes) patches to DW2.bin (or queue them),
+        update every cached region they overlap and notify its subscribers,
+        returns the keys of the regions that changed
+        """
+        patches = [(offset, bytes(data)) for offset, data in patches if data]
+        if not patches:
+            return []
+
+        if self.queue is not None:
+            self.queue.add(patches)
+        else:
+            self._check_tables()
+            write_patches(self.bin_path, patches, max_gap=MODEL_MAX_GAP)
+
+        changed = []
+        for key, region in self.regions.items():
+            cached = bytearray(self._cache[key]) if key in self._cache else bytearray(region.size)
+            if _overlay(region, cached, patches):
+                if key in self._cache:
+                    self._cache[key] = bytes(cached)
+                changed.append(key)
+
+        if self.queue is None:
+            self._save_tables()
+        self.publish(changed, source)
+        return changed
+
+    def flush(self) -> int:
+        """Write any queued patches to DW2.bin now"""
+        return self.queue.flush() if self.queue is not None else 0
+
+    def write_region(self, key: str, data: bytes, source=None) -> list[str]:
+        """
+        Replace one region's logical bytes, only the records (or extents for
+        regions without fixed records) that differ from the cache are written
+        """
+        region = self.regions[key]
+        if len(data) != region.size:
+            raise ValueError(f"{region.label} is {region.size} bytes, got {len(data)}.")
+
+        current = self.read(key)
+        size = region.record_size or None
+        patches = []
+        pos = 0
+        for start, length in region.extents:
+            step = size or length
+            for rel in range(0, length, step):
+                a, b = pos + rel, pos + min(rel + step, length)
+                if current[a:b] != data[a:b]:
+                    patches.append((start + rel, data[a:b]))
+            pos += length
+        return self.write_patches(patches, source)
+
+    def refresh(self, keys=None, source=None) -> list[str]:
+        """
+        Re-read regions from DW2.bin after something wrote the file directly,
+        subscribers are only notified for regions whose bytes actually changed
+        """
+        self.flush()
+        keys = list(self.regions if keys is None else keys)
+        synced = None
+        if self.table_cache and set(keys) >= self.regions.keys():
+            # every region is re-read, they match the image as it is now
+            synced = image_key(self.bin_path)
+        else:
+            self._check_tables()
+        changed = []
+        with open(self.bin_path, "rb") as f:
+            for key in keys:
+                was_cached = key in self._cache
+                data = self._read(f, key)
+                if self._cache.get(key) != data:
+                    self._cache[key] = data
+                    if was_cached:
+                        changed.append(key)
+        if synced is not None:
+            self._table_key = synced
+        self._save_tables(synced)
+        self.publish(changed, source)
+        return changed
+
+    # Table cache
+
+    def _queue_changed(self, queue):
+        if not queue.dirty and queue.last_error is None:
+            self._save_tables()
+
+    def _queue_flushing(self, queue):
+        self._check_tables()
+
+    def _check_tables(self):
+        """Before the model writes the image, drop the cache file if something else changed the image"""
+        if not self.table_cache or self._table_key is None:
+            return
+        try:
+            current = image_key(self.bin_path) == self._table_key
+        except OSError:
+            current = False
+        if not current:
+            self._table_key = None
+            drop_tables(self.bin_path)
+
+    def _save_tables(self, key=None):
+        """
+        Rewrite the table cache file when every region is cached, nothing is
+        pending and the cached regions still match the image
+        """
+        if not self.table_cache or self._table_key is None or len(self._cache) != len(self.regions):
+            return
+        if self.queue is not None and self.queue.dirty:
+            return
+        try:
+            self._table_key = save_tables(self.bin_path, self.regions.values(), self._cache, key=key)
+        except OSError:
+            pass  # the cache is only a speed up
+
+
+def image_regions(bin_path: str) -> list:
+    """
+    Regions of any image: DW2.bin's own offsets, or for another dump the
+    tables located by file through its ISO9660 file system (another pregap,
+    track layout or sector size)
+
+    Raises ValueError when the tables can't be located that way, DW2.bin's
+    offsets would point at the wrong bytes of another image
+    """
+    # Image_Regions imports the editors, which import this module
+    from .Image_Regions import table_regions
+    from .ISO9660_Index import resolve_regions
+
+    if os.path.abspath(bin_path) == os.path.abspath(DW2_BIN):
+        return table_regions()
+    try:
+        return resolve_regions(bin_path)
+    except (OSError, ValueError, KeyError) as e:
+        raise ValueError(
+            f"Could not locate the tables of {os.path.basename(bin_path)} through its "
+            f"ISO9660 file system ({e}), run Discover Table Offsets in Image Tools instead."
+        ) from e
+
+
+def merge_records(base: bytes, mine: bytes, theirs: bytes, record_size: int) -> tuple[bytes, list[int]]:
+    """
+    Three way merge of a table an editor holds in memory after another tool
+    wrote it: records the editor didn't touch (mine == base) take the new
+    bytes, records it edited are kept. Returns the merged table and the
+    indexes of records changed on both sides (the editor's edit wins)
+    """
+    if mine == base:
+        return theirs, []
+    merged = bytearray(theirs)
+    conflicts = []
+    for start in range(0, len(base), record_size):
+        end = start + record_size
+        if mine[start:end] == base[start:end]:
+            continue
+        if theirs[start:end] not in (base[start:end], mine[start:end]):
+            conflicts.append(start // record_size)
+        merged[start:end] = mine[start:end]
+    return bytes(merged), conflicts
+
+
+def _overlay(region, buf: bytearray, patches) -> bool:
+    """Copy the parts of absolute patches that fall inside a region into its logical bytes"""
+    hit = False
+    for offset, data in patches:
+        pos = 0
+        for start, length in region.extents:
+            lo = max(start, offset)
+            hi = min(start + length, offset + len(data))
+            if lo < hi:
+                hit = True
+                buf[pos + lo - start:pos + hi - start] = data[lo - offset:hi - offset]
+            pos += length
+    return hit
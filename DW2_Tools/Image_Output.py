@@ -0,0 +1,86 @@
+# DW2_Tools/Image_Output.py
+
+import os
+
+from .Utility import write_patches
+
+# linux/fs.h FICLONE, share every extent of the source (btrfs, XFS, bcachefs...)
+FICLONE = 0x40049409
+
+# Fallback copy chunk, all zero chunks are skipped so the output stays sparse
+COPY_CHUNK = 1024 * 1024
+
+# Patches this close together are written as one run, one raw sector trailer + header
+OUTPUT_MAX_GAP = 0x140
+
+
+def _reflink(src, dst) -> bool:
+    try:
+        import fcntl
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except (ImportError, OSError):
+        return False
+
+
+def _copy_file_range(src, dst, size: int) -> bool:
+    """Kernel side copy, reflinks or server side copies where the filesystem can"""
+    if not hasattr(os, "copy_file_range"):
+        return False
+    copied = 0
+    try:
+        while copied < size:
+            n = os.copy_file_range(src.fileno(), dst.fileno(), size - copied, copied, copied)
+            if n == 0:
+                return False
+            copied += n
+    except OSError:
+        return False
+    return True
+
+
+def _sparse_copy(src, dst, size: int):
+    zero = bytes(COPY_CHUNK)
+    src.seek(0)
+    dst.seek(0)
+    while True:
+        data = src.read(COPY_CHUNK)
+        if not data:
+            break
+        if data == zero[:len(data)]:
+            dst.seek(len(data), os.SEEK_CUR)
+        else:
+            dst.write(data)
+    dst.truncate(size)
+
+
+def clone_image(src_path: str, dst_path: str) -> str:
+    """
+    Copy an image as cheaply as the filesystem allows, returns the method used
+
+    reflink (FICLONE) shares the source's blocks and costs only metadata,
+    copy_file_range lets the kernel copy (or reflink) without passing data
+    through Python, the fallback is a chunked copy that leaves zero runs sparse
+    """
+    if os.path.abspath(src_path) == os.path.abspath(dst_path):
+        raise ValueError("The output image must be a different file from the base image.")
+
+    size = os.path.getsize(src_path)
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        if _reflink(src, dst):
+            return "reflink"
+        if _copy_file_range(src, dst, size):
+            return "copy_file_range"
+        dst.truncate(0)
+        _sparse_copy(src, dst, size)
+        return "sparse copy"
+
+
+def write_variant(base_path: str, out_path: str, patches) -> tuple[str, int]:
+    """
+    New image at out_path: a clone of base_path with (offset, bytes) patches
+    written into it, base_path is never modified. Returns (clone method, writes made)
+    """
+    method = clone_image(base_path, out_path)
+    runs = write_patches(out_path, patches, max_gap=OUTPUT_MAX_GAP) if patches else []
+    return method, len(runs)
@@ -0,0 +1,99 @@
+# DW2_Tools/Image_Regions.py
+
+from typing import NamedTuple
+
+from .Utility import stage_data, unit_data, itemsoffset
+from .Stage_Editor import filenames as STAGE_NAMES
+from .Stage_Data import SLOTS_PER_BLOCK, SLOT_SIZE as STAGE_SLOT_SIZE
+from .Unit_Editor import NUM_SLOTS_FIRST, NUM_SLOTS_SECOND, SLOT_SIZE as UNIT_SLOT_SIZE
+from .Item_Editor import ITEM_TABLE_SIZE, ITEM_STRUCT
+from .Name_Editor import NAME_GROUPS
+from .DW2_Bodyguard_Progression import GuardTool
+
+
+class Region(NamedTuple):
+    """
+    One table the tools edit, extents are the (offset, length) pieces it
+    occupies in DW2.bin, read back to back they give the table's logical bytes
+    """
+    key: str
+    kind: str          # stage, units, items, names, guard, follow
+    label: str
+    extents: tuple
+    record_size: int   # 0 when records aren't fixed size (names)
+
+    @property
+    def size(self) -> int:
+        return sum(length for _offset, length in self.extents)
+
+
+def table_regions() -> list[Region]:
+    """Every region of DW2.bin the package reads or writes, in file order per kind"""
+    block = SLOTS_PER_BLOCK * STAGE_SLOT_SIZE
+    regions = [
+        Region(
+            f"stage:{i}", "stage", STAGE_NAMES[i],
+            tuple((offset, block) for offset in stage_data[i]), STAGE_SLOT_SIZE,
+        )
+        for i in range(len(STAGE_NAMES))
+    ]
+    regions += [
+        Region(
+            "units", "units", "Unit data",
+            ((unit_data[0], NUM_SLOTS_FIRST * UNIT_SLOT_SIZE),
+             (unit_data[1], NUM_SLOTS_SECOND * UNIT_SLOT_SIZE)),
+            UNIT_SLOT_SIZE,
+        ),
+        Region("items", "items", "Item table", ((itemsoffset, ITEM_TABLE_SIZE),), ITEM_STRUCT.size),
+        Region(
+            "names", "names", "Unit names",
+            tuple((base, count * stride) for base, count, _length, stride in NAME_GROUPS), 0,
+        ),
+        Region(
+            "guard", "guard", "Bodyguard progression",
+            ((GuardTool.GUARD_PROG_OFFSET, GuardTool.GUARD_PROG_SIZE),), 1,
+        ),
+        Region(
+            "follow", "follow", "AI_GUARD_FOLLOW",
+            ((GuardTool.AI_GUARD_FOLLOW, len(GuardTool.FOLLOW_VALUE)),), 1,
+        ),
+    ]
+    return regions
+
+
+def read_region(source, region: Region) -> bytes:
+    """
+    Logical bytes of a region from an open file or a mapped/in-memory image
+    (anything that supports seek/read, or slicing)
+    """
+    if hasattr(source, "seek") and not hasattr(source, "__getitem__"):
+        pieces = []
+        for offset, length in region.extents:
+            source.seek(offset)
+            pieces.append(source.read(length))
+        data = b"".join(pieces)
+    else:
+        data = b"".join(source[offset:offset + length] for offset, length in region.extents)
+
+    if len(data) != region.size:
+        raise IOError(f"Unexpected EOF reading {region.label}.")
+    return data
+
+
+def logical_to_physical(region: Region, pos: int) -> int:
+    """Absolute DW2.bin offset of a byte position inside a region's logical bytes"""
+    for offset, length in region.extents:
+        if pos < length:
+            return offset + pos
+        pos -= length
+    raise ValueError(f"Position is past the end of {region.label}.")
+
+
+def physical_to_logical(region: Region, offset: int) -> int | None:
+    """Position inside a region's logical bytes of an absolute offset, None if outside"""
+    pos = 0
+    for start, length in region.extents:
+        if start <= offset < start + length:
+            return pos + offset - start
+        pos += length
+    return None
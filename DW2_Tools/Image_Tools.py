@@ -0,0 +1,370 @@
+# DW2_Tools/Image_Tools.py
+
+import os
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from .Utility import ROOT_DIR, ICON_DIR, setup_lilac_styles
+from .Image_Diff import diff_images, format_diff_report
+from .Table_Export import TABLES, TABLE_REGION_KINDS, export_table, import_table
+from .Image_Model import ImageModel
+from .Patch_Files import create_ppf, region_extents
+from .ISO9660_Index import load_iso_index, load_table_locations, format_locations
+from .Offset_Discovery import discover_offsets, format_discovery, relocated_regions
+from .CD_Sectors import scan_image, format_scan_report
+
+# What a new PPF patch compares, every table region or every byte of the image
+PATCH_SCOPES = ("Edited tables", "Whole image")
+
+
+class ImageTools:
+    """
+    DW2 Image Tools
+
+    Whole image operations that work across every table the editors touch,
+    results are shown in the report box at the bottom, writes to DW2.bin are
+    reported to the shared ImageModel so open editors reload
+    """
+
+    def __init__(self, root, model: ImageModel | None = None, on_image_change=None):
+        self.root = root
+        self.model = model or ImageModel()
+        # called after the model is pointed at another image
+        self.on_image_change = on_image_change
+        self.root.title("DW2 Image Tools")
+
+        self.root.iconbitmap(os.path.join(ICON_DIR, "icon3.ico"))
+
+        self.root.minsize(900, 650)
+        self.root.resizable(False, False)
+
+        setup_lilac_styles()
+
+        self._build_gui()
+
+    # GUI
+
+    def _build_gui(self):
+        """Handles GUI design"""
+        self.bg = ttk.Frame(self.root, style="Lilac.TFrame")
+        self.bg.place(x=0, y=0, relwidth=1, relheight=1)
+
+        self.bin_label = ttk.Label(
+            self.bg,
+            text=f"DW2 BIN: {os.path.basename(self.model.bin_path)}",
+            style="Lilac.TLabel",
+        )
+        self.bin_label.place(x=20, y=20)
+
+        # Compare section
+        ttk.Label(
+            self.bg,
+            text="Compare",
+            style="Lilac.TLabel",
+            font=("TkDefaultFont", 10, "bold"),
+        ).place(x=20, y=60)
+
+        ttk.Button(
+            self.bg,
+            text="Compare two images",
+            command=self.compare_images,
+            width=30,
+        ).place(x=40, y=90)
+
+        # Tables section
+        ttk.Label(
+            self.bg,
+            text="Tables (CSV / JSON Lines)",
+            style="Lilac.TLabel",
+            font=("TkDefaultFont", 10, "bold"),
+        ).place(x=320, y=60)
+
+        self.table_var = tk.StringVar(value=TABLES[0])
+        ttk.Combobox(
+            self.bg,
+            textvariable=self.table_var,
+            values=TABLES,
+            state="readonly",
+            width=12,
+        ).place(x=340, y=92)
+
+        ttk.Button(
+            self.bg,
+            text="Export Table",
+            command=self.export_table,
+            width=14,
+        ).place(x=450, y=90)
+
+        ttk.Button(
+            self.bg,
+            text="Import Table",
+            command=self.import_table,
+            width=14,
+        ).place(x=560, y=90)
+
+        ttk.Button(
+            self.bg,
+            text="Locate Tables (ISO9660)",
+            command=self.locate_tables,
+            width=22,
+        ).place(x=670, y=90)
+
+        ttk.Button(
+            self.bg,
+            text="Discover Table Offsets",
+            command=self.discover_tables,
+            width=22,
+        ).place(x=670, y=125)
+
+        ttk.Button(
+            self.bg,
+            text="Check Sector EDC/ECC",
+            command=self.check_sectors,
+            width=22,
+        ).place(x=670, y=160)
+
+        # Patches section
+        ttk.Label(
+            self.bg,
+            text="Patches (PPF3)",
+            style="Lilac.TLabel",
+            font=("TkDefaultFont", 10, "bold"),
+        ).place(x=20, y=140)
+
+        ttk.Label(self.bg, text="Description", style="Lilac.TLabel").place(x=40, y=172)
+        self.patch_desc_var = tk.StringVar(value="DW2 mod")
+        ttk.Entry(self.bg, textvariable=self.patch_desc_var, width=40).place(x=120, y=170)
+
+        self.patch_scope_var = tk.StringVar(value=PATCH_SCOPES[0])
+        ttk.Combobox(
+            self.bg,
+            textvariable=self.patch_scope_var,
+            values=PATCH_SCOPES,
+            state="readonly",
+            width=14,
+        ).place(x=380, y=170)
+
+        self.patch_undo_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            self.bg,
+            text="Include undo data",
+            variable=self.patch_undo_var,
+        ).place(x=510, y=170)
+
+        ttk.Button(
+            self.bg,
+            text="Create PPF Patch",
+            command=self.create_patch,
+            width=20,
+        ).place(x=40, y=205)
+
+        # Status line + report box
+        self.status_label = ttk.Label(self.bg, text="", style="Lilac.TLabel")
+        self.status_label.place(x=20, y=300)
+
+        self.report = tk.Text(self.root, width=108, height=18)
+        self.report.place(x=20, y=330)
+
+    # Helper functions
+
+    def _set_status(self, msg: str, ok: bool = True):
+        self.status_label.config(
+            text=msg,
+            foreground="green" if ok else "red",
+        )
+
+    def _show_report(self, text: str):
+        self.report.delete("1.0", tk.END)
+        self.report.insert("1.0", text)
+
+    def _ask_image(self, title: str, initialfile: str = "") -> str:
+        return filedialog.askopenfilename(
+            parent=self.root,
+            initialdir=ROOT_DIR,
+            initialfile=initialfile,
+            title=title,
+            filetypes=[("BIN images", "*.bin"), ("All files", "*.*")],
+        )
+
+    # Compare
+
+    def compare_images(self):
+        """Field level diff of the edited tables between two images"""
+        path_a = self._ask_image("Select first image", os.path.basename(self.model.bin_path))
+        if not path_a:
+            return
+        path_b = self._ask_image("Select second image")
+        if not path_b:
+            return
+
+        try:
+            self.model.flush()
+            diffs = diff_images(path_a, path_b)
+            self._show_report(format_diff_report(diffs))
+            self._set_status(
+                f"{os.path.basename(path_a)} vs {os.path.basename(path_b)}: "
+                f"{len(diffs)} field differences.",
+                ok=True,
+            )
+        except Exception as e:
+            self._set_status(f"Error comparing images: {e}", ok=False)
+
+    # Tables
+
+    def export_table(self):
+        """Stream the selected table from DW2.bin to a CSV or JSON Lines file"""
+        table = self.table_var.get()
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            initialdir=ROOT_DIR,
+            initialfile=f"DW2_{table}.csv",
+            title=f"Export {table}",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+
+        try:
+            self.model.flush()
+            count = export_table(table, path, self.model.bin_path, self.model.regions.values())
+            self._set_status(f"Exported {count} {table} rows to {os.path.basename(path)}.", ok=True)
+        except Exception as e:
+            self._set_status(f"Error exporting {table}: {e}", ok=False)
+
+    def import_table(self):
+        """Validate a CSV or JSON Lines file and write the changed records into DW2.bin"""
+        table = self.table_var.get()
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            initialdir=ROOT_DIR,
+            title=f"Import {table}",
+            filetypes=[("CSV files", "*.csv"), ("JSON Lines", "*.jsonl"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+
+        try:
+            self.model.flush()
+            count = import_table(table, path, self.model.bin_path, self.model.regions.values())
+            self.model.refresh(self.model.keys_of_kind(TABLE_REGION_KINDS[table]), source=self)
+            self._set_status(
+                f"Imported {table} from {os.path.basename(path)}: {count} records changed.",
+                ok=True,
+            )
+        except ValueError as e:
+            self._show_report(str(e).replace("; ", "\n"))
+            self._set_status(f"{table} not imported, invalid rows listed below.", ok=False)
+        except Exception as e:
+            self._set_status(f"Error importing {table}: {e}", ok=False)
+
+    def locate_tables(self):
+        """Show which file of the image's ISO9660 file system every table lives in"""
+        try:
+            self.model.flush()
+            index = load_iso_index(self.model.bin_path)
+            layout = index.layout
+            header = (
+                f"{len(index.files)} files, {layout.sector_size} byte sectors, "
+                f"user data at +{layout.data_offset}, pregap {layout.lba_base} sectors\n\n"
+            )
+            self._show_report(header + format_locations(load_table_locations()))
+            self._set_status("Tables located by file.", ok=True)
+        except Exception as e:
+            self._set_status(f"Error indexing image: {e}", ok=False)
+
+    def discover_tables(self):
+        """Find every table in another dump or release by its byte signatures"""
+        path = self._ask_image("Select the image to scan")
+        if not path:
+            return
+
+        try:
+            self.model.flush()
+            self._set_status("Scanning image for table signatures...", ok=True)
+            self.root.update_idletasks()
+            shifts = discover_offsets(path)
+            self._show_report(format_discovery(shifts))
+            missing = sum(1 for shift in shifts.values() if shift is None)
+            self._set_status(
+                f"{os.path.basename(path)}: {len(shifts) - missing} of {len(shifts)} tables found.",
+                ok=not missing,
+            )
+        except Exception as e:
+            self._set_status(f"Error scanning image: {e}", ok=False)
+            return
+
+        if missing or not messagebox.askyesno(
+            "Edit this image",
+            f"Every table was found in {os.path.basename(path)}.\n\n"
+            "Edit it in place with the discovered offsets?",
+            parent=self.root,
+        ):
+            return
+        try:
+            self.model.set_image(path, relocated_regions(shifts))
+            self.bin_label.config(text=f"DW2 BIN: {os.path.basename(path)}")
+            if self.on_image_change is not None:
+                self.on_image_change()
+            self._set_status(f"Editing {os.path.basename(path)} with the discovered offsets.", ok=True)
+        except Exception as e:
+            self._set_status(f"Error switching image: {e}", ok=False)
+
+    def check_sectors(self):
+        """Verify EDC and P/Q ECC of every data sector, bad sectors are listed with their tables"""
+        try:
+            self.model.flush()
+            self._set_status("Checking sector EDC/ECC...", ok=True)
+            self.root.update_idletasks()
+            result = scan_image(self.model.bin_path)
+            try:
+                index = load_iso_index(self.model.bin_path)
+            except Exception:
+                index = None
+            self._show_report(format_scan_report(result, self.model.regions.values(), index=index))
+            self._set_status(
+                f"{len(result.bad)} of {sum(result.checked.values())} data sectors with bad EDC/ECC.",
+                ok=not result.bad,
+            )
+        except Exception as e:
+            self._set_status(f"Error checking sectors: {e}", ok=False)
+
+    # Patches
+
+    def create_patch(self):
+        """Build a PPF3 patch from an original image to a modified one (DW2.bin by default)"""
+        original = self._ask_image("Select the original (unmodified) image")
+        if not original:
+            return
+        modified = self._ask_image("Select the modified image", os.path.basename(self.model.bin_path))
+        if not modified:
+            return
+        out_path = filedialog.asksaveasfilename(
+            parent=self.root,
+            initialdir=ROOT_DIR,
+            initialfile="DW2_mod.ppf",
+            title="Save PPF patch",
+            defaultextension=".ppf",
+            filetypes=[("PPF patches", "*.ppf"), ("All files", "*.*")],
+        )
+        if not out_path:
+            return
+
+        try:
+            self.model.flush()
+            # the tables where the model's image keeps them (it may be relocated)
+            extents = region_extents(self.model.regions.values())
+            if self.patch_scope_var.get() == "Whole image":
+                extents = [(0, os.path.getsize(original))]
+            count = create_ppf(
+                original, modified, out_path,
+                description=self.patch_desc_var.get(),
+                extents=extents,
+                undo=self.patch_undo_var.get(),
+            )
+            self._set_status(
+                f"Wrote {os.path.basename(out_path)}: {count} records.",
+                ok=True,
+            )
+        except Exception as e:
+            self._set_status(f"Error creating patch: {e}", ok=False)
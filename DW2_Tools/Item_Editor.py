@@ -1,8 +1,55 @@
 # DW2_Tools/Item_Editor.py
 import os
+import struct
 import tkinter as tk
 
-from .Utility import TheCheck, itemsoffset, DW2_BIN, ICON_DIR
+from .Utility import TheCheck, itemsoffset, ICON_DIR, BACKUP_DIR
+from .Image_Model import ImageModel
+
+# Mod file extension written by Create Item Mod
+DW2_ITEM_MOD_EXT = ".DW2ItemMod"
+
+# Backup of the original item table, written the first time the editor opens
+ITEM_BACKUP = "DW2_Original.itemdata"
+
+# Each item is 12 bytes: 4 byte ID, 4 byte value, 4 byte effect
+ITEM_STRUCT = struct.Struct("<III")
+ITEM_COUNT = 16
+ITEM_TABLE_SIZE = ITEM_COUNT * ITEM_STRUCT.size  # 192
+
+
+def decode_item_table(data: bytes) -> list[tuple[int, int, int]]:
+    """Split the raw 192 byte table into (id, value, effect) tuples"""
+    if len(data) != ITEM_TABLE_SIZE:
+        raise ValueError(f"Item table is {len(data)} bytes, expected {ITEM_TABLE_SIZE}.")
+    return list(ITEM_STRUCT.iter_unpack(data))
+
+
+def encode_item_table(items) -> bytes:
+    """Pack 16 (id, value, effect) tuples back into the raw table"""
+    if len(items) != ITEM_COUNT:
+        raise ValueError(f"Expected {ITEM_COUNT} items, got {len(items)}.")
+    return b"".join(ITEM_STRUCT.pack(*item) for item in items)
+
+
+def write_item_file(path: str, table: bytes):
+    """
+    Write an item mod/backup file
+
+    Layout: the 192 byte item table followed by itemsoffset as 4 bytes
+    """
+    with open(path, "wb") as f:
+        f.write(table)
+        f.write(itemsoffset.to_bytes(4, "little"))
+
+
+def read_item_file(path: str) -> bytes:
+    """Read the 192 byte item table from an item mod/backup file"""
+    with open(path, "rb") as f:
+        table = f.read(ITEM_TABLE_SIZE)
+    if len(table) != ITEM_TABLE_SIZE:
+        raise ValueError("Item file is too short for all 16 items.")
+    return table
 
 # Field layout: var_name, label_text, column_index, row_index
 # Columns: 0 = HP, 1 = Arrows, 2 = Stat 1–4, 3 = Stat 5–8
@@ -33,11 +80,13 @@ class ItemEditor(TheCheck):
     """
     DW2 Item Editor
 
-    It uses a provided root, Reads/writes item values directly in DW2.bin
+    It uses a provided root, Reads the whole item table from the shared ImageModel,
+    exposes ID, value and effect of all 16 items and writes back only the items that changed
     """
 
-    def __init__(self, root):
+    def __init__(self, root, model: ImageModel | None = None):
         self.root = root
+        self.model = model or ImageModel()
         self.root.title("Item Editor")
         
         self.root.iconbitmap(os.path.join(ICON_DIR, "icon5.ico"))
@@ -45,14 +94,19 @@ class ItemEditor(TheCheck):
         self.root.minsize(800, 500)
         self.root.resizable(False, False)
 
-        # Tk variables per item value
+        # Tk variables per item: value (field_vars), ID and effect
         self.field_vars = {}
+        self.id_vars = {}
+        self.effect_vars = {}
         for name, _label, _col, _row in FIELD_DEFS:
             var = tk.IntVar()
             setattr(self, name, var)
             self.field_vars[name] = var
+            self.id_vars[name] = tk.IntVar()
+            self.effect_vars[name] = tk.IntVar()
 
-        self.itemlist = []  # list storing item values (16 ints)
+        self.itemlist = []  # list storing (id, value, effect) for the 16 items
+        self.modname = tk.StringVar()
 
         # Build GUI
         self._build_labels()
@@ -61,6 +115,21 @@ class ItemEditor(TheCheck):
         # Load values from DW2.bin
         self.item_reader()
 
+        # reload when another tool changes the item table
+        self.model.subscribe("items", self.items_changed, owner=self)
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.model.unsubscribe(self)
+
+    def items_changed(self, key=None):
+        """The item table was written by another tool, reload the entries"""
+        self.item_reader()
+        self.status_label.config(
+            text="Item values reloaded after a change in another tool.", fg="green"
+        )
+
     # GUI helpers
 
     def _build_labels(self):
@@ -70,7 +139,7 @@ class ItemEditor(TheCheck):
         tk.Label(
             self.root,
             text=(
-                "You can change the value the items have with the Item Editor. "
+                "You can change the ID, value and effect of items with the Item Editor. "
                 "Stat increase items refer to the attack and defense items that "
                 "\n are given when an officer or gate captain is defeated."
             ),
@@ -87,6 +156,7 @@ class ItemEditor(TheCheck):
             x = base_x + col * col_spacing
             y = base_y + row * row_spacing
             tk.Label(self.root, text=label_text).place(x=x, y=y)
+            tk.Label(self.root, text="ID        Value     Effect").place(x=x, y=y + 20)
 
     def _build_entries_and_button(self):
         vcmd = (self.root.register(self.validate_numeric_input), "%P")
@@ -95,17 +165,20 @@ class ItemEditor(TheCheck):
         base_y = 40
         col_spacing = 200
         row_spacing = 80
+        entry_spacing = 60
 
         for name, _label_text, col, row in FIELD_DEFS:
             x = base_x + col * col_spacing
             y = base_y + row * row_spacing
-            var = self.field_vars[name]
-            tk.Entry(
-                self.root,
-                textvariable=var,
-                validate="key",
-                validatecommand=vcmd,
-            ).place(x=x, y=y)
+            item_vars = (self.id_vars[name], self.field_vars[name], self.effect_vars[name])
+            for i, var in enumerate(item_vars):
+                tk.Entry(
+                    self.root,
+                    textvariable=var,
+                    width=8,
+                    validate="key",
+                    validatecommand=vcmd,
+                ).place(x=x + i * entry_spacing, y=y)
 
         tk.Button(
             self.root,
@@ -114,36 +187,45 @@ class ItemEditor(TheCheck):
             height=3,
         ).place(x=30, y=330)
 
+        tk.Label(self.root, text="Enter a mod name").place(x=10, y=460)
+        tk.Entry(self.root, textvariable=self.modname).place(x=120, y=460)
+        tk.Button(
+            self.root,
+            text="Create Item Mod",
+            command=self.create_item_mod,
+        ).place(x=260, y=455)
+
     # Reading/writing
 
+    def _collect_items(self) -> list[tuple[int, int, int]]:
+        """(id, value, effect) for all 16 items from the TK vars, in FIELD_DEFS order"""
+        return [
+            (self.id_vars[name].get(), self.field_vars[name].get(), self.effect_vars[name].get())
+            for name, _label, _col, _row in FIELD_DEFS
+        ]
+
     def item_reader(self):
         """
-        Read the 16 item value entries from DW2.bin and populate the IntVars,
+        Read the 16 item entries from the image model and populate the IntVars,
         Each entry in DW2 is 12 bytes: 4 byte ID, 4 byte value, and 4 byte effect
-        """
-        self.itemlist.clear()
 
+        On first run the original table is also backed up for mod disabling
+        """
         try:
-            with open(DW2_BIN, "rb") as f1:
-                f1.seek(itemsoffset)
-                for _ in range(16):
-                    item_id = f1.read(4)   # essential to read, may add support for editing IDs later
-                    if len(item_id) != 4:
-                        raise IOError("Unexpected EOF while reading item IDs.")
-                    itemvalue = int.from_bytes(f1.read(4), "little")
-                    itemeffect = f1.read(4)  # may add support for effect altering later
-                    if len(itemeffect) != 4:
-                        raise IOError("Unexpected EOF while reading item effects.")
-                    self.itemlist.append(itemvalue)
-
-            if len(self.itemlist) != 16:
-                raise ValueError(
-                    f"Expected 16 item values, got {len(self.itemlist)}."
-                )
+            table = self.model.read("items")
+
+            self.itemlist = decode_item_table(table)
 
             # Assign into IntVars in the same order as FIELD_DEFS
-            for i, (name, _label, _col, _row) in enumerate(FIELD_DEFS):
-                self.field_vars[name].set(self.itemlist[i])
+            for (name, _label, _col, _row), (item_id, value, effect) in zip(FIELD_DEFS, self.itemlist):
+                self.id_vars[name].set(item_id)
+                self.field_vars[name].set(value)
+                self.effect_vars[name].set(effect)
+
+            os.makedirs(BACKUP_DIR, exist_ok=True)
+            backup_path = os.path.join(BACKUP_DIR, ITEM_BACKUP)
+            if not os.path.exists(backup_path):
+                write_item_file(backup_path, table)
 
             self.status_label.config(
                 text="Item values loaded successfully.", fg="green"
@@ -156,32 +238,16 @@ class ItemEditor(TheCheck):
 
     def item_writer(self):
         """
-        Write the current item values directly into DW2.bin,
-        keeps original IDs and effects but only the 4 byte value for each item is changed for now
+        Write ID, value and effect of all 16 items back into DW2.bin,
+        only the 12 byte entries that changed are written
         """
         try:
-            # Collect current values from TK vars in FIELD_DEFS order
-            col = [
-                self.field_vars[name].get().to_bytes(4, "little")
-                for name, _label, _col, _row in FIELD_DEFS
-            ]
-
-            if len(col) != 16:
-                raise ValueError(
-                    f"Expected 16 values to write, got {len(col)}."
-                )
-
-            with open(DW2_BIN, "r+b") as w1:
-                w1.seek(itemsoffset)
-                for item_value_bytes in col:
-                    item_id = w1.read(4)  # keep existing ID
-                    if len(item_id) != 4:
-                        raise IOError("Unexpected EOF while reading item ID.")
-                    w1.write(item_value_bytes)  # overwrite the value
-                    item_effect = w1.read(4)    # keep existing effect
-                    if len(item_effect) != 4:
-                        raise IOError("Unexpected EOF while reading item effect.")
+            items = self._collect_items()
+            table = encode_item_table(items)
+
+            self.model.write_region("items", table, source=self)
 
+            self.itemlist = items
             self.status_label.config(
                 text="Values were written without issues.", fg="green"
             )
@@ -190,3 +256,24 @@ class ItemEditor(TheCheck):
             self.status_label.config(
                 text=f"Error with entries: {e}", fg="red"
             )
+
+    # Mod creation
+
+    def create_item_mod(self):
+        """
+        Dump the item values currently in the entries to a .DW2ItemMod file in the cwd
+        """
+        sep = "."
+        base_name = self.modname.get().split(sep, 1)[0] or "DW2Items"
+        usermodname = base_name + DW2_ITEM_MOD_EXT
+
+        try:
+            write_item_file(usermodname, encode_item_table(self._collect_items()))
+
+            self.status_label.config(
+                text=f"Mod file '{usermodname}' created successfully.", fg="green"
+            )
+        except Exception as e:
+            self.status_label.config(
+                text=f"Error creating mod file '{usermodname}': {e}", fg="red"
+            )
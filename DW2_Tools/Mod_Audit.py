@@ -0,0 +1,236 @@
+# DW2_Tools/Mod_Audit.py
+
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+from .Utility import BACKUP_DIR
+from .Stage_Editor import filenames as STAGE_NAMES, stage_extension as STAGE_EXTS
+from .Stage_Data import SLOT_SIZE as STAGE_SLOT_SIZE, STAGE_DATA_SIZE
+from .Stage_Validator import validate_stage, RULES
+from .Unit_Editor import DW2_UNIT_MOD_EXT, SLOT_SIZE as UNIT_SLOT_SIZE, NUM_SLOTS_TOTAL
+from .Name_Editor import DW2_NAME_MOD_EXT, NAME_BACKUP, read_name_mod
+from .Item_Editor import (
+    DW2_ITEM_MOD_EXT, ITEM_BACKUP, ITEM_TABLE_SIZE, ITEM_STRUCT,
+)
+
+UNIT_BACKUP = "DW2_Original.unitdata"
+UNIT_DATA_SIZE = NUM_SLOTS_TOTAL * UNIT_SLOT_SIZE
+
+# Full file sizes as written by the editors (table + appended 4 byte offsets)
+STAGE_MOD_SIZE = STAGE_DATA_SIZE + 8 * 4
+UNIT_MOD_SIZE = UNIT_DATA_SIZE + 2 * 4
+ITEM_MOD_SIZE = ITEM_TABLE_SIZE + 4
+
+
+def detect_mod_kind(path: str) -> tuple[str, int | None] | None:
+    """
+    (kind, stage index) for a mod file from its extension, kind is one of
+    "stage", "unit", "name", "item", or None for files that aren't DW2 mods
+    """
+    lower = path.lower()
+    for i, ext in enumerate(STAGE_EXTS):
+        if lower.endswith(ext.lower()):
+            return "stage", i
+    if lower.endswith(DW2_UNIT_MOD_EXT.lower()):
+        return "unit", None
+    if lower.endswith(DW2_NAME_MOD_EXT.lower()):
+        return "name", None
+    if lower.endswith(DW2_ITEM_MOD_EXT.lower()):
+        return "item", None
+    return None
+
+
+def changed_records(data: bytes, original: bytes, record_size: int) -> list[int]:
+    """Indexes of the fixed size records that differ between two tables"""
+    if data == original:
+        return []
+    return [
+        i for i in range(len(data) // record_size)
+        if data[i * record_size:(i + 1) * record_size]
+        != original[i * record_size:(i + 1) * record_size]
+    ]
+
+
+def backup_name(kind: str, stage_index: int | None = None) -> str:
+    """File in Backups_For_Mod_Disabling a mod of this kind is diffed against"""
+    if kind == "stage":
+        return f"{STAGE_NAMES[stage_index]}_Original.stage"
+    return {"unit": UNIT_BACKUP, "item": ITEM_BACKUP, "name": NAME_BACKUP}[kind]
+
+
+def backup_mtime(backup_dir: str, name: str) -> float | None:
+    """mtime of a backup file, None while the editor hasn't written it yet"""
+    try:
+        return os.stat(os.path.join(backup_dir, name)).st_mtime
+    except OSError:
+        return None
+
+
+def _read_original(backup_dir: str, name: str, size: int) -> bytes | None:
+    """Backup table from Backups_For_Mod_Disabling"""
+    return _read_backup(backup_dir, name, size, backup_mtime(backup_dir, name))
+
+
+@lru_cache(maxsize=None)
+def _read_backup(backup_dir: str, name: str, size: int, mtime: float | None) -> bytes | None:
+    # cached per worker process and per version of the backup
+    if mtime is None:
+        return None
+    with open(os.path.join(backup_dir, name), "rb") as f:
+        return f.read(size)
+
+
+def _read_original_names(backup_dir: str) -> dict[int, bytes] | None:
+    return _read_name_backup(backup_dir, backup_mtime(backup_dir, NAME_BACKUP))
+
+
+@lru_cache(maxsize=None)
+def _read_name_backup(backup_dir: str, mtime: float | None) -> dict[int, bytes] | None:
+    if mtime is None:
+        return None
+    return read_name_mod(os.path.join(backup_dir, NAME_BACKUP))
+
+
+def audit_mod_file(path: str, backup_dir: str = BACKUP_DIR) -> dict:
+    """
+    Check one mod file: size, decoded records, diff against the original backup,
+    and for stage mods the stage validator rules
+
+    Returns a plain dict so results can be sent back from worker processes:
+      path, kind, target, size, errors, changed (record indexes), problems (rule -> count)
+    """
+    result = {
+        "path": path,
+        "kind": None,
+        "target": None,
+        "size": 0,
+        "errors": [],
+        "changed": [],
+        "problems": {},
+    }
+
+    detected = detect_mod_kind(path)
+    if detected is None:
+        result["errors"].append("Unknown mod extension.")
+        return result
+    kind, stage_index = detected
+    result["kind"] = kind
+
+    try:
+        result["size"] = os.path.getsize(path)
+
+        if kind == "name":
+            fields = read_name_mod(path)
+            original = _read_original_names(backup_dir)
+            result["target"] = "names"
+            if original is None:
+                result["errors"].append(f"No original backup ({NAME_BACKUP}) to diff against.")
+                result["changed"] = sorted(fields)
+            else:
+                result["changed"] = sorted(
+                    slot for slot, field in fields.items() if original.get(slot) != field
+                )
+            return result
+
+        with open(path, "rb") as f:
+            raw = f.read()
+
+        if kind == "stage":
+            result["target"] = STAGE_NAMES[stage_index]
+            table_size, expected, record_size = STAGE_DATA_SIZE, STAGE_MOD_SIZE, STAGE_SLOT_SIZE
+        elif kind == "unit":
+            result["target"] = "units"
+            table_size, expected, record_size = UNIT_DATA_SIZE, UNIT_MOD_SIZE, UNIT_SLOT_SIZE
+        else:
+            result["target"] = "items"
+            table_size, expected, record_size = ITEM_TABLE_SIZE, ITEM_MOD_SIZE, ITEM_STRUCT.size
+        backup = backup_name(kind, stage_index)
+
+        if len(raw) < table_size:
+            result["errors"].append(f"File is {len(raw)} bytes, needs at least {table_size}.")
+            return result
+        if len(raw) != expected:
+            result["errors"].append(f"File is {len(raw)} bytes, expected {expected}.")
+
+        data = raw[:table_size]
+        original = _read_original(backup_dir, backup, table_size)
+        if original is None or len(original) != table_size:
+            result["errors"].append(f"No original backup ({backup}) to diff against.")
+        else:
+            result["changed"] = changed_records(data, original, record_size)
+
+        if kind == "stage":
+            for v in validate_stage(data, stage_index):
+                result["problems"][v.rule] = result["problems"].get(v.rule, 0) + 1
+
+    except Exception as e:
+        result["errors"].append(f"{type(e).__name__}: {e}")
+
+    return result
+
+
+def find_mod_files(directory: str) -> list[str]:
+    """Every DW2 mod file under directory"""
+    found = []
+    for dirpath, _dirnames, files in os.walk(directory):
+        for name in files:
+            if detect_mod_kind(name) is not None:
+                found.append(os.path.join(dirpath, name))
+    return sorted(found)
+
+
+def audit_library(directory: str, backup_dir: str = BACKUP_DIR, workers: int | None = None) -> list[dict]:
+    """Audit every mod file under directory in a process pool, one worker per core by default"""
+    paths = find_mod_files(directory)
+    if not paths:
+        return []
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(paths) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(audit_mod_file, paths, [backup_dir] * len(paths), chunksize=chunksize))
+
+
+def format_audit_report(results: list[dict], base_dir: str = "") -> str:
+    """Summary counts per kind followed by one line per mod file"""
+    if not results:
+        return "No mod files found."
+
+    lines = [f"{len(results)} mod files audited."]
+    kinds = {}
+    for r in results:
+        kinds.setdefault(r["kind"] or "unknown", []).append(r)
+    for kind, found in sorted(kinds.items()):
+        bad = sum(1 for r in found if r["errors"])
+        flagged = sum(1 for r in found if r["problems"])
+        lines.append(f"  {kind}: {len(found)} files, {bad} with errors, {flagged} failing validation")
+    lines.append("")
+
+    for r in results:
+        name = os.path.relpath(r["path"], base_dir) if base_dir else r["path"]
+        line = f"{name} [{r['target']}]: {len(r['changed'])} records changed"
+        if r["problems"]:
+            line += ", " + ", ".join(f"{RULES[rule]}: {count}" for rule, count in r["problems"].items())
+        lines.append(line)
+        lines += [f"    ERROR {error}" for error in r["errors"]]
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """python -m DW2_Tools.Mod_Audit <mod directory> [backup directory]"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python -m DW2_Tools.Mod_Audit <mod directory> [backup directory]")
+        return 2
+
+    directory = argv[0]
+    backup_dir = argv[1] if len(argv) > 1 else BACKUP_DIR
+    results = audit_library(directory, backup_dir)
+    print(format_audit_report(results, directory))
+    return 1 if any(r["errors"] for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
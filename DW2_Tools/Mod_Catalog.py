@@ -0,0 +1,194 @@
+# DW2_Tools/Mod_Catalog.py
+
+import os
+import hashlib
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor
+
+from .Utility import BACKUP_DIR, CATALOG_DB
+from .Stage_Data import column, EMPTY_LEADER, SLOTS_PER_SIDE, STAGE_DATA_SIZE
+from .Mod_Audit import audit_mod_file, find_mod_files, detect_mod_kind, backup_name, backup_mtime
+
+# Below this many new/changed files a rescan doesn't bother starting a process pool
+POOL_THRESHOLD = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS mods (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    kind TEXT,
+    target TEXT,
+    size INTEGER,
+    mtime REAL,
+    backup_mtime REAL,
+    sha1 TEXT,
+    changed_count INTEGER,
+    used_slots INTEGER,
+    problem_count INTEGER,
+    errors TEXT
+);
+CREATE TABLE IF NOT EXISTS changes (
+    mod_id INTEGER NOT NULL REFERENCES mods(id) ON DELETE CASCADE,
+    record INTEGER NOT NULL,
+    side INTEGER
+);
+CREATE INDEX IF NOT EXISTS changes_record ON changes(record);
+CREATE INDEX IF NOT EXISTS changes_mod ON changes(mod_id);
+CREATE INDEX IF NOT EXISTS mods_target ON mods(target);
+"""
+
+
+def catalog_entry(path: str, backup_dir: str = BACKUP_DIR) -> dict:
+    """Audit result for one mod file plus content hash and key stats"""
+    entry = audit_mod_file(path, backup_dir)
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    entry["sha1"] = hashlib.sha1(raw).hexdigest()
+
+    entry["used_slots"] = None
+    if entry["kind"] == "stage" and len(raw) >= STAGE_DATA_SIZE:
+        leaders = column(raw[:STAGE_DATA_SIZE], "LeaderU")
+        entry["used_slots"] = len(leaders) - leaders.count(EMPTY_LEADER)
+    return entry
+
+
+def _inside(path: str, directory: str) -> bool:
+    """path is directory or below it, paths on another drive (Windows) never are"""
+    try:
+        return os.path.commonpath([path, directory]) == directory
+    except ValueError:
+        return False
+
+
+class ModCatalog:
+    """
+    SQLite catalog of local mod files: target, content hash, changed records
+    and stats per file, so mods can be searched without reopening them
+
+    Rescans only re-read files whose mtime or size changed, or whose original
+    backup appeared or changed since (changed records are a diff against it)
+    """
+
+    def __init__(self, db_path: str = CATALOG_DB, backup_dir: str = BACKUP_DIR):
+        self.backup_dir = backup_dir
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.executescript(SCHEMA)
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(mods)")]
+        if "backup_mtime" not in columns:
+            # catalogs made before backups were tracked, every row rescans once
+            self.conn.execute("ALTER TABLE mods ADD COLUMN backup_mtime REAL")
+
+    def close(self):
+        self.conn.close()
+
+    # Scanning
+
+    def scan(self, directory: str) -> dict[str, int]:
+        """
+        Bring the catalog in line with the mod files under directory,
+        returns counts of added/updated, unchanged and removed files
+        """
+        directory = os.path.abspath(directory)
+        known = {
+            path: (size, mtime, backup)
+            for path, size, mtime, backup in self.conn.execute(
+                "SELECT path, size, mtime, backup_mtime FROM mods"
+            )
+        }
+
+        backups = {}  # backup file -> mtime, stat'ed once per scan
+        on_disk = {}
+        for path in find_mod_files(directory):
+            st = os.stat(path)
+            name = backup_name(*detect_mod_kind(path))
+            if name not in backups:
+                backups[name] = backup_mtime(self.backup_dir, name)
+            on_disk[os.path.abspath(path)] = (st.st_size, st.st_mtime, backups[name])
+
+        stale = [path for path, stat in on_disk.items() if known.get(path) != stat]
+        removed = [
+            path for path in known
+            if path not in on_disk and _inside(path, directory)
+        ]
+
+        if len(stale) >= POOL_THRESHOLD:
+            with ProcessPoolExecutor(max_workers=os.cpu_count() or 1) as pool:
+                entries = list(pool.map(catalog_entry, stale, [self.backup_dir] * len(stale)))
+        else:
+            entries = [catalog_entry(path, self.backup_dir) for path in stale]
+
+        with self.conn:
+            for path in removed:
+                self.conn.execute("DELETE FROM mods WHERE path = ?", (path,))
+            for entry in entries:
+                self._store(entry, *on_disk[entry["path"]])
+
+        return {
+            "updated": len(stale),
+            "unchanged": len(on_disk) - len(stale),
+            "removed": len(removed),
+        }
+
+    def _store(self, entry: dict, size: int, mtime: float, backup: float | None):
+        self.conn.execute("DELETE FROM mods WHERE path = ?", (entry["path"],))
+        cur = self.conn.execute(
+            "INSERT INTO mods (path, kind, target, size, mtime, backup_mtime, sha1, changed_count,"
+            " used_slots, problem_count, errors) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                entry["path"], entry["kind"], entry["target"], size, mtime, backup, entry["sha1"],
+                len(entry["changed"]), entry["used_slots"], sum(entry["problems"].values()),
+                "\n".join(entry["errors"]),
+            ),
+        )
+        mod_id = cur.lastrowid
+        is_stage = entry["kind"] == "stage"
+        self.conn.executemany(
+            "INSERT INTO changes (mod_id, record, side) VALUES (?, ?, ?)",
+            [
+                (mod_id, record, record // SLOTS_PER_SIDE + 1 if is_stage else None)
+                for record in entry["changed"]
+            ],
+        )
+
+    # Queries
+
+    def _rows(self, sql: str, params=()) -> list[dict]:
+        cur = self.conn.execute(sql, params)
+        names = [d[0] for d in cur.description]
+        return [dict(zip(names, row)) for row in cur.fetchall()]
+
+    def all_mods(self, kind: str | None = None) -> list[dict]:
+        if kind is None:
+            return self._rows("SELECT * FROM mods ORDER BY path")
+        return self._rows("SELECT * FROM mods WHERE kind = ? ORDER BY path", (kind,))
+
+    def mods_changing_stage(self, stage_name: str, side: int | None = None) -> list[dict]:
+        """Stage mods for stage_name that change at least one slot (on side 1 or 2 if given)"""
+        if side is None:
+            return self._rows(
+                "SELECT * FROM mods WHERE kind = 'stage' AND target = ? AND changed_count > 0"
+                " ORDER BY path",
+                (stage_name,),
+            )
+        return self._rows(
+            "SELECT * FROM mods WHERE kind = 'stage' AND target = ? AND id IN"
+            " (SELECT mod_id FROM changes WHERE side = ?) ORDER BY path",
+            (stage_name, side),
+        )
+
+    def mods_editing_record(self, kind: str, record: int, target: str | None = None) -> list[dict]:
+        """Mods of a kind that change one record (stage slot, unit slot, name slot or item)"""
+        sql = (
+            "SELECT * FROM mods WHERE kind = ? AND id IN"
+            " (SELECT mod_id FROM changes WHERE record = ?)"
+        )
+        params = [kind, record]
+        if target is not None:
+            sql += " AND target = ?"
+            params.append(target)
+        return self._rows(sql + " ORDER BY path", params)
+
+    def mods_editing_unit_slot(self, slot: int) -> list[dict]:
+        return self.mods_editing_record("unit", slot)
@@ -1,15 +1,24 @@
 import os
 import tkinter as tk
-from tkinter import ttk, filedialog
+from tkinter import ttk, filedialog, messagebox
 
-from .Utility import DW2_BIN, BACKUP_DIR, ICON_DIR, stage_data, unit_data, setup_lilac_styles, LILAC  # core offsets/paths :contentReference[oaicite:3]{index=3}
+from .Utility import BACKUP_DIR, ICON_DIR, setup_lilac_styles, LILAC  # core offsets/paths :contentReference[oaicite:3]{index=3}
 from .Stage_Editor import filenames as STAGE_NAMES, stage_extension as STAGE_EXTS  # stage ids + mod extensions :contentReference[oaicite:4]{index=4}
+from .Stage_Data import STAGE_DATA_SIZE
+from .Stage_Validator import validate_stage, format_report
+from .Mod_Audit import audit_library, format_audit_report
+from .Mod_Catalog import ModCatalog
+from .Item_Editor import DW2_ITEM_MOD_EXT, ITEM_BACKUP, read_item_file
+from .Name_Editor import DW2_NAME_MOD_EXT, NAME_BACKUP, read_name_mod, name_patches
+from .Image_Model import ImageModel
+from .Patch_Files import apply_patch, revert_patch
 
 class DW2ModManager:
     """
     DW2 Mod Manager
 
-    It uses DW2_BIN from Utility
+    It writes the image the shared ImageModel points at (DW2_BIN from Utility
+    unless an output image was chosen)
     Stage mods:
           Enable: pick .DW2YTR/.DW2HLG/etc file, write 512 slots
           in 8 chunks across stage_data offsets (64 slots per offset)
@@ -20,15 +29,31 @@ class DW2ModManager:
          Enable: pick .DW2UnitMod file, write 53 + 201 units (7 bytes each)
           to unit_data[0] / unit_data[1]
          Disable: restore from BACKUP_DIR/DW2_Original.unitdata.
+    Name mods:
+         Enable: pick .DW2NameMod file (all 146 slots or a subset), every name
+          is written in one batched pass
+         Disable: restore every slot from BACKUP_DIR/DW2_Original.names
+    Item mods:
+         Enable: pick .DW2ItemMod file, write the 16 * 12 byte table at itemsoffset
+         Disable: restore from BACKUP_DIR/DW2_Original.itemdata
+    Patch files:
+         Apply: pick a PPF (1.0-3.0) or IPS patch, records are streamed and
+          written in sorted, coalesced batches
+         Revert: PPF3 undo data, or the undo patch saved in BACKUP_DIR when
+          a patch without undo data was applied
+
+    Every write is reported to the shared ImageModel so open editors reload
+    the tables a mod changed
     """
 
-    def __init__(self, root):
+    def __init__(self, root, model: ImageModel | None = None):
         self.root = root
+        self.model = model or ImageModel()
         self.root.title("DW2 Mod Manager")
         
         self.root.iconbitmap(os.path.join(ICON_DIR, "icon3.ico"))
 
-        self.root.minsize(600, 300)
+        self.root.minsize(900, 400)
         self.root.resizable(False, False)
 
         setup_lilac_styles()
@@ -44,7 +69,7 @@ class DW2ModManager:
 
         ttk.Label(
             self.bg,
-            text=f"DW2 BIN: {os.path.basename(DW2_BIN)}",
+            text=f"DW2 BIN: {os.path.basename(self.model.bin_path)}",
             style="Lilac.TLabel",
         ).place(x=20, y=20)
 
@@ -98,9 +123,97 @@ class DW2ModManager:
             width=30,
         ).place(x=340, y=160)
 
+        # Name Mods section
+        ttk.Label(
+            self.bg,
+            text="Name Mods",
+            style="Lilac.TLabel",
+            font=("TkDefaultFont", 10, "bold"),
+        ).place(x=620, y=90)
+
+        ttk.Button(
+            self.bg,
+            text="Enable Name Mod (from file)",
+            command=self.enable_name_mod,
+            width=30,
+        ).place(x=640, y=120)
+
+        ttk.Button(
+            self.bg,
+            text="Disable Name Mods",
+            command=self.disable_name_mods,
+            width=30,
+        ).place(x=640, y=160)
+
+        # Item Mods section
+        ttk.Label(
+            self.bg,
+            text="Item Mods",
+            style="Lilac.TLabel",
+            font=("TkDefaultFont", 10, "bold"),
+        ).place(x=20, y=210)
+
+        ttk.Button(
+            self.bg,
+            text="Enable Item Mod (from file)",
+            command=self.enable_item_mod,
+            width=30,
+        ).place(x=40, y=240)
+
+        ttk.Button(
+            self.bg,
+            text="Disable Item Mods",
+            command=self.disable_item_mods,
+            width=30,
+        ).place(x=40, y=280)
+
+        # Mod library section
+        ttk.Label(
+            self.bg,
+            text="Mod Library",
+            style="Lilac.TLabel",
+            font=("TkDefaultFont", 10, "bold"),
+        ).place(x=320, y=210)
+
+        ttk.Button(
+            self.bg,
+            text="Audit Mod Library (folder)",
+            command=self.audit_mod_library,
+            width=30,
+        ).place(x=340, y=240)
+
+        ttk.Button(
+            self.bg,
+            text="Browse Mod Catalog",
+            command=self.open_mod_catalog,
+            width=30,
+        ).place(x=340, y=280)
+
+        # Patch files section
+        ttk.Label(
+            self.bg,
+            text="Patch Files (PPF / IPS)",
+            style="Lilac.TLabel",
+            font=("TkDefaultFont", 10, "bold"),
+        ).place(x=620, y=210)
+
+        ttk.Button(
+            self.bg,
+            text="Apply Patch (from file)",
+            command=self.enable_patch,
+            width=30,
+        ).place(x=640, y=240)
+
+        ttk.Button(
+            self.bg,
+            text="Revert Patch",
+            command=self.disable_patch,
+            width=30,
+        ).place(x=640, y=280)
+
         # Status line
         self.status_label = ttk.Label(self.bg, text="", style="Lilac.TLabel")
-        self.status_label.place(x=20, y=230)
+        self.status_label.place(x=20, y=340)
 
     # Helper functions
 
@@ -144,7 +257,8 @@ class DW2ModManager:
     def enable_stage_mod(self):
         """
         Enable a stage mod from a .DW2YTR/.DW2HLG/ etc file
-        Writes 512 slots (32 bytes each) in 8 sector chunks based on stage_data.
+        Writes 512 slots (32 bytes each) in 8 sector chunks based on stage_data,
+        the slots are validated first and problems have to be confirmed
         """
         filetypes = [
             (
@@ -162,32 +276,35 @@ class DW2ModManager:
         if not mod_path:
             return
 
+        self.apply_stage_mod(mod_path)
+
+    def apply_stage_mod(self, mod_path: str):
+        """Apply a stage mod file, detecting the stage from its extension"""
         stage_index = self._detect_stage_index_from_mod(mod_path)
         if stage_index is None:
             self._set_status("Could not detect which stage this mod is for.", ok=False)
             return
 
-        offsets = stage_data[stage_index]  # 8 offsets per stage
-        if len(offsets) != 8:
-            self._set_status(
-                f"Stage data for index {stage_index} does not have 8 offsets.",
-                ok=False,
-            )
-            return
-
         try:
-            with open(DW2_BIN, "r+b") as f_dw2, open(mod_path, "rb") as f_mod:
-                # For each sector offset, write 64 * 32 byte slots
-                for base_off in offsets:
-                    f_dw2.seek(base_off)
-                    for _ in range(64):
-                        data = f_mod.read(32)
-                        if len(data) != 32:
-                            raise ValueError(
-                                f"Stage mod file is too short for all 512 slots "
-                                f"(stopped at offset 0x{base_off:X})."
-                            )
-                        f_dw2.write(data)
+            with open(mod_path, "rb") as f_mod:
+                data = f_mod.read(STAGE_DATA_SIZE)
+            if len(data) != STAGE_DATA_SIZE:
+                raise ValueError("Stage mod file is too short for all 512 slots.")
+
+            violations = validate_stage(data, stage_index)
+            if violations and not messagebox.askyesno(
+                "Stage validation",
+                format_report(violations, STAGE_NAMES, max_lines=20)
+                + "\n\nApply the mod anyway?",
+                parent=self.root,
+            ):
+                self._set_status(
+                    f"Stage mod not applied, {len(violations)} problems found.", ok=False
+                )
+                return
+
+            # the model lays the 512 slots over the stage's 8 sector blocks
+            self.model.write_region(f"stage:{stage_index}", data, source=self)
 
             self._set_status(
                 f"Stage mod '{os.path.basename(mod_path)}' "
@@ -225,27 +342,16 @@ class DW2ModManager:
             )
             return
 
-        offsets = stage_data[stage_index]
-        if len(offsets) != 8:
-            self._set_status(
-                f"Stage data for index {stage_index} does not have 8 offsets.",
-                ok=False,
-            )
-            return
-
         try:
-            with open(DW2_BIN, "r+b") as f_dw2, open(backup_path, "rb") as f_backup:
-                # same pattern as enabling: 8 sectors * 64 slots * 32 bytes
-                for base_off in offsets:
-                    f_dw2.seek(base_off)
-                    for _ in range(64):
-                        data = f_backup.read(32)
-                        if len(data) != 32:
-                            raise ValueError(
-                                "Stage backup file is too short; "
-                                "expected full 512-slot data."
-                            )
-                        f_dw2.write(data)
+            # same pattern as enabling: 8 sectors * 64 slots * 32 bytes
+            with open(backup_path, "rb") as f_backup:
+                data = f_backup.read(STAGE_DATA_SIZE)
+            if len(data) != STAGE_DATA_SIZE:
+                raise ValueError(
+                    "Stage backup file is too short; "
+                    "expected full 512-slot data."
+                )
+            self.model.write_region(f"stage:{stage_index}", data, source=self)
 
             self._set_status(
                 f"Stage restored from '{os.path.basename(backup_path)}' "
@@ -278,31 +384,23 @@ class DW2ModManager:
         if not mod_path:
             return
 
+        self.apply_unit_mod(mod_path)
+
+    def apply_unit_mod(self, mod_path: str):
+        """Apply a .DW2UnitMod file to unit_data[0] / unit_data[1]"""
         NUM_SLOTS_FIRST = 53
         NUM_SLOTS_SECOND = 201
         SLOT_SIZE = 7
 
         try:
-            with open(DW2_BIN, "r+b") as f_dw2, open(mod_path, "rb") as f_mod:
-                # First block, 53 entries at unit_data[0]
-                f_dw2.seek(unit_data[0])
-                for _ in range(NUM_SLOTS_FIRST):
-                    chunk = f_mod.read(SLOT_SIZE)
-                    if len(chunk) != SLOT_SIZE:
-                        raise ValueError(
-                            "Unit mod file ended before all 53 entries were read."
-                        )
-                    f_dw2.write(chunk)
-
-                # Second block, 201 entries at unit_data[1]
-                f_dw2.seek(unit_data[1])
-                for _ in range(NUM_SLOTS_SECOND):
-                    chunk = f_mod.read(SLOT_SIZE)
-                    if len(chunk) != SLOT_SIZE:
-                        raise ValueError(
-                            "Unit mod file ended before all 201 entries were read."
-                        )
-                    f_dw2.write(chunk)
+            with open(mod_path, "rb") as f_mod:
+                # 53 entries for unit_data[0], then 201 for unit_data[1]
+                data = f_mod.read((NUM_SLOTS_FIRST + NUM_SLOTS_SECOND) * SLOT_SIZE)
+            if len(data) < NUM_SLOTS_FIRST * SLOT_SIZE:
+                raise ValueError("Unit mod file ended before all 53 entries were read.")
+            if len(data) != (NUM_SLOTS_FIRST + NUM_SLOTS_SECOND) * SLOT_SIZE:
+                raise ValueError("Unit mod file ended before all 201 entries were read.")
+            self.model.write_region("units", data, source=self)
 
             self._set_status(
                 f"Unit mod '{os.path.basename(mod_path)}' enabled successfully.",
@@ -338,26 +436,14 @@ class DW2ModManager:
         SLOT_SIZE = 7
 
         try:
-            with open(DW2_BIN, "r+b") as f_dw2, open(backup_path, "rb") as f_backup:
-                # First 53 entries
-                f_dw2.seek(unit_data[0])
-                for _ in range(NUM_SLOTS_FIRST):
-                    chunk = f_backup.read(SLOT_SIZE)
-                    if len(chunk) != SLOT_SIZE:
-                        raise ValueError(
-                            "Unit backup file ended before all 53 entries were read."
-                        )
-                    f_dw2.write(chunk)
-
-                # Next 201 entries
-                f_dw2.seek(unit_data[1])
-                for _ in range(NUM_SLOTS_SECOND):
-                    chunk = f_backup.read(SLOT_SIZE)
-                    if len(chunk) != SLOT_SIZE:
-                        raise ValueError(
-                            "Unit backup file ended before all 201 entries were read."
-                        )
-                    f_dw2.write(chunk)
+            with open(backup_path, "rb") as f_backup:
+                # first 53 entries, then the next 201
+                data = f_backup.read((NUM_SLOTS_FIRST + NUM_SLOTS_SECOND) * SLOT_SIZE)
+            if len(data) < NUM_SLOTS_FIRST * SLOT_SIZE:
+                raise ValueError("Unit backup file ended before all 53 entries were read.")
+            if len(data) != (NUM_SLOTS_FIRST + NUM_SLOTS_SECOND) * SLOT_SIZE:
+                raise ValueError("Unit backup file ended before all 201 entries were read.")
+            self.model.write_region("units", data, source=self)
 
             self._set_status(
                 f"Unit data restored from '{backup_name}'.", ok=True
@@ -365,3 +451,329 @@ class DW2ModManager:
 
         except Exception as e:
             self._set_status(f"Error disabling unit mods: {e}", ok=False)
+
+    # Name Mods
+
+    def enable_name_mod(self):
+        """
+        Enable a name mod from a .DW2NameMod file
+        Every slot in the mod is patched into DW2.bin in a single batched write
+        """
+        filetypes = [
+            ("DW2 Name Mods (*.DW2NameMod)", f"*{DW2_NAME_MOD_EXT}")
+        ]
+
+        mod_path = filedialog.askopenfilename(
+            parent=self.root,
+            initialdir=os.getcwd(),
+            title="Select name mod file",
+            filetypes=filetypes,
+        )
+        if not mod_path:
+            return
+
+        self.apply_name_mod(mod_path)
+
+    def apply_name_mod(self, mod_path: str):
+        """Apply a .DW2NameMod file in one batched write"""
+        try:
+            fields = read_name_mod(mod_path)
+            self.model.write_patches(name_patches(fields, self.model.regions["names"]), source=self)
+
+            self._set_status(
+                f"Name mod '{os.path.basename(mod_path)}' enabled ({len(fields)} names).",
+                ok=True,
+            )
+
+        except Exception as e:
+            self._set_status(f"Error enabling name mod: {e}", ok=False)
+
+    def disable_name_mods(self):
+        """
+        Restore every original name from the backup created by NameEditor
+
+        Backups_For_Mod_Disabling/DW2_Original.names
+        """
+        backup_path = os.path.join(BACKUP_DIR, NAME_BACKUP)
+
+        if not os.path.exists(backup_path):
+            self._set_status(
+                f"Name backup not found: {backup_path}\n"
+                "Open Name Editor once to generate it.",
+                ok=False,
+            )
+            return
+
+        try:
+            fields = read_name_mod(backup_path)
+            self.model.write_patches(name_patches(fields, self.model.regions["names"]), source=self)
+
+            self._set_status(
+                f"Names restored from '{NAME_BACKUP}'.", ok=True
+            )
+
+        except Exception as e:
+            self._set_status(f"Error disabling name mods: {e}", ok=False)
+
+    # Item Mods
+
+    def _write_item_table(self, table: bytes):
+        """Write the 192 byte item table at itemsoffset, only the items that differ"""
+        self.model.write_region("items", table, source=self)
+
+    def enable_item_mod(self):
+        """
+        Enable an item mod from a .DW2ItemMod file
+        Reads the 16 * 12 byte item table, any trailing offset is ignored
+        """
+        filetypes = [
+            ("DW2 Item Mods (*.DW2ItemMod)", f"*{DW2_ITEM_MOD_EXT}")
+        ]
+
+        mod_path = filedialog.askopenfilename(
+            parent=self.root,
+            initialdir=os.getcwd(),
+            title="Select item mod file",
+            filetypes=filetypes,
+        )
+        if not mod_path:
+            return
+
+        self.apply_item_mod(mod_path)
+
+    def apply_item_mod(self, mod_path: str):
+        """Apply a .DW2ItemMod file at itemsoffset"""
+        try:
+            self._write_item_table(read_item_file(mod_path))
+
+            self._set_status(
+                f"Item mod '{os.path.basename(mod_path)}' enabled successfully.",
+                ok=True,
+            )
+
+        except Exception as e:
+            self._set_status(f"Error enabling item mod: {e}", ok=False)
+
+    def disable_item_mods(self):
+        """
+        Restore the original item table from the backup created by ItemEditor
+
+        Backups_For_Mod_Disabling/DW2_Original.itemdata
+        """
+        backup_path = os.path.join(BACKUP_DIR, ITEM_BACKUP)
+
+        if not os.path.exists(backup_path):
+            self._set_status(
+                f"Item backup not found: {backup_path}\n"
+                "Open Item Editor once to generate it.",
+                ok=False,
+            )
+            return
+
+        try:
+            self._write_item_table(read_item_file(backup_path))
+
+            self._set_status(
+                f"Item data restored from '{ITEM_BACKUP}'.", ok=True
+            )
+
+        except Exception as e:
+            self._set_status(f"Error disabling item mods: {e}", ok=False)
+
+    # Patch files
+
+    def _ask_patch(self, title: str) -> str:
+        return filedialog.askopenfilename(
+            parent=self.root,
+            initialdir=os.getcwd(),
+            title=title,
+            filetypes=[("Patch files (*.ppf, *.ips)", "*.ppf *.ips"), ("All files", "*.*")],
+        )
+
+    def enable_patch(self):
+        """Apply a PPF or IPS patch to DW2.bin"""
+        patch_path = self._ask_patch("Select patch file")
+        if not patch_path:
+            return
+
+        try:
+            self.model.flush()
+            result = apply_patch(patch_path, self.model.bin_path)
+            self.model.refresh(source=self)
+
+            undo = (
+                f" Undo data saved to '{os.path.basename(result.undo_path)}'."
+                if result.undo_path else ""
+            )
+            self._set_status(
+                f"Patch '{os.path.basename(patch_path)}' applied ({result.records} records, "
+                f"{result.writes} writes).{undo}",
+                ok=True,
+            )
+
+        except Exception as e:
+            self._set_status(f"Error applying patch: {e}", ok=False)
+
+    def disable_patch(self):
+        """Revert a PPF or IPS patch applied earlier"""
+        patch_path = self._ask_patch("Select the patch to revert")
+        if not patch_path:
+            return
+
+        try:
+            self.model.flush()
+            result = revert_patch(patch_path, self.model.bin_path)
+            self.model.refresh(source=self)
+
+            self._set_status(
+                f"Patch '{os.path.basename(patch_path)}' reverted ({result.records} records).",
+                ok=True,
+            )
+
+        except Exception as e:
+            self._set_status(f"Error reverting patch: {e}", ok=False)
+
+    # Mod library
+
+    def audit_mod_library(self):
+        """
+        Validate and diff every mod file in a folder against the backups using
+        all cores, the full report is saved as DW2_Mod_Audit.txt in that folder
+        """
+        directory = filedialog.askdirectory(
+            parent=self.root,
+            initialdir=os.getcwd(),
+            title="Select mod library folder",
+        )
+        if not directory:
+            return
+
+        try:
+            results = audit_library(directory)
+            report = format_audit_report(results, directory)
+            report_path = os.path.join(directory, "DW2_Mod_Audit.txt")
+            with open(report_path, "w", encoding="utf-8") as f:
+                f.write(report)
+
+            bad = sum(1 for r in results if r["errors"] or r["problems"])
+            self._set_status(
+                f"Audited {len(results)} mod files, {bad} need attention. "
+                f"Report: {os.path.basename(report_path)}",
+                ok=bad == 0,
+            )
+
+        except Exception as e:
+            self._set_status(f"Error auditing mod library: {e}", ok=False)
+
+    # Mod catalog
+
+    def open_mod_catalog(self):
+        """
+        Window for scanning a mod folder into the SQLite catalog, searching it
+        by target/side/record and enabling a mod straight from the results
+        """
+        win = tk.Toplevel(self.root)
+        win.title("DW2 Mod Catalog")
+        win.minsize(820, 420)
+        catalog = ModCatalog()
+
+        folder_var = tk.StringVar(value=os.getcwd())
+        target_var = tk.StringVar(value="Any")
+        side_var = tk.StringVar(value="Any")
+        record_var = tk.StringVar()
+        results: list[dict] = []
+
+        ttk.Label(win, text="Mod folder:").place(x=10, y=10)
+        ttk.Entry(win, textvariable=folder_var, width=70).place(x=90, y=10)
+
+        ttk.Label(win, text="Target:").place(x=10, y=45)
+        ttk.Combobox(
+            win,
+            textvariable=target_var,
+            values=["Any"] + STAGE_NAMES + ["units", "names", "items"],
+            state="readonly",
+            width=14,
+        ).place(x=90, y=45)
+        ttk.Label(win, text="Side:").place(x=240, y=45)
+        ttk.Combobox(
+            win, textvariable=side_var, values=["Any", "1", "2"], state="readonly", width=5
+        ).place(x=280, y=45)
+        ttk.Label(win, text="Changes slot:").place(x=350, y=45)
+        ttk.Entry(win, textvariable=record_var, width=8).place(x=440, y=45)
+
+        listbox = tk.Listbox(win, width=130, height=15)
+        listbox.place(x=10, y=80)
+        status = ttk.Label(win, text="")
+        status.place(x=10, y=390)
+
+        def show(rows):
+            results[:] = rows
+            listbox.delete(0, tk.END)
+            for row in rows:
+                line = (
+                    f"{os.path.basename(row['path'])}  [{row['target']}]  "
+                    f"{row['changed_count']} changed"
+                )
+                if row["used_slots"] is not None:
+                    line += f", {row['used_slots']} used slots"
+                if row["problem_count"]:
+                    line += f", {row['problem_count']} validation problems"
+                listbox.insert(tk.END, line)
+            status.config(text=f"{len(rows)} mods found.")
+
+        def scan():
+            try:
+                counts = catalog.scan(folder_var.get())
+                search()
+                status.config(
+                    text=f"Scanned: {counts['updated']} new/changed, "
+                    f"{counts['unchanged']} unchanged, {counts['removed']} removed."
+                )
+            except Exception as e:
+                status.config(text=f"Error scanning: {e}")
+
+        def search():
+            try:
+                target = target_var.get()
+                side = None if side_var.get() == "Any" else int(side_var.get())
+                record = int(record_var.get(), 0) if record_var.get().strip() else None
+
+                if target in STAGE_NAMES:
+                    if record is not None:
+                        rows = catalog.mods_editing_record("stage", record, target)
+                    else:
+                        rows = catalog.mods_changing_stage(target, side)
+                elif target in ("units", "names", "items"):
+                    kind = target[:-1]
+                    rows = (catalog.mods_editing_record(kind, record) if record is not None
+                            else catalog.all_mods(kind))
+                else:
+                    rows = catalog.all_mods()
+                show(rows)
+            except Exception as e:
+                status.config(text=f"Error searching: {e}")
+
+        def enable_selected():
+            selection = listbox.curselection()
+            if not selection:
+                return
+            row = results[selection[0]]
+            apply = {
+                "stage": self.apply_stage_mod,
+                "unit": self.apply_unit_mod,
+                "name": self.apply_name_mod,
+                "item": self.apply_item_mod,
+            }[row["kind"]]
+            apply(row["path"])
+            status.config(text=self.status_label.cget("text"))
+
+        def on_close():
+            catalog.close()
+            win.destroy()
+
+        ttk.Button(win, text="Scan", command=scan).place(x=680, y=8)
+        ttk.Button(win, text="Search", command=search).place(x=520, y=43)
+        ttk.Button(win, text="Enable selected mod", command=enable_selected).place(x=620, y=385)
+        win.protocol("WM_DELETE_WINDOW", on_close)
+
+        search()
@@ -1,30 +1,311 @@
 import os
+import csv
+from bisect import bisect_left
 import tkinter as tk
-from tkinter import ttk
-from .Utility import DW2_BIN, ICON_DIR
+from tkinter import ttk, filedialog
+from .Utility import ICON_DIR, BACKUP_DIR, unit_names
+from .Image_Model import ImageModel
+
+# Mod file extension written by Create Name Mod
+DW2_NAME_MOD_EXT = ".DW2NameMod"
+
+# Backup of every original name field, written the first time the editor opens
+NAME_BACKUP = "DW2_Original.names"
+
+# base offset, slot count, byte length per name, spacing between names
+NAME_GROUPS = [
+    (0x16141F78, 64, 15, 16),
+    (0x161424A8, 27, 15, 16),
+    (0x1615A410, 41, 7, 8),
+    (0x1615A688, 14, 7, 8),
+]
+
+# The groups sit in pairs separated by 0x130 bytes (one raw sector trailer/header),
+# small enough that batched writes read through the gap instead of seeking per name
+NAME_MAX_GAP = 0x140
+
+NAME_SLOT_COUNT = sum(count for _base, count, _length, _stride in NAME_GROUPS)  # 146
+
+
+def build_name_slot_table(groups=NAME_GROUPS):
+    """
+    Precompute slot -> (offset, byte_length, stride, group_index) for every name slot,
+    so resolving a slot is a single list lookup instead of summing group sizes
+    """
+    table = []
+    for group_index, (base, count, byte_len, stride) in enumerate(groups):
+        for rel in range(count):
+            table.append((base + rel * stride, byte_len, stride, group_index))
+    return table
+
+
+NAME_SLOT_TABLE = build_name_slot_table()
+
+
+def build_name_positions(groups=NAME_GROUPS) -> list[int]:
+    """Slot -> position of its field in the name groups' bytes read back to back (the names region)"""
+    positions = []
+    pos = 0
+    for _base, count, _byte_len, stride in groups:
+        positions += [pos + rel * stride for rel in range(count)]
+        pos += count * stride
+    return positions
+
+
+NAME_SLOT_POSITIONS = build_name_positions()
+
+
+def decode_name(name_bytes: bytes) -> str:
+    """Strip trailing nulls and decode a raw name field as ASCII"""
+    return name_bytes.split(b"\x00", 1)[0].decode("ascii", errors="ignore")
+
+
+def encode_name(name: str, byte_len: int) -> bytes:
+    """Encode a name as ASCII, truncated to byte_len and padded with nulls"""
+    return name.encode("ascii", errors="ignore")[:byte_len].ljust(byte_len, b"\x00")
+
+
+def read_all_name_fields(f) -> list[bytes]:
+    """
+    Read the raw field of every name slot from an open DW2.bin handle,
+    one read per offset group rather than one per slot
+    """
+    fields = []
+    for base, count, byte_len, stride in NAME_GROUPS:
+        f.seek(base)
+        block = f.read(count * stride)
+        if len(block) != count * stride:
+            raise IOError(f"Unexpected EOF reading names at 0x{base:X}")
+        for rel in range(count):
+            start = rel * stride
+            fields.append(block[start:start + byte_len])
+    return fields
+
+
+def split_name_fields(data: bytes) -> list[bytes]:
+    """Raw field of every name slot from the name groups' bytes read back to back"""
+    fields = []
+    pos = 0
+    for _base, count, byte_len, stride in NAME_GROUPS:
+        for rel in range(count):
+            start = pos + rel * stride
+            fields.append(data[start:start + byte_len])
+        pos += count * stride
+    return fields
+
+
+def read_all_names(f) -> list[str]:
+    """Read and decode every name slot from an open DW2.bin handle"""
+    return [decode_name(field) for field in read_all_name_fields(f)]
+
+
+def validate_names(names: dict[int, str]) -> list[str]:
+    """
+    Check a slot -> name mapping against the slot range and each group's byte limit
+    in one pass, returns a list of problems (empty when everything fits)
+    """
+    errors = [f"Slot {slot} is out of range (0-{NAME_SLOT_COUNT - 1})."
+              for slot in names if not 0 <= slot < NAME_SLOT_COUNT]
+    valid = [(slot, name) for slot, name in names.items() if 0 <= slot < NAME_SLOT_COUNT]
+
+    errors += [f"Slot {slot}: '{name}' has non-ASCII characters."
+               for slot, name in valid if not name.isascii()]
+
+    lengths = [(slot, name, len(name.encode("ascii", errors="ignore")), NAME_SLOT_TABLE[slot][1])
+               for slot, name in valid]
+    errors += [f"Slot {slot}: '{name}' is {length} bytes, max is {limit}."
+               for slot, name, length, limit in lengths if length > limit]
+    return errors
+
+
+def name_offset(slot: int, region) -> int:
+    """Image offset of a slot's field, through the extents of the image's names region"""
+    # Image_Regions imports this module
+    from .Image_Regions import logical_to_physical
+    return logical_to_physical(region, NAME_SLOT_POSITIONS[slot])
+
+
+def name_patches(fields: dict[int, bytes], region) -> list[tuple[int, bytes]]:
+    """Turn slot -> raw name field into (offset, bytes) patches for the image the names region belongs to"""
+    return [(name_offset(slot, region), field) for slot, field in sorted(fields.items())]
+
+
+def write_name_mod(path: str, fields: dict[int, bytes]):
+    """
+    Write a name mod file
+
+    Layout: one record per slot, 1 byte slot number followed by that slot's raw
+    name field (15 or 7 bytes), a full mod has all 146 records, a sparse mod only some
+    """
+    with open(path, "wb") as f:
+        for slot, field in sorted(fields.items()):
+            byte_len = NAME_SLOT_TABLE[slot][1]
+            if len(field) != byte_len:
+                raise ValueError(f"Slot {slot} field is {len(field)} bytes, expected {byte_len}.")
+            f.write(bytes([slot]) + field)
+
+
+def read_name_mod(path: str) -> dict[int, bytes]:
+    """Read a name mod file back into slot -> raw name field"""
+    fields = {}
+    with open(path, "rb") as f:
+        data = f.read()
+
+    pos = 0
+    while pos < len(data):
+        slot = data[pos]
+        if slot >= NAME_SLOT_COUNT:
+            raise ValueError(f"Name mod has invalid slot {slot} at byte {pos}.")
+        byte_len = NAME_SLOT_TABLE[slot][1]
+        field = data[pos + 1:pos + 1 + byte_len]
+        if len(field) != byte_len:
+            raise ValueError(f"Name mod ended inside slot {slot}.")
+        fields[slot] = field
+        pos += 1 + byte_len
+    return fields
+
+
+def export_names_csv(path: str, names: list[str]):
+    """Write slot,name,max_length rows for every name slot"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["slot", "name", "max_length"])
+        for slot, name in enumerate(names):
+            writer.writerow([slot, name, NAME_SLOT_TABLE[slot][1]])
+
+
+def import_names_csv(path: str) -> dict[int, str]:
+    """
+    Read slot,name rows from a CSV file, extra columns are ignored and slots not
+    listed or with a blank name are left alone, raises ValueError listing every
+    invalid row
+    """
+    names = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_no, row in enumerate(csv.DictReader(f), start=2):
+            try:
+                slot = int(row["slot"])
+                if row["name"] in (None, ""):
+                    continue  # blank keeps the current name
+                names[slot] = row["name"]
+            except (KeyError, TypeError, ValueError):
+                raise ValueError(f"Line {line_no}: expected 'slot' and 'name' columns.")
+
+    errors = validate_names(names)
+    if errors:
+        raise ValueError("; ".join(errors[:5]) + (f" (+{len(errors) - 5} more)" if len(errors) > 5 else ""))
+    return names
+
+
+class NameSearchIndex:
+    """
+    Prefix/substring search over decoded in-game names and Utility.unit_names
+
+    Every lowercase suffix of every entry is kept in one sorted list, so both
+    prefix and substring queries are a bisect followed by a short scan
+    """
+
+    def __init__(self):
+        self._entries = {}   # key -> (slot, display text)
+        self._suffixes = []  # sorted (suffix, key)
+
+    def build(self, names: list[str]):
+        """Index decoded names by slot, plus unit_names entries that map onto a name slot"""
+        self._entries.clear()
+        for slot, name in enumerate(names):
+            self._entries[("slot", slot)] = (slot, f"{slot}: {name}")
+
+        for entry in unit_names:
+            unit_id_text, _sep, label = entry.partition(": ")
+            unit_id = int(unit_id_text)
+            if unit_id < NAME_SLOT_COUNT:
+                self._entries[("unit", unit_id)] = (unit_id, f"{unit_id}: {label} (unit name list)")
+
+        suffixes = []
+        for key in self._entries:
+            text = self._search_text(key)
+            suffixes.extend((text[i:], key) for i in range(len(text)))
+        suffixes.sort()
+        self._suffixes = suffixes
+
+    def update_slot(self, slot: int, name: str):
+        """Re-index one decoded name after it has been edited"""
+        key = ("slot", slot)
+        self._suffixes = [item for item in self._suffixes if item[1] != key]
+        self._entries[key] = (slot, f"{slot}: {name}")
+        text = self._search_text(key)
+        for i in range(len(text)):
+            suffix = (text[i:], key)
+            self._suffixes.insert(bisect_left(self._suffixes, suffix), suffix)
+
+    def _search_text(self, key) -> str:
+        """Lowercase text that queries are matched against (display text without the slot prefix)"""
+        display = self._entries[key][1]
+        return display.partition(": ")[2].lower()
+
+    def search(self, query: str, limit: int = 50) -> list[tuple[int, str]]:
+        """
+        Return (slot, display text) matches, entries whose text starts with the
+        query come first, then entries that merely contain it
+        """
+        query = query.strip().lower()
+        if not query:
+            return []
+
+        if query.isdigit():
+            slot = int(query)
+            if slot < NAME_SLOT_COUNT and ("slot", slot) in self._entries:
+                return [self._entries[("slot", slot)]]
+
+        prefix_hits = []
+        substring_hits = []
+        seen = set()
+        i = bisect_left(self._suffixes, (query,))
+        while i < len(self._suffixes) and self._suffixes[i][0].startswith(query):
+            suffix, key = self._suffixes[i]
+            i += 1
+            if key in seen:
+                continue
+            seen.add(key)
+            if len(suffix) == len(self._search_text(key)):
+                prefix_hits.append(key)
+            else:
+                substring_hits.append(key)
+
+        ordered = sorted(prefix_hits) + sorted(substring_hits)
+        return [self._entries[key] for key in ordered[:limit]]
+
 
 class NameEditor:
-    """DW2 name editor"""
+    """
+    DW2 name editor
 
-    def __init__(self, root):
+    Names are read from and written through the shared ImageModel, so the
+    editor follows name changes made by other tools
+    """
+
+    def __init__(self, root, model: ImageModel | None = None):
         self.root = root
+        self.model = model or ImageModel()
         self.root.title("Name Editor")
         self.root.iconbitmap(os.path.join(ICON_DIR, "icon4.ico"))
 
         self.root.minsize(700, 400)
         self.root.resizable(False, False)
 
-        # base offset, slot count, byte length per name
-        self.name_offsets1 = [0x16141F78, 64, 15]
-        self.name_offsets2 = [0x161424A8, 27, 15]
-        self.name_offsets3 = [0x1615A410, 41, 7]
-        self.name_offsets4 = [0x1615A688, 14, 7]
+        # slot -> (offset, byte length, stride, group index), built once
+        self.slot_table = NAME_SLOT_TABLE
 
         # Which offset group is currently being used for the active slot
         self.current_offset_group = None
 
+        # decoded names for every slot plus a search index over them
+        self.names: list[str] = []
+        self.search_index = NameSearchIndex()
+
         # TK variables
         self.noffset1 = tk.StringVar()
+        self.search_var = tk.StringVar()
         self.selected_slot = tk.IntVar(self.root)
         self.selected_slot.set(0)  # Default value
 
@@ -36,7 +317,7 @@ class NameEditor:
         slot_combobox = ttk.Combobox(
             self.root,
             textvariable=self.selected_slot,
-            values=list(range(146)),
+            values=list(range(NAME_SLOT_COUNT)),
             width=10,
         )
         slot_combobox.bind("<<ComboboxSelected>>", self.slot_selected)
@@ -51,9 +332,101 @@ class NameEditor:
         self.status_label = tk.Label(self.root, text="", fg="green")
         self.status_label.place(x=10, y=100)
 
+        # type-ahead search over in-game names and the unit name list
+        tk.Label(self.root, text="Search names:").place(x=10, y=140)
+        search_entry = tk.Entry(self.root, textvariable=self.search_var, width=30)
+        search_entry.place(x=110, y=140)
+        search_entry.bind("<KeyRelease>", self.search_names)
+        search_entry.bind("<Return>", self.jump_to_first_match)
+
+        self.search_results = tk.Listbox(self.root, width=60, height=12)
+        self.search_results.place(x=10, y=170)
+        self.search_results.bind("<<ListboxSelect>>", self.search_result_selected)
+        self.search_slots: list[int] = []
+
+        # bulk CSV and name mod creation
+        ttk.Button(
+            self.root, text="Export Names CSV", command=self.export_csv, width=24
+        ).place(x=480, y=140)
+        ttk.Button(
+            self.root, text="Import Names CSV", command=self.import_csv, width=24
+        ).place(x=480, y=175)
+
+        self.modname = tk.StringVar()
+        self.changed_only = tk.BooleanVar(value=False)
+        tk.Label(self.root, text="Enter a mod name").place(x=480, y=225)
+        tk.Entry(self.root, textvariable=self.modname, width=24).place(x=480, y=250)
+        tk.Checkbutton(
+            self.root, text="Only slots changed from original", variable=self.changed_only
+        ).place(x=480, y=275)
+        ttk.Button(
+            self.root, text="Create Name Mod", command=self.create_name_mod, width=24
+        ).place(x=480, y=305)
+
+        # decode every name once and index them
+        self.load_names()
+
         # load initial slot 0
         self.slot_selected()
 
+        # reload when another tool changes the names
+        self.model.subscribe("names", self.names_changed, owner=self)
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.model.unsubscribe(self)
+
+    def names_changed(self, key=None):
+        """Names were written by another tool, re-decode them and refresh the view"""
+        self.load_names()
+        self.slot_selected()
+        self.search_names()
+        self.status_label.config(text="Names reloaded after a change in another tool.", fg="green")
+
+    # Name index
+
+    def load_names(self):
+        """
+        Decode all name slots from the image model and rebuild the search index,
+        on first run also write every original name field to Backups_For_Mod_Disabling
+        """
+        try:
+            fields = split_name_fields(self.model.read("names"))
+            self.names = [decode_name(field) for field in fields]
+            self.search_index.build(self.names)
+
+            os.makedirs(BACKUP_DIR, exist_ok=True)
+            backup_path = os.path.join(BACKUP_DIR, NAME_BACKUP)
+            if not os.path.exists(backup_path):
+                write_name_mod(backup_path, dict(enumerate(fields)))
+        except Exception as e:
+            self.status_label.config(text=f"Error reading names: {e}", fg="red")
+
+    def search_names(self, event=None):
+        """Refresh the result list for the current search text"""
+        matches = self.search_index.search(self.search_var.get())
+        self.search_results.delete(0, tk.END)
+        self.search_slots = []
+        for slot, text in matches:
+            self.search_results.insert(tk.END, text)
+            self.search_slots.append(slot)
+
+    def jump_to_first_match(self, event=None):
+        """Enter in the search box jumps straight to the best match"""
+        self.search_names()
+        if self.search_slots:
+            self.jump_to_slot(self.search_slots[0])
+
+    def search_result_selected(self, event=None):
+        selection = self.search_results.curselection()
+        if selection:
+            self.jump_to_slot(self.search_slots[selection[0]])
+
+    def jump_to_slot(self, slot: int):
+        self.selected_slot.set(slot)
+        self.slot_selected()
+
     # Slot selection & display
 
     def slot_selected(self, event=None):
@@ -63,49 +436,17 @@ class NameEditor:
 
     def _resolve_slot_offset(self, selected_slot_value):
         """
-        Determine which offset group & offset/length apply for the given slot
-        Returns offset, byte_length, group_ref or None, None, None
+        Look up offset, byte length and group index for the given slot, the
+        offset is in the model's image (its names region may be relocated)
+        Returns offset, byte_length, group_index or None, None, None
         """
-
-        # name_offsets1: slots 0-63 (64 slots), 16 byte spacing, 15 byte name
-        if selected_slot_value < self.name_offsets1[1]:
-            base, count, byte_len = self.name_offsets1
-            offset = base + selected_slot_value * 16
-            return offset, byte_len, self.name_offsets1
-
-        # name_offsets2: next 27 slots
-        if self.name_offsets1[1] <= selected_slot_value < (self.name_offsets1[1] + self.name_offsets2[1]):
-            base, count, byte_len = self.name_offsets2
-            rel = selected_slot_value - self.name_offsets1[1]
-            offset = base + rel * 16
-            return offset, byte_len, self.name_offsets2
-
-        # name_offsets3: next 41 slots
-        if (self.name_offsets1[1] + self.name_offsets2[1]) <= selected_slot_value < (
-            self.name_offsets1[1] + self.name_offsets2[1] + self.name_offsets3[1]
-        ):
-            base, count, byte_len = self.name_offsets3
-            rel = selected_slot_value - (self.name_offsets1[1] + self.name_offsets2[1])
-            offset = base + rel * 8
-            return offset, byte_len, self.name_offsets3
-
-        # name_offsets4: remaining up to slot 145
-        if (
-            self.name_offsets1[1] + self.name_offsets2[1] + self.name_offsets3[1]
-            <= selected_slot_value
-            < 146
-        ):
-            base, count, byte_len = self.name_offsets4
-            rel = selected_slot_value - (
-                self.name_offsets1[1] + self.name_offsets2[1] + self.name_offsets3[1]
-            )
-            offset = base + rel * 8
-            return offset, byte_len, self.name_offsets4
-
+        if 0 <= selected_slot_value < len(self.slot_table):
+            _offset, byte_len, _stride, group_index = self.slot_table[selected_slot_value]
+            return name_offset(selected_slot_value, self.model.regions["names"]), byte_len, group_index
         return None, None, None
 
     def name_display(self, selected_slot_value: int):
-        """Read the name for the selected slot from DW2.bin and show it"""
+        """Show the name of the selected slot from the image model"""
         offset, byte_length, group = self._resolve_slot_offset(selected_slot_value)
         if offset is None:
             self.status_label.config(
@@ -116,23 +457,20 @@ class NameEditor:
         self.current_offset_group = group
 
         try:
-            with open(DW2_BIN, "r+b") as f:
-                pos = f.seek(offset)
-                name_bytes = f.read(byte_length)
+            name_bytes = split_name_fields(self.model.read("names"))[selected_slot_value]
 
             # Basic status info
             self.status_label.config(
                 text=(
                     f"Slot {selected_slot_value}: "
-                    f"offset 0x{offset:X} ({pos}), Max Length Supported: {byte_length}"
+                    f"offset 0x{offset:X} ({offset}), Max Length Supported: {byte_length}"
                 ),
                 fg="green",
             )
 
             # Decode for display: strip trailing nulls, assume ASCII-ish
-            clean_bytes = name_bytes.split(b"\x00", 1)[0]
             try:
-                name_str = clean_bytes.decode("ascii", errors="ignore")
+                name_str = decode_name(name_bytes)
             except Exception:
                 # fallback: show raw repr, user can overwrite
                 name_str = repr(name_bytes)
@@ -151,34 +489,115 @@ class NameEditor:
             return
 
         new_name = self.noffset1.get()
-        byte_limit = self.current_offset_group[2]  # max bytes for this name
-
-        # Encode as single-byte ASCII
-        # Truncate to byte_limit, then pad with nulls.
-        try:
-            raw_bytes = new_name.encode("ascii", errors="ignore")
-        except Exception:
-            raw_bytes = new_name.encode("utf-8", errors="ignore")
-
-        new_name_truncated = raw_bytes[:byte_limit]
-        new_name_padded = new_name_truncated.ljust(byte_limit, b"\x00")
 
         # Determine correct offset again based on current group & slot
         slot = self.selected_slot.get()
-        offset, _byte_length, group = self._resolve_slot_offset(slot)
-        if offset is None or group is not self.current_offset_group:
+        offset, byte_limit, group = self._resolve_slot_offset(slot)
+        if offset is None or group != self.current_offset_group:
             self.status_label.config(
                 text="Internal mismatch in name slot/group.", fg="red"
             )
             return
 
+        # Encode as single-byte ASCII
+        # Truncate to byte_limit, then pad with nulls.
+        new_name_padded = encode_name(new_name, byte_limit)
+
         try:
-            with open(DW2_BIN, "r+b") as f:
-                f.seek(offset)
-                f.write(new_name_padded)
+            self.model.write_patches(
+                name_patches({slot: new_name_padded}, self.model.regions["names"]), source=self
+            )
+
+            if slot < len(self.names):
+                self.names[slot] = decode_name(new_name_padded)
+                self.search_index.update_slot(slot, self.names[slot])
 
             self.status_label.config(
                 text=f"Updated name for slot {slot}.", fg="green"
             )
         except Exception as e:
             self.status_label.config(text=f"Error writing name: {e}", fg="red")
+
+    # Bulk import/export
+
+    def export_csv(self):
+        """Write every decoded name to a CSV file"""
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            title="Export names",
+            defaultextension=".csv",
+            filetypes=[("CSV files", "*.csv")],
+        )
+        if not path:
+            return
+
+        try:
+            export_names_csv(path, self.names)
+            self.status_label.config(
+                text=f"Exported {len(self.names)} names to '{os.path.basename(path)}'.", fg="green"
+            )
+        except Exception as e:
+            self.status_label.config(text=f"Error exporting names: {e}", fg="red")
+
+    def import_csv(self):
+        """
+        Read names from a CSV file, validate every row against its byte limit,
+        then write all changed names to DW2.bin in one batched write
+        """
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            title="Import names",
+            filetypes=[("CSV files", "*.csv")],
+        )
+        if not path:
+            return
+
+        try:
+            imported = import_names_csv(path)
+            fields = {
+                slot: encode_name(name, NAME_SLOT_TABLE[slot][1])
+                for slot, name in imported.items()
+                if name != self.names[slot]
+            }
+            if fields:
+                self.model.write_patches(name_patches(fields, self.model.regions["names"]), source=self)
+                for slot, field in fields.items():
+                    self.names[slot] = decode_name(field)
+                self.search_index.build(self.names)
+
+            self.slot_selected()
+            self.status_label.config(
+                text=f"Imported {len(imported)} names, {len(fields)} changed.", fg="green"
+            )
+        except Exception as e:
+            self.status_label.config(text=f"Error importing names: {e}", fg="red")
+
+    # Mod creation
+
+    def create_name_mod(self):
+        """
+        Dump names to a .DW2NameMod file in the cwd, either every slot or only
+        the slots that differ from the original names backup
+        """
+        sep = "."
+        base_name = self.modname.get().split(sep, 1)[0] or "DW2Names"
+        usermodname = base_name + DW2_NAME_MOD_EXT
+
+        try:
+            fields = dict(enumerate(split_name_fields(self.model.read("names"))))
+
+            if self.changed_only.get():
+                original = read_name_mod(os.path.join(BACKUP_DIR, NAME_BACKUP))
+                fields = {
+                    slot: field for slot, field in fields.items()
+                    if original.get(slot) != field
+                }
+
+            write_name_mod(usermodname, fields)
+            self.status_label.config(
+                text=f"Mod file '{usermodname}' created with {len(fields)} names.", fg="green"
+            )
+        except Exception as e:
+            self.status_label.config(
+                text=f"Error creating mod file '{usermodname}': {e}", fg="red"
+            )
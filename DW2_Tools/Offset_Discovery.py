@@ -0,0 +1,260 @@
+# DW2_Tools/Offset_Discovery.py
+
+import json
+import mmap
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from .Utility import DW2_BIN, OFFSET_CACHE, image_fingerprint
+from .Image_Regions import table_regions
+from .ISO9660_Index import ISO_SECTOR_SIZE, detect_layout
+
+# Signature windows taken from each table of the reference image
+SIGNATURE_SIZE = 24
+SIGNATURES_PER_TABLE = 3
+# Windows with fewer distinct byte values (padding, zeroed slots) match too often
+MIN_DISTINCT = 10
+
+# Each scan task reads the image this much at a time, small enough to stay in
+# cache while every signature is searched in it
+SCAN_CHUNK = 4 * 1024 * 1024
+# Hits kept per signature per task, a signature found more often is useless anyway
+MAX_HITS = 64
+
+# Bump when the cached signature/offset layout or the match rule changes
+OFFSETS_VERSION = 2
+
+
+# Signatures
+
+def _windows(region, layout) -> list[int]:
+    """Candidate signature start offsets around a region's first, middle and last byte"""
+    starts = []
+    for point in ("first", "middle", "last"):
+        for offset, length in region.extents:
+            byte = {"first": offset, "middle": offset + length // 2, "last": offset + length - 1}[point]
+            # keep the window inside the user data of the sector holding that byte
+            user_start = byte - (byte - layout.data_offset) % layout.sector_size
+            lo = user_start
+            hi = user_start + ISO_SECTOR_SIZE - SIGNATURE_SIZE
+            starts.append(min(max(byte - SIGNATURE_SIZE // 2, lo), hi))
+    return starts
+
+
+def build_signatures(reference_path: str = DW2_BIN, regions=None) -> dict[str, list[tuple[int, bytes]]]:
+    """
+    (reference offset, bytes) signature windows per table, taken from the image
+    the absolute offsets in Utility and the editors belong to
+
+    Windows are spread over each table (small tables include the bytes around
+    them) and low entropy windows are skipped
+    """
+    regions = table_regions() if regions is None else regions
+    signatures = {}
+    with open(reference_path, "rb") as f:
+        layout = detect_layout(f)
+        for region in regions:
+            chosen = []
+            for start in _windows(region, layout):
+                if any(start == offset for offset, _data in chosen):
+                    continue
+                f.seek(start)
+                data = f.read(SIGNATURE_SIZE)
+                if len(data) == SIGNATURE_SIZE and len(set(data)) >= MIN_DISTINCT:
+                    chosen.append((start, data))
+                if len(chosen) == SIGNATURES_PER_TABLE:
+                    break
+            signatures[region.key] = chosen
+    return signatures
+
+
+# Scanning
+
+def _scan_range(bin_path: str, start: int, end: int, patterns: list[bytes]) -> list[tuple[int, int]]:
+    """(pattern index, offset) of every pattern starting in [start, end), one mapped chunk at a time"""
+    overlap = max(map(len, patterns)) - 1
+    hits = []
+    counts = [0] * len(patterns)
+    with open(bin_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for chunk in range(start, end, SCAN_CHUNK):
+            chunk_end = min(chunk + SCAN_CHUNK, end)
+            buf = mm[chunk:chunk_end + overlap]
+            limit = chunk_end - chunk
+            for i, pattern in enumerate(patterns):
+                pos = buf.find(pattern)
+                while 0 <= pos < limit and counts[i] < MAX_HITS:
+                    hits.append((i, chunk + pos))
+                    counts[i] += 1
+                    pos = buf.find(pattern, pos + 1)
+    return hits
+
+
+def find_patterns(bin_path: str, patterns: list[bytes], workers: int | None = None) -> list[list[int]]:
+    """
+    Offsets of every pattern in the image, the image is split in ranges scanned
+    by a process pool (one worker per core), each range one chunk at a time
+    """
+    found = [[] for _ in patterns]
+    if not patterns:
+        return found
+
+    size = os.path.getsize(bin_path)
+    workers = workers or os.cpu_count() or 1
+    step = max(SCAN_CHUNK, -(-size // (workers * 4)) // SCAN_CHUNK * SCAN_CHUNK)
+    starts = list(range(0, size, step))
+    ends = [min(start + step, size) for start in starts]
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(
+            _scan_range,
+            [bin_path] * len(starts), starts, ends, [patterns] * len(starts),
+        )
+        for hits in results:
+            for i, offset in hits:
+                found[i].append(offset)
+    return found
+
+
+def _best_shift(f, windows, candidates) -> int | None:
+    """
+    The candidate shift the most signature windows agree with, the smallest
+    move on a tie, None unless a majority of the windows match (2 of 3)
+    """
+    best, best_score = None, len(windows) // 2
+    for shift in sorted(candidates, key=abs):
+        score = 0
+        for ref_offset, data in windows:
+            if ref_offset + shift < 0:
+                continue
+            f.seek(ref_offset + shift)
+            score += f.read(len(data)) == data
+        if score > best_score:
+            best, best_score = shift, score
+    return best
+
+
+def find_tables(bin_path: str, signatures: dict, workers: int | None = None) -> dict[str, int | None]:
+    """
+    Shift (offset in bin_path - reference offset) of every table, None when not found
+
+    The first window of every table is searched in one parallel scan, tables
+    it didn't find (e.g. a mod changed those bytes) get a second scan with
+    their other windows. Each candidate shift is then checked against all of
+    the table's windows and the one most of them match wins, a table is only
+    found when a majority of its windows match at that shift
+    """
+    candidates = {key: set() for key in signatures}
+
+    def scan(wanted):
+        jobs = [(key, ref_offset, data) for key, windows in wanted for ref_offset, data in windows]
+        found = find_patterns(bin_path, [data for _key, _ref, data in jobs], workers)
+        for (key, ref_offset, _data), offsets in zip(jobs, found):
+            candidates[key].update(offset - ref_offset for offset in offsets)
+
+    scan((key, windows[:1]) for key, windows in signatures.items())
+    missing = [(key, signatures[key][1:]) for key in signatures if not candidates[key]]
+    if any(windows for _key, windows in missing):
+        scan(missing)
+
+    with open(bin_path, "rb") as f:
+        return {key: _best_shift(f, signatures[key], candidates[key]) for key in signatures}
+
+
+# Cache, signatures are learned once, offsets once per image fingerprint
+
+def _load_cache(cache_path: str) -> dict:
+    try:
+        with open(cache_path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+    if cache.get("version") != OFFSETS_VERSION:
+        cache = {"version": OFFSETS_VERSION}
+    cache.setdefault("signatures", {})
+    cache.setdefault("images", {})
+    return cache
+
+
+def _save_cache(cache: dict, cache_path: str):
+    tmp = cache_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp, cache_path)
+
+
+def load_signatures(reference_path: str = DW2_BIN, cache_path: str = OFFSET_CACHE) -> dict:
+    cache = _load_cache(cache_path)
+    if cache["signatures"]:
+        return {
+            key: [(offset, bytes.fromhex(data)) for offset, data in windows]
+            for key, windows in cache["signatures"].items()
+        }
+    signatures = build_signatures(reference_path)
+    cache["signatures"] = {
+        key: [(offset, data.hex()) for offset, data in windows] for key, windows in signatures.items()
+    }
+    _save_cache(cache, cache_path)
+    return signatures
+
+
+def discover_offsets(bin_path: str, reference_path: str = DW2_BIN, cache_path: str = OFFSET_CACHE,
+                     workers: int | None = None) -> dict[str, int | None]:
+    """
+    Shift of every table in bin_path relative to the reference image (None
+    when a table wasn't found), scanned once per image and then cached
+    """
+    fingerprint = image_fingerprint(bin_path)
+    cache = _load_cache(cache_path)
+    if fingerprint in cache["images"]:
+        return cache["images"][fingerprint]
+
+    shifts = find_tables(bin_path, load_signatures(reference_path, cache_path), workers)
+
+    cache = _load_cache(cache_path)
+    cache["images"][fingerprint] = shifts
+    _save_cache(cache, cache_path)
+    return shifts
+
+
+def relocated_regions(shifts: dict[str, int | None], regions=None) -> list:
+    """table_regions() moved by the discovered shifts, tables that weren't found are left out"""
+    regions = table_regions() if regions is None else regions
+    return [
+        region._replace(extents=tuple((offset + shifts[region.key], length) for offset, length in region.extents))
+        for region in regions
+        if shifts.get(region.key) is not None
+    ]
+
+
+def format_discovery(shifts: dict[str, int | None], regions=None) -> str:
+    """One line per table: where it was found, or that it wasn't"""
+    regions = table_regions() if regions is None else regions
+    lines = []
+    for region in regions:
+        shift = shifts.get(region.key)
+        start = region.extents[0][0]
+        if shift is None:
+            lines.append(f"{region.label}: not found")
+        elif shift == 0:
+            lines.append(f"{region.label}: {start:#x} (same as the reference)")
+        else:
+            lines.append(f"{region.label}: {start + shift:#x} (moved {shift:+#x})")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """python -m DW2_Tools.Offset_Discovery <image> [reference image]"""
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python -m DW2_Tools.Offset_Discovery <image> [reference image]")
+        return 2
+
+    reference = argv[1] if len(argv) > 1 else DW2_BIN
+    shifts = discover_offsets(argv[0], reference)
+    print(format_discovery(shifts))
+    return 1 if any(shift is None for shift in shifts.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
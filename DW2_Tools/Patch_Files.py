@@ -0,0 +1,466 @@
+# DW2_Tools/Patch_Files.py
+
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from typing import NamedTuple
+
+from .Utility import DW2_BIN, BACKUP_DIR, coalesce_patches
+from .Image_Regions import table_regions
+
+# Raw CD sector of DW2.bin
+SECTOR_SIZE = 2352
+
+# PPF3 header: magic, encoding method, description, image type, blockcheck, undo data, dummy
+PPF1_MAGIC = b"PPF10"
+PPF2_MAGIC = b"PPF20"
+PPF3_MAGIC = b"PPF30"
+PPF3_METHOD = 2
+PPF_DESCRIPTION_SIZE = 50
+PPF_IMAGE_BIN = 0
+PPF_IMAGE_GI = 1
+
+# PPF2/3 validation block, 1024 bytes of the image at 0x9320 (sector 16, the ISO volume descriptor)
+PPF_BLOCKCHECK_OFFSET = 0x9320
+PPF_BLOCKCHECK_OFFSET_GI = 0x80A0
+PPF_BLOCKCHECK_SIZE = 1024
+
+# Optional FILE_ID.DIZ block at the end of PPF2/3 patches
+DIZ_BEGIN = b"@BEGIN_FILE_ID.DIZ"
+DIZ_END = b"@END_FILE_ID.DIZ"
+
+IPS_MAGIC = b"PATCH"
+IPS_EOF = b"EOF"
+
+# Patch records are sorted and coalesced in batches of about this much data
+APPLY_BATCH_BYTES = 4 * 1024 * 1024
+# Runs this close together go out as one vectored write, one raw sector trailer + header
+APPLY_MAX_GAP = 0x140
+
+# Undo patches made while applying patches that carry no undo data of their own
+UNDO_SUFFIX = ".undo.ppf"
+
+# A PPF record holds at most 255 bytes
+PPF_MAX_RECORD = 255
+
+# Differences closer than a record header (8 byte offset + 1 byte length) are sent as one record
+PPF_JOIN_GAP = 9
+
+# Whole image comparisons read this much of each image at a time
+COMPARE_CHUNK = 64 * SECTOR_SIZE
+# A changed chunk is narrowed down in blocks of this size before comparing bytes
+COMPARE_BLOCK = 64
+
+
+def region_extents(regions=None) -> list[tuple[int, int]]:
+    """(offset, length) of every table region the tools edit, sorted by offset"""
+    regions = table_regions() if regions is None else regions
+    return sorted(extent for region in regions for extent in region.extents)
+
+
+def sector_extents(lbas) -> list[tuple[int, int]]:
+    """(offset, length) of whole raw sectors, e.g. the sectors a set of patches touched"""
+    return [(lba * SECTOR_SIZE, SECTOR_SIZE) for lba in sorted(set(lbas))]
+
+
+def _changed_runs(old, new, start: int, end: int):
+    """
+    (offset, length) of every differing run in [start, end) of two mapped images
+
+    Equal chunks are skipped with one slice compare, a differing chunk is split
+    into COMPARE_BLOCK blocks and only differing blocks are compared byte by byte
+    """
+    run_start = run_end = None
+    for chunk in range(start, end, COMPARE_CHUNK):
+        chunk_end = min(chunk + COMPARE_CHUNK, end)
+        if old[chunk:chunk_end] == new[chunk:chunk_end]:
+            continue
+        for block in range(chunk, chunk_end, COMPARE_BLOCK):
+            block_end = min(block + COMPARE_BLOCK, chunk_end)
+            a, b = old[block:block_end], new[block:block_end]
+            if a == b:
+                continue
+            for i, (x, y) in enumerate(zip(a, b)):
+                if x == y:
+                    continue
+                pos = block + i
+                if run_end is not None and pos - run_end <= PPF_JOIN_GAP:
+                    run_end = pos + 1
+                else:
+                    if run_start is not None:
+                        yield run_start, run_end - run_start
+                    run_start, run_end = pos, pos + 1
+    if run_start is not None:
+        yield run_start, run_end - run_start
+
+
+def diff_runs(old, new, extents):
+    """Differing (offset, length) runs of two images inside the given extents, yielded as found"""
+    for offset, length in extents:
+        yield from _changed_runs(old, new, offset, offset + length)
+
+
+def _ppf3_header(description: str, blockcheck: bool, undo: bool) -> bytes:
+    text = description.encode("ascii", "replace")[:PPF_DESCRIPTION_SIZE]
+    return (
+        PPF3_MAGIC
+        + bytes((PPF3_METHOD,))
+        + text.ljust(PPF_DESCRIPTION_SIZE, b" ")
+        + bytes((PPF_IMAGE_BIN, int(blockcheck), int(undo), 0))
+    )
+
+
+def create_ppf(original_path: str, modified_path: str, out_path: str, description: str = "",
+               extents=None, undo: bool = True, blockcheck: bool = True) -> int:
+    """
+    Write a PPF3 patch turning original_path into modified_path, returns the
+    number of patch records
+
+    Only the extents are compared (every table region by default, pass
+    sector_extents(...) for dirty sectors or [(0, size)] for the whole image),
+    Both images are memory mapped and records are written as differences are
+    found, so memory use doesn't grow with the image or the patch. With undo
+    the original bytes are stored too, so the patch can be reverted
+    """
+    if os.path.getsize(original_path) != os.path.getsize(modified_path):
+        raise ValueError("The two images differ in size, PPF patches can't resize an image.")
+
+    extents = region_extents() if extents is None else extents
+    count = 0
+    with open(original_path, "rb") as fa, open(modified_path, "rb") as fb:
+        with mmap.mmap(fa.fileno(), 0, access=mmap.ACCESS_READ) as old, \
+                mmap.mmap(fb.fileno(), 0, access=mmap.ACCESS_READ) as new, \
+                open(out_path, "wb") as out:
+            blockcheck = blockcheck and len(old) >= PPF_BLOCKCHECK_OFFSET + PPF_BLOCKCHECK_SIZE
+            out.write(_ppf3_header(description, blockcheck, undo))
+            if blockcheck:
+                out.write(old[PPF_BLOCKCHECK_OFFSET:PPF_BLOCKCHECK_OFFSET + PPF_BLOCKCHECK_SIZE])
+
+            for offset, length in diff_runs(old, new, extents):
+                for pos in range(offset, offset + length, PPF_MAX_RECORD):
+                    size = min(PPF_MAX_RECORD, offset + length - pos)
+                    out.write(struct.pack("<QB", pos, size))
+                    out.write(new[pos:pos + size])
+                    if undo:
+                        out.write(old[pos:pos + size])
+                    count += 1
+    return count
+
+
+# Reading patches
+
+class PatchInfo(NamedTuple):
+    """Header of a PPF or IPS patch, records are read from records_start up to records_end"""
+    format: str                  # PPF1, PPF2, PPF3 or IPS
+    description: str
+    blockcheck: bytes | None     # image bytes the patch expects at blockcheck_offset
+    blockcheck_offset: int
+    image_size: int | None       # PPF2 only
+    has_undo: bool               # PPF3 records carry the original bytes
+    records_start: int
+    records_end: int             # start of FILE_ID.DIZ, or end of file
+
+
+def _diz_start(f, size: int, length_size: int) -> int:
+    """Offset where an appended FILE_ID.DIZ block starts, or size when there is none"""
+    tail = len(DIZ_END) + length_size
+    if size < tail:
+        return size
+    f.seek(size - tail)
+    data = f.read(tail)
+    if data[:len(DIZ_END)] != DIZ_END:
+        return size
+    length = int.from_bytes(data[len(DIZ_END):], "little")
+    return size - tail - length - len(DIZ_BEGIN)
+
+
+def read_patch_info(f) -> PatchInfo:
+    """Parse the header of an open PPF1/2/3 or IPS patch"""
+    size = f.seek(0, os.SEEK_END)
+    f.seek(0)
+    head = f.read(60)
+
+    if head.startswith(IPS_MAGIC):
+        return PatchInfo("IPS", "", None, 0, None, False, len(IPS_MAGIC), size)
+
+    magic = head[:5]
+    description = head[6:56].decode("ascii", "replace").rstrip(" \x00")
+    if magic == PPF1_MAGIC:
+        return PatchInfo("PPF1", description, None, 0, None, False, 56, size)
+
+    if magic == PPF2_MAGIC:
+        image_size = int.from_bytes(head[56:60], "little")
+        blockcheck = f.read(PPF_BLOCKCHECK_SIZE)
+        return PatchInfo(
+            "PPF2", description, blockcheck, PPF_BLOCKCHECK_OFFSET, image_size, False,
+            60 + PPF_BLOCKCHECK_SIZE, _diz_start(f, size, 4),
+        )
+
+    if magic == PPF3_MAGIC:
+        image_type, has_blockcheck, has_undo = head[56], head[57], head[58]
+        start = 60
+        blockcheck = None
+        if has_blockcheck:
+            blockcheck = f.read(PPF_BLOCKCHECK_SIZE)
+            start += PPF_BLOCKCHECK_SIZE
+        offset = PPF_BLOCKCHECK_OFFSET_GI if image_type == PPF_IMAGE_GI else PPF_BLOCKCHECK_OFFSET
+        return PatchInfo(
+            "PPF3", description, blockcheck, offset, None, bool(has_undo),
+            start, _diz_start(f, size, 2),
+        )
+
+    raise ValueError("Not a PPF (1.0-3.0) or IPS patch.")
+
+
+def iter_patch_records(f, info: PatchInfo):
+    """
+    Stream (offset, data, undo) records from an open patch, undo is None
+    unless it's a PPF3 patch with undo data
+    """
+    f.seek(info.records_start)
+    if info.format == "IPS":
+        while True:
+            head = f.read(3)
+            if head == IPS_EOF or len(head) < 3:
+                return
+            offset = int.from_bytes(head, "big")
+            length = int.from_bytes(f.read(2), "big")
+            if length:
+                data = f.read(length)
+            else:
+                # RLE record, count + one byte to repeat
+                rle = f.read(3)
+                data = rle[2:3] * int.from_bytes(rle[:2], "big")
+            yield offset, data, None
+
+    offset_size = 8 if info.format == "PPF3" else 4
+    pos = info.records_start
+    while pos < info.records_end:
+        head = f.read(offset_size + 1)
+        if len(head) < offset_size + 1:
+            raise ValueError("Patch ends in the middle of a record.")
+        offset = int.from_bytes(head[:offset_size], "little")
+        length = head[offset_size]
+        data = f.read(length)
+        undo = f.read(length) if info.has_undo else None
+        if len(data) != length or (undo is not None and len(undo) != length):
+            raise ValueError("Patch ends in the middle of a record.")
+        pos += offset_size + 1 + length * (2 if info.has_undo else 1)
+        yield offset, data, undo
+
+
+def ips_truncation(f) -> int | None:
+    """Image size an IPS patch truncates to (3 bytes after EOF), read after the records"""
+    data = f.read(3)
+    return int.from_bytes(data, "big") if len(data) == 3 else None
+
+
+def check_patch(info: PatchInfo, image) -> None:
+    """Raise ValueError when the image isn't the one the patch was made for"""
+    if info.image_size is not None:
+        size = image.seek(0, os.SEEK_END)
+        if size != info.image_size:
+            raise ValueError(f"Patch expects an image of {info.image_size} bytes, this one is {size}.")
+    if info.blockcheck:
+        image.seek(info.blockcheck_offset)
+        if image.read(len(info.blockcheck)) != info.blockcheck:
+            raise ValueError("Validation block doesn't match, the patch was made for another image.")
+
+
+# Applying patches
+
+class PatchResult(NamedTuple):
+    records: int
+    writes: int              # vectored writes made
+    undo_path: str | None    # undo patch saved for reverting, if one was needed
+
+
+class _Coverage:
+    """Sorted disjoint [start, end) ranges, used so undo data keeps each byte's first original"""
+
+    def __init__(self):
+        self.starts: list[int] = []
+        self.ends: list[int] = []
+
+    def missing(self, start: int, end: int) -> list[tuple[int, int]]:
+        """Parts of [start, end) not covered yet"""
+        pieces = []
+        i = max(bisect_left(self.ends, start + 1), 0)
+        pos = start
+        while i < len(self.starts) and self.starts[i] < end:
+            if self.starts[i] > pos:
+                pieces.append((pos, self.starts[i]))
+            pos = max(pos, self.ends[i])
+            i += 1
+        if pos < end:
+            pieces.append((pos, end))
+        return pieces
+
+    def add(self, start: int, end: int):
+        i = bisect_left(self.ends, start)
+        j = i
+        while j < len(self.starts) and self.starts[j] <= end:
+            start = min(start, self.starts[j])
+            end = max(end, self.ends[j])
+            j += 1
+        self.starts[i:j] = [start]
+        self.ends[i:j] = [end]
+
+
+def _write_runs(f, runs, max_gap: int = APPLY_MAX_GAP) -> int:
+    """
+    Write sorted, coalesced (offset, bytes) runs, runs up to max_gap apart are
+    sent as one vectored write with the gap re-read from the image, returns
+    the number of writes
+    """
+    groups = []  # [start, [buffers], end]
+    for offset, data in runs:
+        gap = b""
+        if groups and 0 < offset - groups[-1][2] <= max_gap:
+            f.seek(groups[-1][2])
+            gap = f.read(offset - groups[-1][2])
+        if groups and offset - groups[-1][2] <= max_gap and len(gap) == offset - groups[-1][2]:
+            group = groups[-1]
+            if gap:
+                group[1].append(gap)
+            group[1].append(data)
+            group[2] = offset + len(data)
+        else:
+            # first run, too far away, or the gap is past the end of the image
+            groups.append([offset, [data], offset + len(data)])
+
+    for start, buffers, end in groups:
+        written = 0
+        if hasattr(os, "pwritev"):
+            f.flush()
+            written = os.pwritev(f.fileno(), buffers, start)
+        if written < end - start:
+            # no vectored I/O (Windows) or a short write
+            f.seek(start + written)
+            f.write(b"".join(buffers)[written:])
+    return len(groups)
+
+
+def _save_undo(f, out, coverage: _Coverage, runs):
+    """Append PPF3 records restoring the image bytes the runs are about to overwrite"""
+    for offset, data in runs:
+        for start, end in coverage.missing(offset, offset + len(data)):
+            f.seek(start)
+            original = f.read(end - start)
+            for pos in range(start, end, PPF_MAX_RECORD):
+                size = min(PPF_MAX_RECORD, end - pos)
+                rel = pos - offset
+                out.write(struct.pack("<QB", pos, size))
+                out.write(original[pos - start:pos - start + size])
+                out.write(data[rel:rel + size])
+        coverage.add(offset, offset + len(data))
+
+
+def _save_tail(f, out, size: int):
+    """Append PPF3 records restoring everything past size, before an IPS patch truncates there"""
+    end = f.seek(0, os.SEEK_END)
+    for chunk in range(size, end, COMPARE_CHUNK):
+        f.seek(chunk)
+        data = f.read(min(COMPARE_CHUNK, end - chunk))
+        for rel in range(0, len(data), PPF_MAX_RECORD):
+            piece = data[rel:rel + PPF_MAX_RECORD]
+            out.write(struct.pack("<QB", chunk + rel, len(piece)))
+            out.write(piece)
+            out.write(piece)
+
+
+def undo_path_for(patch_path: str) -> str:
+    """Where the undo patch for a patch without undo data is kept"""
+    return os.path.join(BACKUP_DIR, os.path.basename(patch_path) + UNDO_SUFFIX)
+
+
+def apply_patch(patch_path: str, bin_path: str = DW2_BIN, undo: bool = False,
+                save_undo: bool = True, batch_bytes: int = APPLY_BATCH_BYTES) -> PatchResult:
+    """
+    Apply a PPF1/2/3 or IPS patch to the image, or revert a PPF3 patch from
+    its undo data with undo=True
+
+    Records stream from the patch in one sequential pass, every batch_bytes
+    of patch data is sorted, coalesced and written with vectored I/O, so
+    memory stays bounded whatever the patch size. The image is checked
+    against the patch's validation block (and PPF2 image size) first.
+    Patches without undo data get an undo patch in BACKUP_DIR (undo_path_for)
+    holding the bytes they overwrite, so they can be reverted without a full backup
+    """
+    # unbuffered, vectored writes bypass the file object and reads must see them
+    with open(patch_path, "rb") as patch, open(bin_path, "r+b", buffering=0) as image:
+        info = read_patch_info(patch)
+        check_patch(info, image)
+        if undo and not info.has_undo:
+            raise ValueError(f"{os.path.basename(patch_path)} has no undo data.")
+
+        undo_out = None
+        undo_path = None
+        if not info.has_undo and save_undo:
+            undo_path = undo_path_for(patch_path)
+            if os.path.exists(undo_path):
+                raise ValueError(
+                    f"{os.path.basename(patch_path)} is already applied, revert it first "
+                    f"(or remove {undo_path})."
+                )
+            os.makedirs(BACKUP_DIR, exist_ok=True)
+            undo_out = open(undo_path, "wb")
+            undo_out.write(_ppf3_header(f"Undo {os.path.basename(patch_path)}", False, True))
+        coverage = _Coverage()
+
+        records = writes = 0
+        batch, batch_size = [], 0
+
+        def flush_batch():
+            nonlocal writes
+            runs = coalesce_patches(batch)
+            if undo_out is not None:
+                _save_undo(image, undo_out, coverage, runs)
+            writes += _write_runs(image, runs)
+            batch.clear()
+
+        try:
+            for offset, data, undo_data in iter_patch_records(patch, info):
+                batch.append((offset, undo_data if undo else data))
+                batch_size += len(data)
+                records += 1
+                if batch_size >= batch_bytes:
+                    flush_batch()
+                    batch_size = 0
+            if batch:
+                flush_batch()
+
+            if info.format == "IPS":
+                size = ips_truncation(patch)
+                if size is not None:
+                    if undo_out is not None:
+                        _save_tail(image, undo_out, size)
+                    image.truncate(size)
+        finally:
+            if undo_out is not None:
+                undo_out.close()
+
+    return PatchResult(records, writes, undo_path)
+
+
+def revert_patch(patch_path: str, bin_path: str = DW2_BIN) -> PatchResult:
+    """
+    Undo an applied patch, from its own PPF3 undo data or from the undo patch
+    saved when it was applied (removed once reverted)
+    """
+    with open(patch_path, "rb") as patch:
+        has_undo = read_patch_info(patch).has_undo
+    if has_undo:
+        return apply_patch(patch_path, bin_path, undo=True)
+
+    undo_path = undo_path_for(patch_path)
+    if not os.path.exists(undo_path):
+        raise ValueError(
+            f"{os.path.basename(patch_path)} has no undo data and no undo patch was "
+            f"saved for it in {BACKUP_DIR}."
+        )
+    # undo patch records hold the original bytes as their data
+    result = apply_patch(undo_path, bin_path)
+    os.remove(undo_path)
+    return result
@@ -0,0 +1,190 @@
+# DW2_Tools/Stage_Data.py
+
+import sys
+from array import array
+
+from .Utility import stage_data
+
+# Slot layout per stage: 8 sector blocks * 64 slots * 32 bytes
+SLOT_SIZE = 32
+SLOTS_PER_BLOCK = 64
+SLOTS_PER_STAGE = 512
+SLOTS_PER_SIDE = 256
+STAGE_DATA_SIZE = SLOTS_PER_STAGE * SLOT_SIZE  # 16384, mod files append 8 * 4 byte offsets
+
+# field name (StageEditor.FIELD_DEFS names) -> (byte offset, byte size) inside a slot
+FIELD_LAYOUT = {
+    "xcord":    (0, 2),
+    "ycord":    (2, 2),
+    "direct":   (4, 1),
+    "AreaP":    (5, 1),
+    "PullingB": (6, 1),
+    "Lif":      (8, 2),
+    "LeaderU":  (10, 1),
+    "GuardU":   (11, 1),
+    "Att":      (12, 1),
+    "Def":      (13, 1),
+    "AmountG":  (14, 1),
+    "UnitS":    (15, 1),
+    "UnitG":    (16, 1),
+    "AIT":      (17, 1),
+    "UnitC":    (18, 1),
+    "Hid":      (19, 1),
+    "Advance":  (21, 1),
+    "ItemD":    (22, 1),
+    "AIL":      (23, 1),
+    "DelayO":   (24, 2),
+    "PointsK":  (26, 2),
+}
+
+# bytes not covered by FIELD_LAYOUT, kept raw so they round trip unchanged
+UNUSED_BYTES = (7, 20, 28, 29, 30, 31)
+
+# LeaderUnit value of a slot that isn't part of the battle
+EMPTY_LEADER = 255
+
+
+def stage_slot_offset(stage_index: int, slot: int) -> int:
+    """Absolute DW2.bin offset of one slot, 64 slots per stage_data block"""
+    return stage_data[stage_index][slot // SLOTS_PER_BLOCK] + (slot % SLOTS_PER_BLOCK) * SLOT_SIZE
+
+
+def column(data, field: str, slots: int = SLOTS_PER_STAGE):
+    """
+    Value of one field for every slot of a stage buffer, taken in one strided slice
+
+    Byte fields come back as bytes, 2 byte fields as an array of unsigned shorts
+    """
+    offset, size = FIELD_LAYOUT[field]
+    end = slots * SLOT_SIZE
+    if size == 1:
+        return bytes(data[offset:end:SLOT_SIZE])
+
+    words = array("H", bytes(data[:end]))
+    if sys.byteorder == "big":
+        words.byteswap()
+    return words[offset // 2::SLOT_SIZE // 2]
+
+
+def set_column(data: bytearray, field: str, values, slots: int = SLOTS_PER_STAGE):
+    """Write one field for every slot back in a single strided slice assignment"""
+    offset, size = FIELD_LAYOUT[field]
+    end = slots * SLOT_SIZE
+    if size == 1:
+        data[offset:end:SLOT_SIZE] = bytes(values)
+        return
+
+    words = array("H", bytes(data[:end]))
+    if sys.byteorder == "big":
+        words.byteswap()
+    words[offset // 2::SLOT_SIZE // 2] = array("H", values)
+    if sys.byteorder == "big":
+        words.byteswap()
+    data[:end] = words.tobytes()
+
+
+def get_field(data, slot: int, field: str) -> int:
+    offset, size = FIELD_LAYOUT[field]
+    start = slot * SLOT_SIZE + offset
+    return int.from_bytes(data[start:start + size], "little")
+
+
+def set_field(data: bytearray, slot: int, field: str, value: int):
+    """Patch one field of one slot in place"""
+    offset, size = FIELD_LAYOUT[field]
+    if not 0 <= value < 1 << (8 * size):
+        raise ValueError(f"{field} must be 0-{(1 << (8 * size)) - 1}, got {value}.")
+    start = slot * SLOT_SIZE + offset
+    data[start:start + size] = value.to_bytes(size, "little")
+
+
+def decode_slot(data, slot: int) -> dict[str, int]:
+    """All FIELD_LAYOUT values of one slot"""
+    record = data[slot * SLOT_SIZE:(slot + 1) * SLOT_SIZE]
+    return {
+        field: int.from_bytes(record[offset:offset + size], "little")
+        for field, (offset, size) in FIELD_LAYOUT.items()
+    }
+
+
+class StageXref:
+    """
+    Inverted index from LeaderUnit, GuardUnits, UnitType and ItemDrop values
+    to the (stage_index, slot) pairs using them, across every stage
+
+    Empty slots (LeaderUnit 255) are left out, so counts only reflect units
+    that are actually part of a battle
+    """
+
+    INDEXED_FIELDS = ("LeaderU", "GuardU", "UnitG", "ItemD")
+
+    def __init__(self):
+        # field -> value -> set of (stage_index, slot)
+        self.index: dict[str, dict[int, set]] = {field: {} for field in self.INDEXED_FIELDS}
+        # (stage_index, slot) -> tuple of indexed values, so updates know what to remove
+        self._slot_values: dict[tuple[int, int], tuple] = {}
+
+    def build(self, stages):
+        """Index every stage buffer, stages is a list of raw stage data in stage order"""
+        for field in self.INDEXED_FIELDS:
+            self.index[field].clear()
+        self._slot_values.clear()
+
+        for stage_index, data in enumerate(stages):
+            self._index_stage(stage_index, data)
+
+    def _index_stage(self, stage_index: int, data):
+        columns = [column(data, field) for field in self.INDEXED_FIELDS]
+        leaders = columns[self.INDEXED_FIELDS.index("LeaderU")]
+        for slot, values in enumerate(zip(*columns)):
+            if leaders[slot] == EMPTY_LEADER:
+                continue
+            key = (stage_index, slot)
+            self._slot_values[key] = values
+            for field, value in zip(self.INDEXED_FIELDS, values):
+                self.index[field].setdefault(value, set()).add(key)
+
+    def update_stage(self, stage_index: int, data):
+        """Drop and re-index every slot of one stage (e.g. after a mod was loaded)"""
+        for slot in range(SLOTS_PER_STAGE):
+            self._remove_slot(stage_index, slot)
+        self._index_stage(stage_index, data)
+
+    def update_slot(self, stage_index: int, slot: int, data):
+        """Re-index one slot after it was edited"""
+        self._remove_slot(stage_index, slot)
+        values = tuple(get_field(data, slot, field) for field in self.INDEXED_FIELDS)
+        if values[self.INDEXED_FIELDS.index("LeaderU")] == EMPTY_LEADER:
+            return
+        key = (stage_index, slot)
+        self._slot_values[key] = values
+        for field, value in zip(self.INDEXED_FIELDS, values):
+            self.index[field].setdefault(value, set()).add(key)
+
+    def _remove_slot(self, stage_index: int, slot: int):
+        key = (stage_index, slot)
+        values = self._slot_values.pop(key, None)
+        if values is None:
+            return
+        for field, value in zip(self.INDEXED_FIELDS, values):
+            bucket = self.index[field][value]
+            bucket.discard(key)
+            if not bucket:
+                del self.index[field][value]
+
+    # Queries
+
+    def where(self, field: str, value: int) -> list[tuple[int, int]]:
+        """Sorted (stage_index, slot) pairs whose field equals value"""
+        return sorted(self.index[field].get(value, ()))
+
+    def unit_usage(self, unit_id: int) -> dict[str, list[tuple[int, int]]]:
+        """Where a unit id is used as leader or as guards"""
+        return {
+            "LeaderU": self.where("LeaderU", unit_id),
+            "GuardU": self.where("GuardU", unit_id),
+        }
+
+    def usage_count(self, unit_id: int) -> int:
+        """Number of slots using unit_id as leader or guards"""
+        return len(self.index["LeaderU"].get(unit_id, ())) + len(self.index["GuardU"].get(unit_id, ()))
@@ -3,19 +3,24 @@
 import os
 from io import BytesIO
 import tkinter as tk
-from tkinter import ttk, PhotoImage
+from tkinter import ttk, PhotoImage, messagebox
 
 from .Utility import (
     TheCheck,
     unit_names,
     stage_data,
-    DW2_BIN,
     ICON_DIR,
     BACKUP_DIR,
     BACKGROUNDS_DIR,
 )
 
 from .DW2CordGuide import ImageMarkerApp
+from .Stage_Data import StageXref, STAGE_DATA_SIZE, SLOT_SIZE
+from .Stage_Validator import validate_stage, validate_stages, format_report
+from .Image_Model import ImageModel, merge_records
+from .Stage_Grid import StageGrid
+from .Stage_Select import BulkEditWindow
+from .Stage_Graph import analyze_orders, describe_slot, order_segments, format_order_report
 
 filenames = [
     "YTR_Stage",
@@ -65,12 +70,23 @@ FIELD_DEFS = [
 ]
 
 class StageEditor(TheCheck):  # for modding stage/battles
-    def __init__(self, root):
+    def __init__(self, root, model: ImageModel | None = None):
+        self.model = model or ImageModel()  # shared cached DW2.bin tables
         self.filenames = filenames  # stage ids for combobox
         self.stage_files: dict[str, BytesIO] = {}  # in-memory data per stage
+        self.stage_loaded: dict[str, bytes] = {}  # stage bytes as last read from the image
         # track a single Coordinate Guide window
         self.coord_guide_window = None
         self.coord_guide_app = None
+        # and a single all slots grid window
+        self.grid_window = None
+        self.grid_app = None
+        # and a single bulk edit window, its record clipboard lives here so it
+        # survives the window and works across stages
+        self.bulk_window = None
+        self.bulk_app = None
+        self.record_clipboard: list[bytes] = []
+        self.clipboard_source = ""
         
         self.root = root
         self.root.title("Stage Editor")
@@ -81,6 +97,10 @@ class StageEditor(TheCheck):  # for modding stage/battles
         # in-memory extraction from DW2.bin
         self.stage_data_create()
 
+        # where every leader/guard unit, unit type and item drop is used
+        self.xref = StageXref()
+        self.xref.build([self.stage_files[name].getvalue() for name in self.filenames])
+
         # Load the default image based on the initial combobox selection
         initial_map_index = 0
         initial_image_path = self.get_image_filename(initial_map_index)
@@ -133,14 +153,21 @@ class StageEditor(TheCheck):  # for modding stage/battles
         self.status_label = tk.Label(self.root, text="", fg="green")
         self.status_label.place(x=480, y=200)
 
-        # unit name combo
+        # order chain of the current slot, red when the chain is broken
+        self.order_label = tk.Label(self.root, text="", fg="green", justify="left", wraplength=400)
+        self.order_label.place(x=480, y=230)
+
+        # unit name combo, each entry shows how many slots use that unit
         self.combo = ttk.Combobox(
-            self.root, values=unit_names, width=30, state="readonly"
+            self.root, values=self._unit_combo_values(), width=30, state="readonly"
         )
         self.combo.place(x=1200, y=600)
-        self.combo.set(unit_names[0])
+        self.combo.current(0)
         self.combo.bind("<<ComboboxSelected>>", self.on_select)
 
+        self.usage_label = tk.Label(self.root, text="", justify="left", wraplength=380)
+        self.usage_label.place(x=1200, y=630)
+
         # Tk variables for slot fields
         # Tk variables for slot fields, created from FIELD_DEFS
         self.field_vars = {}
@@ -180,12 +207,78 @@ class StageEditor(TheCheck):  # for modding stage/battles
         tk.Entry(self.root, textvariable=self.modname).place(x=395, y=10)
         tk.Label(self.root, text="Enter a mod name").place(x=280, y=10)
 
+        tk.Button(
+            self.root,
+            text="Validate All Stages",
+            command=self.show_validation_report,
+            width=15,
+        ).place(x=550, y=45)
+
+        tk.Button(
+            self.root,
+            text="All Slots Grid",
+            command=self.open_stage_grid,
+            width=15,
+        ).place(x=550, y=80)
+
+        tk.Button(
+            self.root,
+            text="Bulk Edit",
+            command=self.open_bulk_edit,
+            width=15,
+        ).place(x=550, y=115)
+
         self.stage_labels()
         self.stage_entries()
 
         # load initial slot 0 of first stage
         self.stage_search(self.filenames[0], 0)
 
+        # reload a stage when another tool (e.g. the Mod Manager) writes it
+        for i in range(len(self.filenames)):
+            self.model.subscribe(f"stage:{i}", self.stage_changed, owner=self)
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.model.unsubscribe(self)
+
+    def stage_changed(self, key: str):
+        """
+        One stage was written to DW2.bin by another tool, reload only that stage,
+        slots edited here and not yet saved to a mod keep their edits, slots
+        also changed by the other tool are listed in the status line
+        """
+        stage_name = self.model.regions[key].label
+        stage_index = self.filenames.index(stage_name)
+        theirs = self.model.read(key)
+        mine = self.stage_files[stage_name].getvalue()[:STAGE_DATA_SIZE]
+        merged, conflicts = merge_records(self.stage_loaded[stage_name], mine, theirs, SLOT_SIZE)
+        self.stage_loaded[stage_name] = theirs
+        self.stage_files[stage_name] = self._stage_buffer(stage_index, merged)
+
+        self.xref.update_stage(stage_index, self.stage_files[stage_name].getvalue())
+        self.combo.config(values=self._unit_combo_values())
+
+        if self.selected_file.get() == stage_name:
+            self.stage_search(stage_name, self.selected_slot.get())
+        self._refresh_grid(stage_name)
+        if conflicts:
+            listed = ", ".join(map(str, conflicts[:10])) + (" ..." if len(conflicts) > 10 else "")
+            self.status_label.config(
+                text=f"{stage_name} changed in another tool, your unsaved edits to slots {listed} were kept.",
+                fg="red",
+            )
+        elif merged != theirs:
+            self.status_label.config(
+                text=f"{stage_name} reloaded after a change in another tool, your unsaved edits were kept.",
+                fg="green",
+            )
+        else:
+            self.status_label.config(
+                text=f"{stage_name} reloaded after a change in another tool.", fg="green"
+            )
+
     # GUI helpers
 
     def stage_labels(self):
@@ -233,9 +326,28 @@ class StageEditor(TheCheck):  # for modding stage/battles
                 validatecommand=vcmd,
             ).place(x=entry_x, y=y)
 
-    def on_select(self, event):
-        # currently just holds selection, hook any extra logic here if needed
-        selected_unit = self.combo.get()
+    def _unit_combo_values(self) -> list[str]:
+        """unit_names with the number of slots (all stages) using each unit"""
+        return [
+            f"{name} [{self.xref.usage_count(unit_id)}]"
+            for unit_id, name in enumerate(unit_names)
+        ]
+
+    def on_select(self, event=None):
+        """Show every stage/slot where the selected unit is used as leader or guards"""
+        unit_id = self.combo.current()
+        if unit_id < 0:
+            return
+
+        lines = []
+        for field, label in (("LeaderU", "Leader"), ("GuardU", "Guards")):
+            per_stage = {}
+            for stage_index, slot in self.xref.unit_usage(unit_id)[field]:
+                per_stage.setdefault(self.filenames[stage_index], []).append(str(slot))
+            for stage_name, slots in per_stage.items():
+                lines.append(f"{label} in {stage_name}: slots {', '.join(slots)}")
+
+        self.usage_label.config(text="\n".join(lines) or "Not used in any stage.")
 
     # In-memory stage init
 
@@ -256,38 +368,34 @@ class StageEditor(TheCheck):  # for modding stage/battles
         # make sure backup folder exists
         os.makedirs(BACKUP_DIR, exist_ok=True)
 
-        with open(DW2_BIN, "rb") as f1:
-            for i, stage_name in enumerate(self.filenames):
-                mem = BytesIO()
-                offsets_for_stage = stage_data[i]
-
-                # slot region: 8 blocks * 64 slots * 32 bytes
-                for base_off in offsets_for_stage:
-                    f1.seek(base_off)
-                    for _ in range(64):
-                        chunk = f1.read(32)
-                        if len(chunk) != 32:
-                            raise IOError(
-                                f"Unexpected EOF reading stage '{stage_name}' at 0x{base_off:X}"
-                            )
-                        mem.write(chunk)
-
-                # append the original 8 offsets
-                for base_off in offsets_for_stage:
-                    mem.write(base_off.to_bytes(4, "little"))
-
-                # rewind and store in-memory
-                mem.seek(0)
-                self.stage_files[stage_name] = mem
-
-                # backup creation only if not already present
-                backup_name = f"{stage_name}_Original.stage"
-                backup_path = os.path.join(BACKUP_DIR, backup_name)
-
-                if not os.path.exists(backup_path):
-                    # write the entire in-memory buffer (512 slots + 8 offsets)
-                    with open(backup_path, "wb") as bf:
-                        bf.write(mem.getbuffer())
+        # every stage region in one pass over DW2.bin
+        self.model.load([f"stage:{i}" for i in range(len(self.filenames))])
+
+        for i, stage_name in enumerate(self.filenames):
+            self.stage_loaded[stage_name] = self.model.read(f"stage:{i}")
+            mem = self._stage_buffer(i)
+            self.stage_files[stage_name] = mem
+
+            # backup creation only if not already present
+            backup_name = f"{stage_name}_Original.stage"
+            backup_path = os.path.join(BACKUP_DIR, backup_name)
+
+            if not os.path.exists(backup_path):
+                # write the entire in-memory buffer (512 slots + 8 offsets)
+                with open(backup_path, "wb") as bf:
+                    bf.write(mem.getbuffer())
+
+    def _stage_buffer(self, stage_index: int, data: bytes | None = None) -> BytesIO:
+        """
+        In-memory stage file: the 8 blocks * 64 slots * 32 bytes from the
+        image model (or data) followed by the original 8 offsets
+        """
+        mem = BytesIO()
+        mem.write(self.model.read(f"stage:{stage_index}") if data is None else data)
+        for base_off in stage_data[stage_index]:
+            mem.write(base_off.to_bytes(4, "little"))
+        mem.seek(0)
+        return mem
 
     # Map images
 
@@ -315,6 +423,9 @@ class StageEditor(TheCheck):  # for modding stage/battles
         self.img = PhotoImage(file=image_filename)
         self.img_label.configure(image=self.img)
 
+        if self._grid_open():
+            self.grid_app.set_stage(selected_file_value)
+
     def get_global_slot(self) -> int:
         """
         Convert side/side_slot to global slot index 0–511,
@@ -424,6 +535,17 @@ class StageEditor(TheCheck):  # for modding stage/battles
         self.DelayO.set(DelayOrder)
         self.PointsK.set(PointsKO)
 
+        self.update_order_label(selected_file, selected_slot)
+
+    def update_order_label(self, stage_name: str, slot: int):
+        """Show where the slot's orders lead, broken chains in red"""
+        with self.stage_files[stage_name].getbuffer() as buf:
+            graph = analyze_orders(buf)
+        self.order_label.config(
+            text=describe_slot(graph, slot),
+            fg="red" if slot in graph.problems else "green",
+        )
+
     def submit_stage_values(self):
         """
         Write current TK variables back into the in-memory 32 byte slot
@@ -472,6 +594,12 @@ class StageEditor(TheCheck):  # for modding stage/battles
             for b in record:
                 stage_file.write(b)
 
+            # keep usage index and counts current
+            self.xref.update_slot(self.filenames.index(stage_name), selected_slot, stage_file.getvalue())
+            self.combo.config(values=self._unit_combo_values())
+            self._refresh_grid(stage_name)
+            self.update_order_label(stage_name, selected_slot)
+
             self.status_label.config(text="Values submitted without issues.", fg="green")
         except Exception as e:
             self.status_label.config(text=f"Error with entries: {e}", fg="red")
@@ -492,6 +620,20 @@ class StageEditor(TheCheck):  # for modding stage/battles
             usermodname = base_name + stage_extension[file_index]
 
             data = stage_file.getvalue()
+
+            # gate the export on the stage passing validation
+            violations = validate_stage(data[:STAGE_DATA_SIZE], file_index)
+            if violations and not messagebox.askyesno(
+                "Stage validation",
+                format_report(violations, self.filenames, max_lines=20)
+                + "\n\nCreate the mod anyway?",
+                parent=self.root,
+            ):
+                self.status_label.config(
+                    text=f"Mod creation cancelled, {len(violations)} problems found.", fg="red"
+                )
+                return
+
             with open(usermodname, "wb") as w1:
                 w1.write(data)
 
@@ -502,6 +644,117 @@ class StageEditor(TheCheck):  # for modding stage/battles
             self.status_label.config(
                 text=f"Error creating mod file: {e}", fg="red"
             )
+    def show_validation_report(self):
+        """Validate every slot of every stage and show the report in its own window"""
+        stages = [self.stage_files[name].getvalue()[:STAGE_DATA_SIZE] for name in self.filenames]
+        violations = validate_stages(stages)
+
+        win = tk.Toplevel(self.root)
+        win.title("Stage Validation")
+        text = tk.Text(win, width=100, height=40)
+        scroll = ttk.Scrollbar(win, orient="vertical", command=text.yview)
+        text.configure(yscrollcommand=scroll.set)
+        scroll.pack(side=tk.RIGHT, fill=tk.Y)
+        text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        text.insert("1.0", format_report(violations, self.filenames))
+
+        # order chain problems per stage
+        order_lines = []
+        for name, data in zip(self.filenames, stages):
+            graph = analyze_orders(data)
+            if graph.problems:
+                order_lines += ["", f"{name} order chains:", format_order_report(graph)]
+        if order_lines:
+            text.insert(tk.END, "\n" + "\n".join(order_lines))
+        text.config(state="disabled")
+
+        self.status_label.config(
+            text=f"Validation found {len(violations)} problems across all stages.",
+            fg="green" if not violations else "red",
+        )
+
+    # All slots grid
+
+    def _grid_open(self) -> bool:
+        return (
+            self.grid_window is not None
+            and self.grid_window.winfo_exists()
+            and self.grid_app is not None
+        )
+
+    def _refresh_grid(self, stage_name: str):
+        """Redraw the grid if it is showing stage_name"""
+        if self._grid_open() and self.grid_app.stage_name == stage_name:
+            self.grid_app.render()
+
+    def open_stage_grid(self):
+        """Open (or focus) the spreadsheet view of every slot of the current stage"""
+        if self._grid_open():
+            self.grid_app.set_stage(self.selected_file.get())
+            self.grid_window.lift()
+            self.grid_window.focus_force()
+            return
+
+        grid_win = tk.Toplevel(self.root)
+        self.grid_window = grid_win
+        self.grid_app = StageGrid(grid_win, self, FIELD_DEFS)
+
+        def on_close():
+            self.grid_window = None
+            self.grid_app = None
+            grid_win.destroy()
+
+        grid_win.protocol("WM_DELETE_WINDOW", on_close)
+
+    def slot_edited(self, stage_name: str, slot: int):
+        """A slot was changed outside the single slot view (grid, bulk edit)"""
+        self.xref.update_slot(
+            self.filenames.index(stage_name), slot, self.stage_files[stage_name].getvalue()
+        )
+        self.combo.config(values=self._unit_combo_values())
+        if self.selected_file.get() == stage_name and self.selected_slot.get() == slot:
+            self.stage_search(stage_name, slot)
+
+    def stage_edited(self, stage_name: str):
+        """Many slots of a stage changed at once (bulk edit, paste)"""
+        self.xref.update_stage(
+            self.filenames.index(stage_name), self.stage_files[stage_name].getvalue()
+        )
+        self.combo.config(values=self._unit_combo_values())
+        if self.selected_file.get() == stage_name:
+            self.stage_search(stage_name, self.selected_slot.get())
+        self._refresh_grid(stage_name)
+
+    def open_bulk_edit(self):
+        """Open (or focus) the multi-slot selection and bulk edit window"""
+        if self.bulk_window is not None and self.bulk_window.winfo_exists():
+            self.bulk_window.lift()
+            self.bulk_window.focus_force()
+            return
+
+        bulk_win = tk.Toplevel(self.root)
+        self.bulk_window = bulk_win
+        self.bulk_app = BulkEditWindow(bulk_win, self, FIELD_DEFS)
+
+        def on_close():
+            self.bulk_window = None
+            self.bulk_app = None
+            bulk_win.destroy()
+
+        bulk_win.protocol("WM_DELETE_WINDOW", on_close)
+
+    def show_slot(self, stage_name: str, slot: int):
+        """Select stage_name / slot in the single slot view"""
+        self.side_var.set("Side 1 (0–255)" if slot < 256 else "Side 2 (256–511)")
+        self.side_slot.set(slot % 256)
+        self.selected_slot.set(slot)
+        if self.selected_file.get() != stage_name:
+            self.selected_file.set(stage_name)
+            self.stage_search_on_map_change()
+        else:
+            self.stage_search(stage_name, slot)
+        self.root.lift()
+
     # collect valid slots for coordinate guider
     def open_coord_guide(self):
         """
@@ -572,6 +825,9 @@ class StageEditor(TheCheck):  # for modding stage/battles
                     guide_app.auto_mark_coords(coords_side1, color="blue")  # Side 1
                 if coords_side2:
                     guide_app.auto_mark_coords(coords_side2, color="red")   # Side 2
+                guide_app.set_heatmap_source(stage_name, stage_file.getvalue())
+                data = stage_file.getvalue()
+                guide_app.set_order_segments(order_segments(data, analyze_orders(data)))
                 # bring to front
                 self.coord_guide_window.lift()
                 self.coord_guide_window.focus_force()
@@ -602,6 +858,9 @@ class StageEditor(TheCheck):  # for modding stage/battles
                     guide_app.auto_mark_coords(coords_side1, color="blue")  # Side 1
                 if coords_side2:
                     guide_app.auto_mark_coords(coords_side2, color="red")   # Side 2
+                guide_app.set_heatmap_source(stage_name, stage_file.getvalue())
+                data = stage_file.getvalue()
+                guide_app.set_order_segments(order_segments(data, analyze_orders(data)))
 
         except Exception as e:
             self.status_label.config(
@@ -0,0 +1,164 @@
+# DW2_Tools/Stage_Graph.py
+
+from typing import NamedTuple
+
+from .Stage_Data import column, EMPTY_LEADER, SLOTS_PER_SIDE, SLOTS_PER_STAGE
+from .Stage_Validator import ORDER_FOLLOW, resolve_order_target
+
+# No order target (array value)
+NO_TARGET = -1
+
+# problem id -> description shown in the editor and reports
+PROBLEMS = {
+    "orphan": "Order target is an empty slot (Leader Unit 255)",
+    "cycle": "Follow orders form a loop, no unit in it leads",
+    "stranded": "Follow chain ends in a loop or an empty target",
+}
+
+
+class OrderGraph(NamedTuple):
+    """
+    Order graph of one stage, every slot has at most one outgoing edge
+
+    targets[slot] is the global slot it attacks or follows (NO_TARGET otherwise),
+    follows[slot] is True for follow orders, problems maps problem slots to a
+    PROBLEMS id and cycles lists each follow loop in chain order
+    """
+    targets: list[int]
+    follows: list[bool]
+    used: list[bool]
+    problems: dict[int, str]
+    cycles: list[list[int]]
+
+    def chain(self, slot: int) -> list[int]:
+        """Slots visited following slot's follow orders, stops at the leader or on a repeat"""
+        seen = [slot]
+        while self.follows[slot] and self.targets[slot] != NO_TARGET and self.targets[slot] not in seen:
+            slot = self.targets[slot]
+            seen.append(slot)
+        return seen
+
+
+def build_order_graph(data) -> tuple[list[int], list[bool], list[bool]]:
+    """Adjacency arrays (targets, follows, used) for all 512 slots in one pass over the order columns"""
+    leaders = column(data, "LeaderU")
+    orders = column(data, "UnitC")
+    target_slots = column(data, "Advance")
+
+    used = [leader != EMPTY_LEADER for leader in leaders]
+    targets = [NO_TARGET] * SLOTS_PER_STAGE
+    follows = [False] * SLOTS_PER_STAGE
+    for slot in range(SLOTS_PER_STAGE):
+        if not used[slot]:
+            continue
+        target = resolve_order_target(slot, orders[slot], target_slots[slot])
+        if target is not None:
+            targets[slot] = target
+            follows[slot] = orders[slot] == ORDER_FOLLOW
+    return targets, follows, used
+
+
+def analyze_orders(data) -> OrderGraph:
+    """
+    Find broken order chains in one stage buffer, linear in the number of slots
+
+    - orphan: the slot attacks or follows an empty slot
+    - cycle: the slot is part of a loop of follow orders (attack orders pointing
+      at each other are two units fighting, not a problem)
+    - stranded: the slot's follow chain leads into an orphan or a cycle
+
+    Every slot has at most one outgoing edge, so each follow chain is walked
+    once, slots are marked done as the walk unwinds and never walked again
+    """
+    targets, follows, used = build_order_graph(data)
+    problems: dict[int, str] = {}
+    cycles: list[list[int]] = []
+
+    for slot in range(SLOTS_PER_STAGE):
+        if used[slot] and targets[slot] != NO_TARGET and not used[targets[slot]]:
+            problems[slot] = "orphan"
+
+    # 0 = not visited, 1 = on the current walk, 2 = done
+    state = bytearray(SLOTS_PER_STAGE)
+    for start in range(SLOTS_PER_STAGE):
+        if state[start] or not used[start]:
+            continue
+
+        path = []
+        slot = start
+        while True:
+            state[slot] = 1
+            path.append(slot)
+            nxt = targets[slot]
+            if not follows[slot] or nxt == NO_TARGET or not used[nxt]:
+                broken = slot in problems
+                break
+            if state[nxt] == 1:
+                loop = path[path.index(nxt):]
+                cycles.append(loop)
+                for member in loop:
+                    problems[member] = "cycle"
+                broken = True
+                break
+            if state[nxt] == 2:
+                broken = nxt in problems
+                break
+            slot = nxt
+
+        for member in path:
+            state[member] = 2
+            if broken and member not in problems:
+                problems[member] = "stranded"
+
+    return OrderGraph(targets, follows, used, problems, cycles)
+
+
+def describe_slot(graph: OrderGraph, slot: int) -> str:
+    """One line summary of a slot's order chain for the single slot view"""
+    if not graph.used[slot]:
+        return ""
+    target = graph.targets[slot]
+    if target == NO_TARGET:
+        text = "No order target."
+    else:
+        verb = "Follows" if graph.follows[slot] else "Attacks"
+        side = target // SLOTS_PER_SIDE + 1
+        text = f"{verb} slot {target} (side {side} slot {target % SLOTS_PER_SIDE})"
+        chain = graph.chain(slot)
+        if len(chain) > 2:
+            text += ", chain " + " -> ".join(map(str, chain))
+    problem = graph.problems.get(slot)
+    return f"{text}\n{PROBLEMS[problem]}" if problem else text
+
+
+def order_segments(data, graph: OrderGraph) -> list[tuple[int, int, int, int, str]]:
+    """
+    (x1, y1, x2, y2, kind) in DW2 map coordinates for every order between two
+    used slots, kind is "follow", "attack" or "problem"
+    """
+    xs = column(data, "xcord")
+    ys = column(data, "ycord")
+    segments = []
+    for slot, target in enumerate(graph.targets):
+        if target == NO_TARGET or not graph.used[target]:
+            continue
+        if slot in graph.problems:
+            kind = "problem"
+        else:
+            kind = "follow" if graph.follows[slot] else "attack"
+        segments.append((xs[slot], ys[slot], xs[target], ys[target], kind))
+    return segments
+
+
+def format_order_report(graph: OrderGraph) -> str:
+    """Summary of a stage's order problems, grouped by kind"""
+    if not graph.problems:
+        return "No order chain problems."
+    lines = []
+    for problem, description in PROBLEMS.items():
+        slots = sorted(slot for slot, found in graph.problems.items() if found == problem)
+        if slots:
+            lines.append(f"{description}: {', '.join(map(str, slots))}")
+    for loop in graph.cycles:
+        lines.append("Loop: " + " -> ".join(map(str, loop + loop[:1])))
+    return "\n".join(lines)
@@ -0,0 +1,194 @@
+# DW2_Tools/Stage_Grid.py
+
+import tkinter as tk
+from tkinter import ttk
+
+from .Stage_Data import (
+    SLOTS_PER_STAGE, SLOTS_PER_SIDE, FIELD_LAYOUT, EMPTY_LEADER, decode_slot, set_field,
+)
+from .Stage_Graph import analyze_orders
+
+# Rows that get widgets, everything else is decoded only when scrolled into view
+VISIBLE_ROWS = 24
+CELL_WIDTH = 6
+
+
+class StageGrid:
+    """
+    Spreadsheet view of every slot of one stage (512 rows * FIELD_DEFS columns)
+
+    Only VISIBLE_ROWS rows of Entry widgets exist, scrolling re-binds them to
+    other slots and decodes those slots from the editor's in-memory stage
+    buffer, Cell edits are written straight into that buffer with set_field
+    Clicking a slot number selects that slot in the Stage Editor
+    """
+
+    def __init__(self, root, editor, field_defs):
+        self.root = root
+        self.editor = editor
+        self.field_defs = field_defs
+        self.fields = [name for name, _label, _row in field_defs]
+        self.labels = {name: label for name, label, _row in field_defs}
+
+        self.stage_name = editor.selected_file.get()
+        self.top = 0  # first slot shown
+
+        self.root.title(f"All Slots - {self.stage_name}")
+        self.root.resizable(False, False)
+
+        self._build_gui()
+        self.render()
+
+    # GUI
+
+    def _build_gui(self):
+        table = tk.Frame(self.root)
+        table.grid(row=0, column=0, sticky="nsew")
+
+        tk.Label(table, text="Slot", width=10, relief="groove").grid(row=0, column=0)
+        for col, name in enumerate(self.fields, start=1):
+            tk.Label(table, text=name, width=CELL_WIDTH + 1, relief="groove").grid(row=0, column=col)
+
+        # fixed pool of row widgets: slot label + one Entry per field
+        self.row_labels: list[tk.Label] = []
+        self.cell_vars: list[list[tk.StringVar]] = []
+        self.cells: dict[tk.Entry, tuple[int, str]] = {}  # entry -> (row index, field)
+
+        for r in range(VISIBLE_ROWS):
+            label = tk.Label(table, text="", width=10, anchor="w", cursor="hand2")
+            label.grid(row=r + 1, column=0)
+            label.bind("<Button-1>", lambda _e, r=r: self.select_row(r))
+            self.row_labels.append(label)
+
+            row_vars = []
+            for col, name in enumerate(self.fields, start=1):
+                var = tk.StringVar()
+                entry = tk.Entry(table, textvariable=var, width=CELL_WIDTH)
+                entry.grid(row=r + 1, column=col)
+                entry.bind("<Return>", self._commit_event)
+                entry.bind("<FocusOut>", self._commit_event)
+                entry.bind("<FocusIn>", self._focus_event)
+                entry.bind("<Up>", lambda _e, r=r, c=col: self._move_focus(r - 1, c))
+                entry.bind("<Down>", lambda _e, r=r, c=col: self._move_focus(r + 1, c))
+                self.cells[entry] = (r, name)
+                row_vars.append(var)
+            self.cell_vars.append(row_vars)
+
+        self.scrollbar = ttk.Scrollbar(self.root, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.status_label = tk.Label(self.root, text="", fg="green", anchor="w")
+        self.status_label.grid(row=1, column=0, columnspan=2, sticky="we")
+
+        # wheel scrolling anywhere over the grid (Button-4/5 on X11)
+        for widget in [self.root, table, *self.row_labels, *self.cells]:
+            widget.bind("<MouseWheel>", self._on_wheel)
+            widget.bind("<Button-4>", lambda _e: self.scroll_to(self.top - 3))
+            widget.bind("<Button-5>", lambda _e: self.scroll_to(self.top + 3))
+
+    # Scrolling
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * SLOTS_PER_STAGE))
+        elif action == "scroll":
+            step = VISIBLE_ROWS - 1 if unit == "pages" else 1
+            self.scroll_to(self.top + int(amount) * step)
+
+    def _on_wheel(self, event):
+        self.scroll_to(self.top - int(event.delta / 120) * 3)
+        return "break"
+
+    def scroll_to(self, top: int):
+        """Show slots starting at top, committing the cell being edited first"""
+        self._commit_focused()
+        self.top = max(0, min(SLOTS_PER_STAGE - VISIBLE_ROWS, top))
+        self.render()
+
+    def _move_focus(self, r: int, col: int):
+        """Arrow keys move between rows, scrolling at the edges"""
+        if r < 0:
+            self.scroll_to(self.top - 1)
+            r = 0
+        elif r >= VISIBLE_ROWS:
+            self.scroll_to(self.top + 1)
+            r = VISIBLE_ROWS - 1
+        for entry, (row, name) in self.cells.items():
+            if row == r and self.fields.index(name) + 1 == col:
+                entry.focus_set()
+                entry.icursor(tk.END)
+                break
+        return "break"
+
+    # Data
+
+    def set_stage(self, stage_name: str):
+        """Show another stage (the editor's stage selection changed)"""
+        self._commit_focused()
+        self.stage_name = stage_name
+        self.root.title(f"All Slots - {stage_name}")
+        self.render()
+
+    def render(self):
+        """Decode the visible slots from the stage buffer into the row widgets"""
+        stage_file = self.editor.stage_files[self.stage_name]
+        with stage_file.getbuffer() as buf:
+            problems = analyze_orders(buf).problems
+            for r in range(VISIBLE_ROWS):
+                slot = self.top + r
+                values = decode_slot(buf, slot)
+                empty = values["LeaderU"] == EMPTY_LEADER
+                self.row_labels[r].config(
+                    text=f"{slot} (S{slot // SLOTS_PER_SIDE + 1}:{slot % SLOTS_PER_SIDE})",
+                    fg="grey" if empty else "red" if slot in problems else "black",
+                )
+                for var, name in zip(self.cell_vars[r], self.fields):
+                    var.set(str(values[name]))
+
+        self.scrollbar.set(self.top / SLOTS_PER_STAGE, (self.top + VISIBLE_ROWS) / SLOTS_PER_STAGE)
+
+    def _focus_event(self, event):
+        r, name = self.cells[event.widget]
+        offset, size = FIELD_LAYOUT[name]
+        self.status_label.config(
+            text=f"Slot {self.top + r}: {self.labels[name]} (byte {offset}, {size * 8} bit)", fg="green"
+        )
+
+    def _commit_focused(self):
+        widget = self.root.focus_get()
+        if widget in self.cells:
+            self._commit_cell(widget)
+
+    def _commit_event(self, event):
+        self._commit_cell(event.widget)
+
+    def _commit_cell(self, entry):
+        """Write one edited cell into the stage buffer, invalid values are reverted"""
+        r, name = self.cells[entry]
+        slot = self.top + r
+        var = self.cell_vars[r][self.fields.index(name)]
+
+        stage_file = self.editor.stage_files[self.stage_name]
+        with stage_file.getbuffer() as buf:
+            current = decode_slot(buf, slot)[name]
+            try:
+                text = var.get().strip()
+                value = int(text, 16) if text.lower().startswith("0x") else int(text)
+                if value == current:
+                    return
+                set_field(buf, slot, name, value)
+            except ValueError as e:
+                var.set(str(current))
+                self.status_label.config(text=f"Slot {slot} {self.labels[name]}: {e}", fg="red")
+                return
+
+        self.editor.slot_edited(self.stage_name, slot)
+        self.status_label.config(
+            text=f"Slot {slot}: {self.labels[name]} {current} -> {value}", fg="green"
+        )
+        if name in ("LeaderU", "UnitC", "Advance"):
+            self.render()
+
+    def select_row(self, r: int):
+        """Open a slot in the Stage Editor's single slot view"""
+        self.editor.show_slot(self.stage_name, self.top + r)
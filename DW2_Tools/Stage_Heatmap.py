@@ -0,0 +1,92 @@
+# DW2_Tools/Stage_Heatmap.py
+
+import base64
+import struct
+import zlib
+
+from .Stage_Data import SLOTS_PER_SIDE, STAGE_DATA_SIZE, EMPTY_LEADER, column
+
+# Map images and DW2 coordinates are 800 * 800, binned into HEATMAP_BIN px cells
+MAP_SIZE = 800
+HEATMAP_BIN = 16
+GRID = MAP_SIZE // HEATMAP_BIN
+
+# Opacity of the faintest and the densest cell
+MIN_ALPHA = 70
+MAX_ALPHA = 210
+
+
+def spawn_histogram(data) -> tuple[list[int], list[int]]:
+    """
+    Weighted spawn counts per GRID * GRID cell for side 1 and side 2
+
+    Every used slot adds 1 + AmountGuards to the cell its X/Y falls in, rows
+    run top down like the map image (DW2 Y increases upwards)
+    """
+    sides = ([0] * (GRID * GRID), [0] * (GRID * GRID))
+    columns = zip(
+        column(data, "xcord"), column(data, "ycord"),
+        column(data, "AmountG"), column(data, "LeaderU"),
+    )
+    for slot, (x, y, guards, leader) in enumerate(columns):
+        if leader == EMPTY_LEADER or x > MAP_SIZE or y > MAP_SIZE:
+            continue
+        row = min((MAP_SIZE - y) // HEATMAP_BIN, GRID - 1)
+        col = min(x // HEATMAP_BIN, GRID - 1)
+        sides[slot >= SLOTS_PER_SIDE][row * GRID + col] += 1 + guards
+    return sides
+
+
+def smooth(hist: list[int]) -> list[int]:
+    """3 * 3 box sum, so single spawns spread into a visible blob"""
+    rows = [hist[r * GRID:(r + 1) * GRID] for r in range(GRID)]
+    # horizontal pass, then vertical
+    wide = [
+        [sum(row[max(c - 1, 0):c + 2]) for c in range(GRID)]
+        for row in rows
+    ]
+    out = []
+    for r in range(GRID):
+        above = wide[r - 1] if r else [0] * GRID
+        below = wide[r + 1] if r + 1 < GRID else [0] * GRID
+        out += map(sum, zip(above, wide[r], below))
+    return out
+
+
+def heatmap_png(side1: list[int], side2: list[int]) -> bytes:
+    """
+    GRID * GRID RGBA PNG, hue goes from blue (side 1) to red (side 2) by each
+    side's share of a cell, opacity follows the cell's total weight
+    """
+    peak = max(map(sum, zip(side1, side2)), default=0) or 1
+    raw = bytearray()
+    for r in range(GRID):
+        raw.append(0)  # filter type None
+        for a, b in zip(side1[r * GRID:(r + 1) * GRID], side2[r * GRID:(r + 1) * GRID]):
+            total = a + b
+            if not total:
+                raw += b"\x00\x00\x00\x00"
+                continue
+            alpha = MIN_ALPHA + (MAX_ALPHA - MIN_ALPHA) * total // peak
+            raw += bytes((255 * b // total, 40, 255 * a // total, alpha))
+
+    def chunk(kind: bytes, body: bytes) -> bytes:
+        return struct.pack(">I", len(body)) + kind + body + struct.pack(">I", zlib.crc32(kind + body))
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", GRID, GRID, 8, 6, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(bytes(raw)))
+        + chunk(b"IEND", b"")
+    )
+
+
+def heatmap_key(data) -> int:
+    """Checksum of a stage buffer, a cached heatmap is stale once this changes"""
+    return zlib.crc32(bytes(data[:STAGE_DATA_SIZE]))
+
+
+def stage_heatmap(data) -> str:
+    """Base64 PNG of a stage's spawn density, ready for tk.PhotoImage(data=...)"""
+    side1, side2 = spawn_histogram(data)
+    return base64.b64encode(heatmap_png(smooth(side1), smooth(side2))).decode("ascii")
@@ -0,0 +1,402 @@
+# DW2_Tools/Stage_Select.py
+
+import operator
+import re
+import tkinter as tk
+from tkinter import ttk
+
+from .Stage_Data import (
+    SLOT_SIZE, SLOTS_PER_STAGE, SLOTS_PER_SIDE, STAGE_DATA_SIZE, FIELD_LAYOUT, EMPTY_LEADER,
+    column, set_column,
+)
+
+# Extra names accepted in filters besides the FIELD_LAYOUT names (case-insensitive)
+FIELD_ALIASES = {
+    "x": "xcord",
+    "y": "ycord",
+    "direction": "direct",
+    "pathing": "AreaP",
+    "gate": "PullingB",
+    "life": "Lif",
+    "leaderunit": "LeaderU",
+    "leader": "LeaderU",
+    "guardunits": "GuardU",
+    "guards": "GuardU",
+    "attack": "Att",
+    "defense": "Def",
+    "amountguards": "AmountG",
+    "unitslot": "UnitS",
+    "unittype": "UnitG",
+    "aitype": "AIT",
+    "orders": "UnitC",
+    "hide": "Hid",
+    "ordertarget": "Advance",
+    "itemdrop": "ItemD",
+    "ailevel": "AIL",
+    "delayorder": "DelayO",
+    "points": "PointsK",
+}
+
+OPERATORS = {
+    "==": operator.eq,
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<=": operator.le,
+    ">=": operator.ge,
+    "<": operator.lt,
+    ">": operator.gt,
+}
+
+_CONDITION = re.compile(r"^([A-Za-z_]\w*)\s*(==|!=|<=|>=|=|<|>)\s*(\S+)$")
+_RANGE = re.compile(r"^(\d+)(?:-(\d+))?$")
+
+
+def resolve_field(name: str) -> str:
+    """FIELD_LAYOUT name for a field name or alias, case-insensitive"""
+    lower = name.lower()
+    for field in FIELD_LAYOUT:
+        if field.lower() == lower:
+            return field
+    if lower in FIELD_ALIASES:
+        return FIELD_ALIASES[lower]
+    raise ValueError(f"Unknown field '{name}'.")
+
+
+def field_max(field: str) -> int:
+    return (1 << (8 * FIELD_LAYOUT[field][1])) - 1
+
+
+def _parse_int(text: str) -> int:
+    return int(text, 16) if text.lower().startswith("0x") else int(text)
+
+
+def select_slots(data, query: str) -> list[int]:
+    """
+    Slots of a stage buffer matching a comma separated filter, every clause must hold:
+
+      side 1 / side 2          only slots of that side
+      slots 10-60 200-210      slot ranges (per side when a side is given, else 0-511)
+      slot 5                   a single slot
+      used / empty             LeaderUnit != 255 / == 255
+      LeaderUnit != 255        any field name or alias, ops == = != < <= > >=
+
+    An empty query selects every slot
+    """
+    side = None
+    ranges = []
+    conditions = []
+
+    for clause in (c.strip() for c in query.split(",")):
+        if not clause:
+            continue
+        words = clause.split(None, 1)
+        keyword = words[0].lower()
+
+        if keyword == "side":
+            if len(words) != 2 or words[1].strip() not in ("1", "2"):
+                raise ValueError(f"'{clause}': side must be 1 or 2.")
+            side = int(words[1]) - 1
+        elif keyword in ("slot", "slots"):
+            if len(words) != 2:
+                raise ValueError(f"'{clause}': expected slot numbers or ranges.")
+            spec = re.sub(r"\s*[-–]\s*", "-", words[1].strip())
+            for part in re.split(r"[\s;]+", spec):
+                match = _RANGE.match(part)
+                if not match:
+                    raise ValueError(f"'{clause}': '{part}' is not a slot or range.")
+                lo = int(match.group(1))
+                hi = int(match.group(2)) if match.group(2) else lo
+                ranges.append((min(lo, hi), max(lo, hi)))
+        elif keyword == "used":
+            conditions.append(("LeaderU", operator.ne, EMPTY_LEADER))
+        elif keyword == "empty":
+            conditions.append(("LeaderU", operator.eq, EMPTY_LEADER))
+        else:
+            match = _CONDITION.match(clause)
+            if not match:
+                raise ValueError(f"Can't read '{clause}'.")
+            name, op, value = match.groups()
+            try:
+                conditions.append((resolve_field(name), OPERATORS[op], _parse_int(value)))
+            except ValueError as e:
+                raise ValueError(f"'{clause}': {e}")
+
+    # candidate slots from side and ranges
+    base = 0 if side is None else side * SLOTS_PER_SIDE
+    limit = SLOTS_PER_STAGE if side is None else SLOTS_PER_SIDE
+    if ranges:
+        candidates = sorted({
+            base + i
+            for lo, hi in ranges
+            for i in range(lo, min(hi, limit - 1) + 1)
+        })
+    else:
+        candidates = list(range(base, base + limit))
+
+    # filter on field values, one column read per field used
+    columns = {field: column(data, field) for field, _op, _value in conditions}
+    return [
+        slot for slot in candidates
+        if all(op(columns[field][slot], value) for field, op, value in conditions)
+    ]
+
+
+# Bulk edits, each reads the field's column once and writes it back in one slice
+
+def assign_field(data: bytearray, slots, field: str, value: int) -> int:
+    """Set field to value on every slot, returns how many slots changed"""
+    if not 0 <= value <= field_max(field):
+        raise ValueError(f"{field} must be 0-{field_max(field)}, got {value}.")
+    col = list(column(data, field))
+    changed = 0
+    for slot in slots:
+        if col[slot] != value:
+            col[slot] = value
+            changed += 1
+    set_column(data, field, col)
+    return changed
+
+
+def offset_field(data: bytearray, slots, field: str, delta: int) -> int:
+    """Add delta to field on every slot, clamped to the field's range"""
+    top = field_max(field)
+    col = list(column(data, field))
+    changed = 0
+    for slot in slots:
+        new = max(0, min(top, col[slot] + delta))
+        if new != col[slot]:
+            col[slot] = new
+            changed += 1
+    set_column(data, field, col)
+    return changed
+
+
+def copy_field(data: bytearray, slots, field: str, source_slot: int) -> int:
+    """Give every slot the field value of source_slot"""
+    return assign_field(data, slots, field, column(data, field)[source_slot])
+
+
+def copy_records(data, slots) -> list[bytes]:
+    """Whole 32 byte records of the given slots, in slot order"""
+    return [bytes(data[slot * SLOT_SIZE:(slot + 1) * SLOT_SIZE]) for slot in slots]
+
+
+def paste_records(data: bytearray, slots, records: list[bytes]) -> int:
+    """
+    Write copied records onto slots, one record is pasted onto every slot,
+    otherwise slots and records are paired in order and must match in count
+    """
+    slots = list(slots)
+    if len(records) == 1:
+        records = records * len(slots)
+    elif len(records) != len(slots):
+        raise ValueError(f"{len(records)} records copied but {len(slots)} slots selected.")
+
+    changed = 0
+    for slot, record in zip(slots, records):
+        start = slot * SLOT_SIZE
+        if data[start:start + SLOT_SIZE] != record:
+            data[start:start + SLOT_SIZE] = record
+            changed += 1
+    return changed
+
+
+BULK_MODES = ("Assign value", "Offset by", "Copy from slot")
+
+
+class BulkEditWindow:
+    """
+    Multi-slot selection and bulk edits for the Stage Editor's current stage
+
+    A filter picks the slots, then one FIELD_DEFS field is assigned, offset or
+    copied from a source slot across all of them in a single buffer update,
+    Whole records can be copied to the editor's clipboard and pasted onto
+    slots of any stage
+    """
+
+    def __init__(self, root, editor, field_defs):
+        self.root = root
+        self.editor = editor
+        self.labels = {label: name for name, label, _row in field_defs}
+        self.selection: list[int] = []
+        self.selection_stage = ""
+
+        self.root.title("Stage Bulk Edit")
+        self.root.resizable(False, False)
+
+        self.filter_var = tk.StringVar(value="side 2, slots 10-60, LeaderUnit != 255")
+        self.field_var = tk.StringVar(value=field_defs[0][1])
+        self.mode_var = tk.StringVar(value=BULK_MODES[0])
+        self.value_var = tk.StringVar(value="0")
+
+        self._build_gui()
+        self.update_clipboard_label()
+
+    def _build_gui(self):
+        pad = {"padx": 6, "pady": 4}
+
+        tk.Label(self.root, text="Filter").grid(row=0, column=0, sticky="w", **pad)
+        entry = tk.Entry(self.root, textvariable=self.filter_var, width=60)
+        entry.grid(row=0, column=1, columnspan=3, sticky="we", **pad)
+        entry.bind("<Return>", lambda _e: self.run_filter())
+        tk.Button(self.root, text="Select", command=self.run_filter, width=12).grid(row=0, column=4, **pad)
+
+        tk.Label(
+            self.root,
+            text="Clauses joined by commas: side 1|2, slots 10-60 100-120, used, empty, "
+                 "<field> ==|!=|<|<=|>|>= <value>",
+            fg="grey",
+        ).grid(row=1, column=0, columnspan=5, sticky="w", **pad)
+
+        self.selection_label = tk.Label(self.root, text="No slots selected.", anchor="w", justify="left",
+                                        wraplength=620)
+        self.selection_label.grid(row=2, column=0, columnspan=5, sticky="w", **pad)
+
+        ttk.Combobox(
+            self.root, textvariable=self.field_var, values=list(self.labels),
+            state="readonly", width=40,
+        ).grid(row=3, column=0, columnspan=2, sticky="w", **pad)
+        ttk.Combobox(
+            self.root, textvariable=self.mode_var, values=BULK_MODES, state="readonly", width=14,
+        ).grid(row=3, column=2, **pad)
+        tk.Entry(self.root, textvariable=self.value_var, width=10).grid(row=3, column=3, **pad)
+        tk.Button(self.root, text="Apply", command=self.apply_field, width=12).grid(row=3, column=4, **pad)
+
+        tk.Button(self.root, text="Copy Records", command=self.copy_records, width=14).grid(
+            row=4, column=0, sticky="w", **pad)
+        tk.Button(self.root, text="Paste Records", command=self.paste_records, width=14).grid(
+            row=4, column=1, sticky="w", **pad)
+        self.clipboard_label = tk.Label(self.root, text="", anchor="w")
+        self.clipboard_label.grid(row=4, column=2, columnspan=3, sticky="w", **pad)
+
+        self.status_label = tk.Label(self.root, text="", fg="green", anchor="w")
+        self.status_label.grid(row=5, column=0, columnspan=5, sticky="w", **pad)
+
+    # Helpers
+
+    def _stage(self) -> str:
+        return self.editor.selected_file.get()
+
+    def _stage_bytes(self, stage_name: str) -> bytearray:
+        return bytearray(self.editor.stage_files[stage_name].getvalue()[:STAGE_DATA_SIZE])
+
+    def _store(self, stage_name: str, data: bytearray):
+        """Write the edited slot data back into the editor's stage buffer in one write"""
+        stage_file = self.editor.stage_files[stage_name]
+        stage_file.seek(0)
+        stage_file.write(data)
+        self.editor.stage_edited(stage_name)
+
+    def _set_status(self, msg: str, ok: bool = True):
+        self.status_label.config(text=msg, fg="green" if ok else "red")
+
+    def update_clipboard_label(self):
+        records = self.editor.record_clipboard
+        self.clipboard_label.config(
+            text=f"Clipboard: {len(records)} records from {self.editor.clipboard_source}"
+            if records else "Clipboard: empty"
+        )
+
+    # Selection
+
+    def run_filter(self):
+        stage_name = self._stage()
+        try:
+            self.selection = select_slots(self._stage_bytes(stage_name), self.filter_var.get())
+        except ValueError as e:
+            self._set_status(str(e), ok=False)
+            return
+
+        self.selection_stage = stage_name
+        shown = ", ".join(str(slot) for slot in self.selection[:40])
+        more = f" (+{len(self.selection) - 40} more)" if len(self.selection) > 40 else ""
+        self.selection_label.config(
+            text=f"{len(self.selection)} slots selected in {stage_name}: {shown}{more}"
+            if self.selection else f"No slots in {stage_name} match."
+        )
+        self._set_status(f"Filter matched {len(self.selection)} slots.")
+
+    def _selection_valid(self, stage_name: str) -> bool:
+        """The selection's slot numbers were picked by another stage's values, refuse to use them"""
+        if self.selection and self.selection_stage != stage_name:
+            self._set_status(
+                f"Selection was made in {self.selection_stage}, run the filter again for {stage_name}.",
+                ok=False,
+            )
+            return False
+        return True
+
+    # Bulk edits
+
+    def apply_field(self):
+        """Assign, offset or copy the chosen field across every selected slot"""
+        if not self.selection:
+            self._set_status("Select some slots first.", ok=False)
+            return
+
+        stage_name = self._stage()
+        if not self._selection_valid(stage_name):
+            return
+        field = self.labels[self.field_var.get()]
+        mode = self.mode_var.get()
+        data = self._stage_bytes(stage_name)
+        try:
+            value = _parse_int(self.value_var.get().strip())
+            if mode == "Assign value":
+                changed = assign_field(data, self.selection, field, value)
+            elif mode == "Offset by":
+                changed = offset_field(data, self.selection, field, value)
+            else:
+                if not 0 <= value < SLOTS_PER_STAGE:
+                    raise ValueError(f"Source slot must be 0-{SLOTS_PER_STAGE - 1}.")
+                changed = copy_field(data, self.selection, field, value)
+        except ValueError as e:
+            self._set_status(f"Bulk edit failed: {e}", ok=False)
+            return
+
+        self._store(stage_name, data)
+        self._set_status(
+            f"{self.field_var.get()}: {mode.lower()} {value} on {len(self.selection)} slots "
+            f"of {stage_name}, {changed} changed."
+        )
+
+    def copy_records(self):
+        """Copy the selected slots' records, or the current slot when nothing is selected"""
+        stage_name = self._stage()
+        if not self._selection_valid(stage_name):
+            return
+        slots = self.selection or [self.editor.selected_slot.get()]
+        self.editor.record_clipboard = copy_records(self._stage_bytes(stage_name), slots)
+        self.editor.clipboard_source = f"{stage_name} slots {slots[0]}-{slots[-1]}"
+        self.update_clipboard_label()
+        self._set_status(f"Copied {len(slots)} records from {stage_name}.")
+
+    def paste_records(self):
+        """
+        Paste the clipboard onto the selected slots of the current stage, without
+        a selection records go to consecutive slots from the current slot
+        """
+        records = self.editor.record_clipboard
+        if not records:
+            self._set_status("Nothing copied yet.", ok=False)
+            return
+
+        stage_name = self._stage()
+        if not self._selection_valid(stage_name):
+            return
+        if self.selection:
+            slots = self.selection
+        else:
+            start = self.editor.selected_slot.get()
+            slots = range(start, min(start + len(records), SLOTS_PER_STAGE))
+            records = records[:len(slots)]
+
+        data = self._stage_bytes(stage_name)
+        try:
+            changed = paste_records(data, slots, records)
+        except ValueError as e:
+            self._set_status(f"Paste failed: {e}", ok=False)
+            return
+
+        self._store(stage_name, data)
+        self._set_status(f"Pasted onto {len(slots)} slots of {stage_name}, {changed} changed.")
@@ -0,0 +1,134 @@
+# DW2_Tools/Stage_Validator.py
+
+from typing import NamedTuple
+
+from .Stage_Data import column, EMPTY_LEADER, SLOTS_PER_SIDE, SLOTS_PER_STAGE
+
+# Map coordinates run 0-800 on both axes, same as the Coordinate Guide
+MAP_MAX = 800
+MAX_GUARDS = 9
+
+# Orders values that use Order Target Slot
+ORDER_ATTACK = 1   # attack a unit on the enemy side
+ORDER_FOLLOW = 3   # follow a unit on the same side
+
+# rule id -> description shown in reports
+RULES = {
+    "coords": f"Spawn position outside the 0-{MAP_MAX} map",
+    "guards": f"Amount of guards above {MAX_GUARDS}",
+    "order_target": "Order Target Slot points at an empty slot (Leader Unit 255)",
+    "unit_slot": "Unit slot that unit belongs to points at an empty slot",
+}
+
+
+class Violation(NamedTuple):
+    stage_index: int
+    slot: int
+    rule: str
+    detail: str
+
+
+def resolve_order_target(slot: int, orders: int, target: int) -> int | None:
+    """
+    Global slot (0-511) an order points at, or None when the order has no target
+
+    Order Target Slot is a per-side index, attack orders point at the other side,
+    follow orders at the slot's own side
+    """
+    side = slot // SLOTS_PER_SIDE
+    if orders == ORDER_ATTACK:
+        return (1 - side) * SLOTS_PER_SIDE + target
+    if orders == ORDER_FOLLOW:
+        return side * SLOTS_PER_SIDE + target
+    return None
+
+
+def validate_stage(data, stage_index: int = 0) -> list[Violation]:
+    """
+    Check all 512 slots of one stage buffer, empty slots (Leader Unit 255) are skipped
+
+    Every field is pulled out as a whole column first, the rules then run as
+    single passes over those columns
+    """
+    leaders = column(data, "LeaderU")
+    xs = column(data, "xcord")
+    ys = column(data, "ycord")
+    guards = column(data, "AmountG")
+    orders = column(data, "UnitC")
+    targets = column(data, "Advance")
+    unit_slots = column(data, "UnitS")
+
+    used = [slot for slot in range(SLOTS_PER_STAGE) if leaders[slot] != EMPTY_LEADER]
+    violations = []
+
+    violations += [
+        Violation(stage_index, slot, "coords", f"X={xs[slot]} Y={ys[slot]}")
+        for slot in used if xs[slot] > MAP_MAX or ys[slot] > MAP_MAX
+    ]
+
+    violations += [
+        Violation(stage_index, slot, "guards", f"Amount of guards={guards[slot]}")
+        for slot in used if guards[slot] > MAX_GUARDS
+    ]
+
+    for slot in used:
+        target = resolve_order_target(slot, orders[slot], targets[slot])
+        if target is not None and leaders[target] == EMPTY_LEADER:
+            violations.append(Violation(
+                stage_index, slot, "order_target",
+                f"Orders={orders[slot]} target {targets[slot]} -> slot {target}",
+            ))
+
+    side_base = [slot - slot % SLOTS_PER_SIDE for slot in range(SLOTS_PER_STAGE)]
+    violations += [
+        Violation(
+            stage_index, slot, "unit_slot",
+            f"Unit slot {unit_slots[slot]} -> slot {side_base[slot] + unit_slots[slot]}",
+        )
+        for slot in used if leaders[side_base[slot] + unit_slots[slot]] == EMPTY_LEADER
+    ]
+
+    violations.sort(key=lambda v: (v.stage_index, v.slot))
+    return violations
+
+
+def validate_stages(stages) -> list[Violation]:
+    """Check every stage (4,096 slots for all 8), stages is a list of raw stage data"""
+    violations = []
+    for stage_index, data in enumerate(stages):
+        violations += validate_stage(data, stage_index)
+    return violations
+
+
+def group_by_slot(violations) -> dict[tuple[int, int], list[Violation]]:
+    grouped = {}
+    for v in violations:
+        grouped.setdefault((v.stage_index, v.slot), []).append(v)
+    return grouped
+
+
+def group_by_rule(violations) -> dict[str, list[Violation]]:
+    grouped = {rule: [] for rule in RULES}
+    for v in violations:
+        grouped[v.rule].append(v)
+    return {rule: found for rule, found in grouped.items() if found}
+
+
+def format_report(violations, stage_names, max_lines: int | None = None) -> str:
+    """Human readable report, a per-rule summary followed by violations grouped by slot"""
+    if not violations:
+        return "No problems found."
+
+    lines = [f"{len(violations)} problems found:"]
+    for rule, found in group_by_rule(violations).items():
+        lines.append(f"  {RULES[rule]}: {len(found)}")
+    lines.append("")
+
+    for (stage_index, slot), found in group_by_slot(violations).items():
+        side = slot // SLOTS_PER_SIDE + 1
+        lines.append(f"{stage_names[stage_index]} slot {slot} (side {side} slot {slot % SLOTS_PER_SIDE}):")
+        lines += [f"    {RULES[v.rule]} ({v.detail})" for v in found]
+
+    if max_lines is not None and len(lines) > max_lines:
+        lines = lines[:max_lines] + [f"... {len(lines) - max_lines} more lines"]
+    return "\n".join(lines)
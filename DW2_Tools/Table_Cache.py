@@ -0,0 +1,141 @@
+# DW2_Tools/Table_Cache.py
+
+import hashlib
+import os
+import struct
+
+from .Utility import TABLE_CACHE_DIR
+
+CACHE_MAGIC = b"DW2TBL01"
+
+# magic, image size, image mtime (ns), sampled hash, region layout hash, table count
+HEADER = struct.Struct("<8sQQ16s16sI")
+# key length, table length, followed by the key and the table bytes
+ENTRY = struct.Struct("<HI")
+
+# Image bytes hashed next to size + mtime, spread evenly from the first to the
+# last byte, catches an image replaced by a copy that kept the old mtime
+SAMPLES = 8
+SAMPLE_SIZE = 4096
+
+
+def cache_path_for(bin_path: str) -> str:
+    """Local cache file of one image, named after the image and its full path"""
+    path_hash = hashlib.blake2b(os.path.abspath(bin_path).encode("utf-8"), digest_size=6).hexdigest()
+    return os.path.join(TABLE_CACHE_DIR, f"{os.path.basename(bin_path)}.{path_hash}.tables")
+
+
+def image_key(bin_path: str) -> tuple[int, int, bytes]:
+    """(size, mtime_ns, sampled hash) identifying the current contents of an image"""
+    st = os.stat(bin_path)
+    h = hashlib.blake2b(st.st_size.to_bytes(8, "little"), digest_size=16)
+    last = max(st.st_size - SAMPLE_SIZE, 0)
+    with open(bin_path, "rb") as f:
+        for i in range(SAMPLES):
+            f.seek(last * i // (SAMPLES - 1))
+            h.update(f.read(SAMPLE_SIZE))
+    return st.st_size, st.st_mtime_ns, h.digest()
+
+
+def layout_key(regions) -> bytes:
+    """Hash of every region's key and extents, tables move when the offsets change"""
+    layout = repr([(region.key, region.extents) for region in regions]).encode("ascii")
+    return hashlib.blake2b(layout, digest_size=16).digest()
+
+
+def extract_tables(bin_path: str, regions) -> dict[str, bytes]:
+    """Logical bytes of every region, read in file order in one open"""
+    tables = {}
+    with open(bin_path, "rb") as f:
+        for region in sorted(regions, key=lambda region: region.extents[0][0]):
+            pieces = []
+            for offset, length in region.extents:
+                f.seek(offset)
+                pieces.append(f.read(length))
+            data = b"".join(pieces)
+            if len(data) != region.size:
+                raise IOError(f"Unexpected EOF reading {region.label}.")
+            tables[region.key] = data
+    return tables
+
+
+def load_tables(bin_path: str, regions, cache_path: str | None = None) -> dict[str, bytes] | None:
+    """
+    Every table from the cache file in one read, None when there is no cache
+    or it was made from another version of the image or another region layout
+    """
+    cache_path = cache_path or cache_path_for(bin_path)
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) < HEADER.size or data[:8] != CACHE_MAGIC:
+        return None
+
+    _magic, size, mtime_ns, sample, layout, count = HEADER.unpack_from(data)
+    if layout != layout_key(regions) or (size, mtime_ns, sample) != image_key(bin_path):
+        return None
+
+    tables = {}
+    pos = HEADER.size
+    for _ in range(count):
+        if pos + ENTRY.size > len(data):
+            return None
+        key_length, length = ENTRY.unpack_from(data, pos)
+        pos += ENTRY.size
+        key = data[pos:pos + key_length].decode("utf-8")
+        pos += key_length
+        tables[key] = data[pos:pos + length]
+        pos += length
+
+    sizes = {region.key: region.size for region in regions}
+    if {key: len(table) for key, table in tables.items()} != sizes:
+        return None
+    return tables
+
+
+def save_tables(bin_path: str, regions, tables: dict[str, bytes], cache_path: str | None = None,
+                key: tuple[int, int, bytes] | None = None) -> tuple[int, int, bytes]:
+    """
+    Write every table to the cache file and return the image key it was
+    stamped with, tables must match what the image holds (nothing pending)
+
+    key is the image_key() taken before the tables were read, by default the
+    image is stat'ed and sampled as it is saved
+    """
+    cache_path = cache_path or cache_path_for(bin_path)
+    size, mtime_ns, sample = key or image_key(bin_path)
+    parts = [HEADER.pack(CACHE_MAGIC, size, mtime_ns, sample, layout_key(regions), len(tables))]
+    for key, table in tables.items():
+        encoded = key.encode("utf-8")
+        parts += [ENTRY.pack(len(encoded), len(table)), encoded, table]
+
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp = cache_path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(tmp, cache_path)
+    return size, mtime_ns, sample
+
+
+def drop_tables(bin_path: str, cache_path: str | None = None):
+    """Delete an image's cache file, the next load extracts every table again"""
+    try:
+        os.remove(cache_path or cache_path_for(bin_path))
+    except OSError:
+        pass
+
+
+def cached_tables(bin_path: str, regions, cache_path: str | None = None) -> dict[str, bytes]:
+    """Every table, from the cache when it is current, otherwise extracted once and cached"""
+    regions = list(regions)
+    tables = load_tables(bin_path, regions, cache_path)
+    if tables is None:
+        key = image_key(bin_path)  # before the read, a write during it leaves the cache stale
+        tables = extract_tables(bin_path, regions)
+        try:
+            save_tables(bin_path, regions, tables, cache_path, key=key)
+        except OSError:
+            pass  # read only install, the tables were still read
+    return tables
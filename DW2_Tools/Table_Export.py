@@ -0,0 +1,343 @@
+# DW2_Tools/Table_Export.py
+
+import csv
+import json
+
+from .Utility import DW2_BIN, write_patches
+from .Image_Regions import table_regions, read_region, logical_to_physical
+from .Stage_Editor import FIELD_DEFS as STAGE_FIELD_DEFS, filenames as STAGE_NAMES
+from .Stage_Data import (
+    SLOT_SIZE as STAGE_SLOT_SIZE, SLOTS_PER_STAGE, SLOTS_PER_SIDE, UNUSED_BYTES,
+    column, set_field,
+)
+from .Unit_Editor import FIELD_DEFS as UNIT_FIELD_DEFS, SLOT_SIZE as UNIT_SLOT_SIZE, NUM_SLOTS_TOTAL
+from .Item_Editor import FIELD_DEFS as ITEM_FIELD_DEFS, ITEM_STRUCT
+from .Name_Editor import (
+    NAME_SLOT_TABLE, NAME_MAX_GAP, split_name_fields, decode_name, validate_names, encode_name, name_patches,
+)
+from .DW2_Bodyguard_Progression import GUARD_FIELD_LABELS, GUARD_TIERS
+
+# Tables that can be exported/imported, in the order the tools list them
+TABLES = ("stages", "units", "items", "names", "guard")
+
+# Image_Regions kind each table is stored in
+TABLE_REGION_KINDS = {"stages": "stage", "units": "units", "items": "items", "names": "names", "guard": "guard"}
+
+# Stage blocks sit 0x130 apart (sector trailer + header), like the name groups
+TABLE_MAX_GAP = NAME_MAX_GAP
+
+UNUSED_COLUMN = "Unused bytes"
+
+# Header per table, stage/unit/guard value columns use the editors' labels
+HEADERS = {
+    "stages": ["stage", "slot", "side"] + [label for _n, label, _r in STAGE_FIELD_DEFS] + [UNUSED_COLUMN],
+    "units": ["slot"] + [label for _n, label, _r in UNIT_FIELD_DEFS],
+    "items": ["item", "label", "id", "value", "effect"],
+    "names": ["slot", "name", "max_length"],
+    "guard": ["tier"] + GUARD_FIELD_LABELS,
+}
+
+
+def _regions(regions, kind: str) -> list:
+    return [region for region in regions if region.kind == kind]
+
+
+# Export, one row per record, generated while reading one region at a time
+
+def iter_stage_rows(f, regions):
+    for region in _regions(regions, "stage"):
+        data = read_region(f, region)
+        columns = [column(data, name) for name, _label, _row in STAGE_FIELD_DEFS]
+        labels = [label for _name, label, _row in STAGE_FIELD_DEFS]
+        for slot, values in enumerate(zip(*columns)):
+            record = data[slot * STAGE_SLOT_SIZE:(slot + 1) * STAGE_SLOT_SIZE]
+            row = {"stage": region.label, "slot": slot, "side": slot // SLOTS_PER_SIDE + 1}
+            row.update(zip(labels, values))
+            row[UNUSED_COLUMN] = bytes(record[i] for i in UNUSED_BYTES).hex()
+            yield row
+
+
+def iter_unit_rows(f, regions):
+    data = read_region(f, _regions(regions, "units")[0])
+    labels = [label for _name, label, _row in UNIT_FIELD_DEFS]
+    for slot in range(NUM_SLOTS_TOTAL):
+        row = {"slot": slot}
+        row.update(zip(labels, data[slot * UNIT_SLOT_SIZE:(slot + 1) * UNIT_SLOT_SIZE]))
+        yield row
+
+
+def iter_item_rows(f, regions):
+    data = read_region(f, _regions(regions, "items")[0])
+    for (name, label, _col, _row), (item_id, value, effect) in zip(
+        ITEM_FIELD_DEFS, ITEM_STRUCT.iter_unpack(data)
+    ):
+        yield {"item": name, "label": label, "id": item_id, "value": value, "effect": effect}
+
+
+def _read_names(f, regions) -> list[str]:
+    data = read_region(f, _regions(regions, "names")[0])
+    return [decode_name(field) for field in split_name_fields(data)]
+
+
+def iter_name_rows(f, regions):
+    for slot, name in enumerate(_read_names(f, regions)):
+        yield {"slot": slot, "name": name, "max_length": NAME_SLOT_TABLE[slot][1]}
+
+
+def iter_guard_rows(f, regions):
+    data = read_region(f, _regions(regions, "guard")[0])
+    size = len(GUARD_FIELD_LABELS)
+    for tier in range(GUARD_TIERS):
+        row = {"tier": tier + 1}
+        row.update(zip(GUARD_FIELD_LABELS, data[tier * size:(tier + 1) * size]))
+        yield row
+
+
+ROW_READERS = {
+    "stages": iter_stage_rows,
+    "units": iter_unit_rows,
+    "items": iter_item_rows,
+    "names": iter_name_rows,
+    "guard": iter_guard_rows,
+}
+
+
+def _is_jsonl(path: str) -> bool:
+    return path.lower().endswith((".jsonl", ".json"))
+
+
+def export_table(table: str, out_path: str, bin_path: str = DW2_BIN, regions=None) -> int:
+    """
+    Stream one table from DW2.bin to CSV, or JSON Lines when out_path ends in
+    .jsonl/.json, returns the number of rows written
+
+    regions are the image's table regions (table_regions() for DW2.bin by default)
+    """
+    regions = table_regions() if regions is None else list(regions)
+    count = 0
+    with open(bin_path, "rb") as f:
+        rows = ROW_READERS[table](f, regions)
+        if _is_jsonl(out_path):
+            with open(out_path, "w", encoding="utf-8") as out:
+                for row in rows:
+                    out.write(json.dumps(row) + "\n")
+                    count += 1
+        else:
+            with open(out_path, "w", newline="", encoding="utf-8") as out:
+                writer = csv.DictWriter(out, fieldnames=HEADERS[table])
+                writer.writeheader()
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+    return count
+
+
+# Import, rows are validated as they stream in and turned into record patches,
+# nothing is written unless every row is valid
+
+def iter_rows(path: str):
+    """(line number, row dict) from a CSV or JSON Lines file"""
+    if _is_jsonl(path):
+        with open(path, encoding="utf-8") as f:
+            for line_no, line in enumerate(f, start=1):
+                if line.strip():
+                    yield line_no, json.loads(line)
+    else:
+        with open(path, newline="", encoding="utf-8") as f:
+            yield from enumerate(csv.DictReader(f), start=2)
+
+
+def _parse_int(value) -> int:
+    """Accept ints, decimal text or 0x hex text (spreadsheets hand back text)"""
+    if isinstance(value, int):
+        return value
+    text = str(value).strip()
+    return int(text, 16) if text.lower().startswith("0x") else int(text)
+
+
+def _present(row: dict, column: str) -> bool:
+    return row.get(column) not in (None, "")
+
+
+def _record_patches(region, data: bytes, records: dict[int, bytes], size: int):
+    """(offset, bytes) for every record that differs from the image"""
+    return [
+        (logical_to_physical(region, index * size), record)
+        for index, record in sorted(records.items())
+        if data[index * size:(index + 1) * size] != record
+    ]
+
+
+def _import_stages(f, rows, errors, regions):
+    stages = {region.label: region for region in _regions(regions, "stage")}
+    current = {}   # stage name -> logical bytes from the image
+    edited = {}    # stage name -> slot -> new 32 byte record
+    fields = [(name, label) for name, label, _row in STAGE_FIELD_DEFS]
+
+    for line_no, row in rows:
+        stage = row.get("stage")
+        if stage not in stages:
+            errors.append(f"Line {line_no}: unknown stage '{stage}', expected one of {', '.join(STAGE_NAMES)}.")
+            continue
+        try:
+            slot = _parse_int(row.get("slot"))
+            if not 0 <= slot < SLOTS_PER_STAGE:
+                raise ValueError(f"slot must be 0-{SLOTS_PER_STAGE - 1}.")
+            if stage not in current:
+                current[stage] = read_region(f, stages[stage])
+            record = bytearray(current[stage][slot * STAGE_SLOT_SIZE:(slot + 1) * STAGE_SLOT_SIZE])
+            for name, label in fields:
+                if _present(row, label):
+                    set_field(record, 0, name, _parse_int(row[label]))
+            if _present(row, UNUSED_COLUMN):
+                unused = bytes.fromhex(str(row[UNUSED_COLUMN]))
+                if len(unused) != len(UNUSED_BYTES):
+                    raise ValueError(f"{UNUSED_COLUMN} must be {len(UNUSED_BYTES)} bytes of hex.")
+                for i, b in zip(UNUSED_BYTES, unused):
+                    record[i] = b
+        except (TypeError, ValueError) as e:
+            errors.append(f"Line {line_no}: {e}")
+            continue
+        edited.setdefault(stage, {})[slot] = bytes(record)
+
+    patches = []
+    for stage, records in edited.items():
+        patches += _record_patches(stages[stage], current[stage], records, STAGE_SLOT_SIZE)
+    return patches
+
+
+def _import_units(f, rows, errors, regions):
+    region = _regions(regions, "units")[0]
+    data = read_region(f, region)
+    fields = [label for _name, label, _row in UNIT_FIELD_DEFS]
+    records = {}
+
+    for line_no, row in rows:
+        try:
+            slot = _parse_int(row.get("slot"))
+            if not 0 <= slot < NUM_SLOTS_TOTAL:
+                raise ValueError(f"slot must be 0-{NUM_SLOTS_TOTAL - 1}.")
+            record = bytearray(data[slot * UNIT_SLOT_SIZE:(slot + 1) * UNIT_SLOT_SIZE])
+            for i, label in enumerate(fields):
+                if _present(row, label):
+                    value = _parse_int(row[label])
+                    if not 0 <= value <= 255:
+                        raise ValueError(f"{label} must be 0-255, got {value}.")
+                    record[i] = value
+        except (TypeError, ValueError) as e:
+            errors.append(f"Line {line_no}: {e}")
+            continue
+        records[slot] = bytes(record)
+
+    return _record_patches(region, data, records, UNIT_SLOT_SIZE)
+
+
+# Item fields are unsigned 32 bit (ITEM_STRUCT)
+ITEM_VALUE_MAX = 0xFFFFFFFF
+
+
+def _import_items(f, rows, errors, regions):
+    region = _regions(regions, "items")[0]
+    data = read_region(f, region)
+    items = list(ITEM_STRUCT.iter_unpack(data))
+    index = {name: i for i, (name, _label, _col, _row) in enumerate(ITEM_FIELD_DEFS)}
+    records = {}
+
+    for line_no, row in rows:
+        i = index.get(row.get("item"))
+        if i is None:
+            errors.append(f"Line {line_no}: unknown item '{row.get('item')}'.")
+            continue
+        try:
+            values = list(items[i])
+            for pos, column_name in enumerate(("id", "value", "effect")):
+                if _present(row, column_name):
+                    value = _parse_int(row[column_name])
+                    if not 0 <= value <= ITEM_VALUE_MAX:
+                        raise ValueError(f"{column_name} must be 0-{ITEM_VALUE_MAX}, got {value}.")
+                    values[pos] = value
+            records[i] = ITEM_STRUCT.pack(*values)
+        except (TypeError, ValueError, OverflowError) as e:
+            errors.append(f"Line {line_no}: {e}")
+
+    return _record_patches(region, data, records, ITEM_STRUCT.size)
+
+
+def _import_names(f, rows, errors, regions):
+    names = {}
+    for line_no, row in rows:
+        if not _present(row, "name"):
+            continue  # blank keeps the current name
+        try:
+            names[_parse_int(row.get("slot"))] = str(row["name"])
+        except (TypeError, ValueError):
+            errors.append(f"Line {line_no}: expected 'slot' and 'name' columns.")
+
+    problems = validate_names(names)
+    if problems:
+        errors += problems
+        return []
+
+    current = _read_names(f, regions)
+    return name_patches({
+        slot: encode_name(name, NAME_SLOT_TABLE[slot][1])
+        for slot, name in names.items() if current[slot] != name
+    }, _regions(regions, "names")[0])
+
+
+def _import_guard(f, rows, errors, regions):
+    region = _regions(regions, "guard")[0]
+    data = read_region(f, region)
+    size = len(GUARD_FIELD_LABELS)
+    records = {}
+
+    for line_no, row in rows:
+        try:
+            tier = _parse_int(row.get("tier")) - 1
+            if not 0 <= tier < GUARD_TIERS:
+                raise ValueError(f"tier must be 1-{GUARD_TIERS}.")
+            record = bytearray(data[tier * size:(tier + 1) * size])
+            for i, label in enumerate(GUARD_FIELD_LABELS):
+                if _present(row, label):
+                    value = _parse_int(row[label])
+                    if not 0 <= value <= 255:
+                        raise ValueError(f"{label} must be 0-255, got {value}.")
+                    record[i] = value
+        except (TypeError, ValueError) as e:
+            errors.append(f"Line {line_no}: {e}")
+            continue
+        records[tier] = bytes(record)
+
+    return _record_patches(region, data, records, size)
+
+
+ROW_IMPORTERS = {
+    "stages": _import_stages,
+    "units": _import_units,
+    "items": _import_items,
+    "names": _import_names,
+    "guard": _import_guard,
+}
+
+
+def import_table(table: str, in_path: str, bin_path: str = DW2_BIN, regions=None) -> int:
+    """
+    Stream rows from a CSV/JSON Lines export back into DW2.bin
+
+    Columns left out or blank keep the image's current value, Every row is
+    validated first, raises ValueError listing invalid rows without writing,
+    otherwise only records that changed are written, sorted and coalesced.
+    regions are the image's table regions as for export_table.
+    Returns the number of records written
+    """
+    regions = table_regions() if regions is None else list(regions)
+    errors = []
+    with open(bin_path, "rb") as f:
+        patches = ROW_IMPORTERS[table](f, iter_rows(in_path), errors, regions)
+
+    if errors:
+        raise ValueError("; ".join(errors[:5]) + (f" (+{len(errors) - 5} more)" if len(errors) > 5 else ""))
+
+    if patches:
+        write_patches(bin_path, patches, max_gap=TABLE_MAX_GAP)
+    return len(patches)
@@ -1,11 +1,12 @@
 # DW2_Tools/Unit_Editor.py
 
 import os
-from io import BytesIO
+from bisect import insort
 import tkinter as tk
 from tkinter import ttk
 
-from .Utility import TheCheck, unit_data, DW2_BIN, ICON_DIR, BACKUP_DIR # unit_data: offsets in DW2.bin
+from .Utility import TheCheck, unit_data, unit_names, ICON_DIR, BACKUP_DIR # unit_data: offsets in DW2.bin
+from .Image_Model import ImageModel, merge_records
 
 # Mod file extension written by Create Unit Mod
 DW2_UNIT_MOD_EXT = ".DW2UnitMod"
@@ -27,32 +28,126 @@ FIELD_DEFS = [
     ("itemcount", "Amount of items and heals",    6),
 ]
 
+# byte position of each field inside a 7 byte record
+FIELD_INDEX = {name: i for i, (name, _label, _row) in enumerate(FIELD_DEFS)}
+
+
+class UnitTable:
+    """
+    All 254 unit records in one bytearray (slot_index * 7 per record)
+
+    A field across every unit is a strided slice of the buffer, so columns are
+    read and bulk edited in a single slice operation, Reverse indexes map
+    name id, model, weapon+motion and horse values to the slots using them
+    """
+
+    INDEXED_FIELDS = ("name", "model", "motion", "horse")
+
+    def __init__(self, data: bytes):
+        if len(data) != NUM_SLOTS_TOTAL * SLOT_SIZE:
+            raise ValueError(
+                f"Unit table is {len(data)} bytes, expected {NUM_SLOTS_TOTAL * SLOT_SIZE}."
+            )
+        self.data = bytearray(data)
+        self.indexes: dict[str, dict[int, list[int]]] = {}
+        for field in self.INDEXED_FIELDS:
+            self._rebuild_index(field)
+
+    def column(self, field: str) -> bytes:
+        """Value of one field for every slot"""
+        return bytes(self.data[FIELD_INDEX[field]::SLOT_SIZE])
+
+    def _rebuild_index(self, field: str):
+        index = {}
+        for slot, value in enumerate(self.column(field)):
+            index.setdefault(value, []).append(slot)
+        self.indexes[field] = index
+
+    def record(self, slot: int) -> bytes:
+        offset = slot * SLOT_SIZE
+        return bytes(self.data[offset:offset + SLOT_SIZE])
+
+    def set_record(self, slot: int, record: bytes):
+        """Replace one 7 byte record and move the slot between index buckets"""
+        if len(record) != SLOT_SIZE:
+            raise ValueError(f"Record length {len(record)} != {SLOT_SIZE}")
+
+        old = self.record(slot)
+        offset = slot * SLOT_SIZE
+        self.data[offset:offset + SLOT_SIZE] = record
+
+        for field in self.INDEXED_FIELDS:
+            i = FIELD_INDEX[field]
+            if old[i] != record[i]:
+                index = self.indexes[field]
+                index[old[i]].remove(slot)
+                if not index[old[i]]:
+                    del index[old[i]]
+                insort(index.setdefault(record[i], []), slot)
+
+    # Queries
+
+    def slots_where(self, field: str, value: int) -> list[int]:
+        """Every slot whose field equals value"""
+        if field in self.indexes:
+            return list(self.indexes[field].get(value, []))
+        return [slot for slot, v in enumerate(self.column(field)) if v == value]
+
+    def mounted_slots(self) -> list[int]:
+        """Every slot with a horse assigned (horse byte not 0)"""
+        return sorted(
+            slot
+            for value, slots in self.indexes["horse"].items() if value != 0
+            for slot in slots
+        )
+
+    # Bulk edits
+
+    def bulk_apply(self, field: str, slots, value: int, mode: str = "set"):
+        """
+        Set (mode "set") or offset (mode "add") a field for every slot in slots,
+        a set value outside 0-255 raises ValueError, offset values are clamped to
+        a byte, the column is written back as one slice assignment
+        """
+        if mode == "set" and not 0 <= value <= 255:
+            raise ValueError(f"{field} must be 0-255, got {value}.")
+        col = bytearray(self.column(field))
+        for slot in slots:
+            new = value if mode == "set" else col[slot] + value
+            col[slot] = max(0, min(255, new))
+        self.data[FIELD_INDEX[field]::SLOT_SIZE] = col
+
+        if field in self.indexes:
+            self._rebuild_index(field)
+
 
 class UnitEditor(TheCheck):
     """
     Dynasty Warriors 2 Unit Editor
 
-    Reads unit blocks from DW2.bin into a single BytesIO
+    Reads unit blocks from the shared ImageModel into a UnitTable, and reloads
+    them when another tool (e.g. the Mod Manager) writes the unit data
     
     Layout: 53 * 7 bytes from unit_data[0] + 201 * 7 bytes from unit_data[1],
-      then the original unit_data offsets appended as 4 byte values
+      mod files and the backup append the original unit_data offsets as 4 byte values
 
     Offset per slot equals slot_index * 7
 
     One backup file written to Backups_For_Mod_Disabling if none exists
     """
 
-    def __init__(self, root):
+    def __init__(self, root, model: ImageModel | None = None):
         self.root = root
+        self.model = model or ImageModel()
         self.root.title("Unit Editor")
         
         self.root.iconbitmap(os.path.join(ICON_DIR, "icon2.ico"))
 
-        self.root.minsize(500, 400)
+        self.root.minsize(1000, 420)
         self.root.resizable(False, False)
 
         # In-memory unit data
-        self.unit_mem: BytesIO | None = None
+        self.units: UnitTable | None = None
         self._load_unit_data_in_memory()
 
         # TK variables for each field
@@ -108,55 +203,71 @@ class UnitEditor(TheCheck):
         # Character slot label
         tk.Label(self.root, text="Character slot:").place(x=240, y=10)
 
+        # Query + bulk edit panel
+        self._build_query_panel()
+
         # Load initial slot (0)
         self.unit_display(0)
 
+        # reload when another tool changes the unit data
+        self.model.subscribe("units", self.units_changed, owner=self)
+        self.root.bind("<Destroy>", self._on_destroy, add="+")
+
+    def _on_destroy(self, event):
+        if event.widget is self.root:
+            self.model.unsubscribe(self)
+
+    def units_changed(self, key=None):
+        """
+        Unit data was written by another tool, reload the table and the shown slot,
+        slots edited here and not yet saved to a mod keep their edits, slots
+        also changed by the other tool are listed in the status line
+        """
+        theirs = self.model.read("units")
+        merged, conflicts = merge_records(self.units_loaded, bytes(self.units.data), theirs, SLOT_SIZE)
+        self.units_loaded = theirs
+        self.units = UnitTable(merged)
+        self.unit_display(self._get_selected_slot_index())
+        if conflicts:
+            listed = ", ".join(map(str, conflicts[:10])) + (" ..." if len(conflicts) > 10 else "")
+            self.status_label.config(
+                text=f"Unit data changed in another tool, your unsaved edits to slots {listed} were kept.",
+                fg="red",
+            )
+        elif merged != theirs:
+            self.status_label.config(
+                text="Unit data reloaded after a change in another tool, your unsaved edits were kept.",
+                fg="green",
+            )
+        else:
+            self.status_label.config(
+                text="Unit data reloaded after a change in another tool.", fg="green"
+            )
+
     # In-memory loading & backup
 
     def _load_unit_data_in_memory(self):
         """
-        Build a single BytesIO:
-        
-        53 * 7 bytes at unit_data[0] + 201 * 7 bytes at unit_data[1] +
-        each value in unit_data as 4 bytes and create a single backup
-        file if it doesn't already exist
+        Build the UnitTable from
+
+        53 * 7 bytes at unit_data[0] + 201 * 7 bytes at unit_data[1]
+        (the model's "units" region) and create a single backup file with each
+        value in unit_data appended as 4 bytes if it doesn't already exist
         """
         os.makedirs(BACKUP_DIR, exist_ok=True)
 
-        mem = BytesIO()
-        with open(DW2_BIN, "rb") as f:
-            # First 53 units (7 bytes each) from first offset
-            f.seek(unit_data[0])
-            for _ in range(NUM_SLOTS_FIRST):
-                chunk = f.read(SLOT_SIZE)
-                if len(chunk) != SLOT_SIZE:
-                    raise IOError(
-                        f"Unexpected EOF reading unit data at 0x{unit_data[0]:X}"
-                    )
-                mem.write(chunk)
-
-            # Next 201 units (7 bytes each) from second offset
-            f.seek(unit_data[1])
-            for _ in range(NUM_SLOTS_SECOND):
-                chunk = f.read(SLOT_SIZE)
-                if len(chunk) != SLOT_SIZE:
-                    raise IOError(
-                        f"Unexpected EOF reading unit data at 0x{unit_data[1]:X}"
-                    )
-                mem.write(chunk)
-
-            # Append original offsets at the end
-            for a in unit_data:
-                mem.write(a.to_bytes(4, "little"))
-
-        mem.seek(0)
-        self.unit_mem = mem
+        self.units_loaded = self.model.read("units")  # as last read from the image
+        self.units = UnitTable(self.units_loaded)
 
         # Create backup once if not already present
         backup_path = os.path.join(BACKUP_DIR, "DW2_Original.unitdata")
         if not os.path.exists(backup_path):
             with open(backup_path, "wb") as bf:
-                bf.write(mem.getbuffer())
+                bf.write(self._mod_file_bytes())
+
+    def _mod_file_bytes(self) -> bytes:
+        """Unit records followed by the original offsets, the layout of mod and backup files"""
+        return bytes(self.units.data) + b"".join(a.to_bytes(4, "little") for a in unit_data)
 
     # GUI layout helpers
 
@@ -186,6 +297,111 @@ class UnitEditor(TheCheck):
                 validatecommand=vcmd,
             ).place(x=entry_x, y=y)
 
+    def _build_query_panel(self):
+        """Find units by field value and bulk edit every unit in the result"""
+        field_labels = [label for _name, label, _row in FIELD_DEFS]
+
+        tk.Label(self.root, text="Find units where").place(x=480, y=10)
+        self.query_field = ttk.Combobox(
+            self.root, values=field_labels, width=22, state="readonly"
+        )
+        self.query_field.set(FIELD_DEFS[2][1])  # Model
+        self.query_field.place(x=590, y=10)
+        tk.Label(self.root, text="=").place(x=760, y=10)
+        self.query_value = tk.StringVar()
+        tk.Entry(self.root, textvariable=self.query_value, width=8).place(x=780, y=10)
+        tk.Button(self.root, text="Find", command=self.run_query).place(x=850, y=6)
+        tk.Button(
+            self.root, text="Mounted units", command=self.show_mounted
+        ).place(x=900, y=6)
+
+        self.query_results = tk.Listbox(self.root, width=60, height=12)
+        self.query_results.place(x=480, y=45)
+        self.query_results.bind("<<ListboxSelect>>", self.query_result_selected)
+        self.result_slots: list[int] = []
+
+        tk.Label(self.root, text="Bulk edit results:").place(x=480, y=260)
+        self.bulk_field = ttk.Combobox(
+            self.root, values=field_labels, width=22, state="readonly"
+        )
+        self.bulk_field.set(FIELD_DEFS[2][1])
+        self.bulk_field.place(x=590, y=260)
+        self.bulk_mode = ttk.Combobox(
+            self.root, values=["set to", "add"], width=6, state="readonly"
+        )
+        self.bulk_mode.set("set to")
+        self.bulk_mode.place(x=760, y=260)
+        self.bulk_value = tk.StringVar()
+        tk.Entry(self.root, textvariable=self.bulk_value, width=8).place(x=830, y=260)
+        tk.Button(
+            self.root, text="Apply to results", command=self.apply_bulk_edit
+        ).place(x=480, y=290)
+
+    @staticmethod
+    def _field_from_label(label: str) -> str:
+        for name, text, _row in FIELD_DEFS:
+            if text == label:
+                return name
+        raise ValueError(f"Unknown field '{label}'.")
+
+    @staticmethod
+    def _parse_int(text: str) -> int:
+        """Accept decimal or 0x prefixed hex, like the slot combobox uses"""
+        return int(text.strip(), 0)
+
+    # Queries & bulk edits
+
+    def _show_results(self, slots: list[int], description: str):
+        self.result_slots = slots
+        self.query_results.delete(0, tk.END)
+        names = self.units.column("name")
+        for slot in slots:
+            name_id = names[slot]
+            name = unit_names[name_id] if name_id < len(unit_names) else str(name_id)
+            self.query_results.insert(tk.END, f"{hex(slot)}  name {name}")
+        self.status_label.config(
+            text=f"{len(slots)} units {description}.", fg="green"
+        )
+
+    def run_query(self):
+        try:
+            field = self._field_from_label(self.query_field.get())
+            value = self._parse_int(self.query_value.get())
+            slots = self.units.slots_where(field, value)
+            self._show_results(slots, f"with {self.query_field.get()} = {value}")
+        except Exception as e:
+            self.status_label.config(text=f"Error with query: {e}", fg="red")
+
+    def show_mounted(self):
+        self._show_results(self.units.mounted_slots(), "with a horse")
+
+    def query_result_selected(self, event=None):
+        selection = self.query_results.curselection()
+        if selection:
+            slot_index = self.result_slots[selection[0]]
+            self.selected_slot_str.set(hex(slot_index))
+            self.unit_display(slot_index)
+
+    def apply_bulk_edit(self):
+        """Set or offset one field for every unit in the current result list"""
+        if not self.result_slots:
+            self.status_label.config(text="Run a query first.", fg="red")
+            return
+
+        try:
+            field = self._field_from_label(self.bulk_field.get())
+            value = self._parse_int(self.bulk_value.get())
+            mode = "set" if self.bulk_mode.get() == "set to" else "add"
+            self.units.bulk_apply(field, self.result_slots, value, mode)
+
+            self.unit_display(self._get_selected_slot_index())
+            self.status_label.config(
+                text=f"Updated {self.bulk_field.get()} for {len(self.result_slots)} units.",
+                fg="green",
+            )
+        except Exception as e:
+            self.status_label.config(text=f"Error with bulk edit: {e}", fg="red")
+
     # Slot handling
 
     def _get_selected_slot_index(self) -> int:
@@ -207,7 +423,7 @@ class UnitEditor(TheCheck):
 
     def unit_display(self, slot_index: int):
         """
-        Read one 7 byte unit entry from in-memory buffer and populate TK vars
+        Read one 7 byte unit entry from the unit table and populate TK vars
         
         Layout per 7-byte record:
           0: Name ID
@@ -218,7 +434,7 @@ class UnitEditor(TheCheck):
           5: Horse
           6: Item/Heal count
         """
-        if self.unit_mem is None:
+        if self.units is None:
             self.status_label.config(text="Unit data not loaded.", fg="red")
             return
 
@@ -230,14 +446,7 @@ class UnitEditor(TheCheck):
             return
 
         offset = slot_index * SLOT_SIZE
-        self.unit_mem.seek(offset)
-        data = self.unit_mem.read(SLOT_SIZE)
-        if len(data) != SLOT_SIZE:
-            self.status_label.config(
-                text=f"Unexpected end of unit data at slot {slot_index}.",
-                fg="red",
-            )
-            return
+        data = self.units.record(slot_index)
 
         unitname = data[0]
         unk = data[1]
@@ -261,9 +470,9 @@ class UnitEditor(TheCheck):
 
     def submit_unit(self):
         """
-        Write current TK var values into the in-memory buffer for the selected slot
+        Write current TK var values into the unit table for the selected slot
         """
-        if self.unit_mem is None:
+        if self.units is None:
             self.status_label.config(text="Unit data not loaded.", fg="red")
             return
 
@@ -288,9 +497,7 @@ class UnitEditor(TheCheck):
             if len(record) != SLOT_SIZE:
                 raise ValueError(f"Record length {len(record)} != {SLOT_SIZE}")
 
-            offset = slot_index * SLOT_SIZE
-            self.unit_mem.seek(offset)
-            self.unit_mem.write(record)
+            self.units.set_record(slot_index, record)
 
             self.status_label.config(
                 text=f"Values written for slot {slot_index}.", fg="green"
@@ -308,7 +515,7 @@ class UnitEditor(TheCheck):
         """
         Dump the current in-memory unit data to a .DW2UnitMod file in the cwd
         """
-        if self.unit_mem is None:
+        if self.units is None:
             self.status_label.config(text="Unit data not loaded.", fg="red")
             return
 
@@ -317,7 +524,7 @@ class UnitEditor(TheCheck):
         usermodname = base_name + DW2_UNIT_MOD_EXT
 
         try:
-            data = self.unit_mem.getvalue()
+            data = self._mod_file_bytes()
             with open(usermodname, "wb") as w1:
                 w1.write(data)
 
@@ -1,4 +1,6 @@
 import os
+import hashlib
+from bisect import bisect_right
 import tkinter as tk
 from tkinter import ttk
 
@@ -33,6 +35,23 @@ ICON_DIR = os.path.join(TOOLS_DIR, "Icon_Files")
 BACKUP_DIR = os.path.join(TOOLS_DIR, "Backups_For_Mod_Disabling")
 MAPS_DIR = os.path.join(TOOLS_DIR, "maps")
 BACKGROUNDS_DIR = os.path.join(TOOLS_DIR, "backgrounds")
+
+# Local SQLite catalog of scanned mod files
+CATALOG_DB = os.path.join(TOOLS_DIR, "DW2_Mod_Catalog.db")
+
+# Cached ISO9660 directory indexes and table locations, keyed by image fingerprint
+ISO_INDEX_CACHE = os.path.join(TOOLS_DIR, "DW2_ISO_Index.json")
+
+# Table signatures and the table offsets discovered per image fingerprint
+OFFSET_CACHE = os.path.join(TOOLS_DIR, "DW2_Offsets.json")
+
+# Every extracted table of an image in one file per image, see Table_Cache
+TABLE_CACHE_DIR = os.path.join(TOOLS_DIR, "Table_Cache")
+
+# Bytes hashed from the start and the end of an image for its fingerprint, the
+# start covers the system area and volume descriptors of raw and 2048 byte images
+FINGERPRINT_HEAD = 64 * 2352
+FINGERPRINT_TAIL = 64 * 2352
 itemsoffset = 0x160D7E10
 unit_data = [0x160A27E8, 0x160A2A8B]
 unit_names = [
@@ -303,3 +322,71 @@ stage_data = [
     [0x24E0A8B8, 0x24E0B1E8, 0x24E0BB18, 0x24E0C448, 0x24E0CD78, 0x24E0D6A8, 0x24E0DFD8, 0x24E0E908],
     [0x24E13288, 0x24E13BB8, 0x24E144E8, 0x24E14E18, 0x24E15748, 0x24E16078, 0x24E169A8, 0x24E172D8]
     ] # 8 stages so 8 lists within the main list
+
+
+def image_fingerprint(path: str) -> str:
+    """
+    Identity of a disc image that survives table edits: its size plus a hash of
+    the first and last sectors, where the volume descriptors and track end live
+    """
+    size = os.path.getsize(path)
+    h = hashlib.blake2b(size.to_bytes(8, "little"), digest_size=16)
+    with open(path, "rb") as f:
+        h.update(f.read(FINGERPRINT_HEAD))
+        f.seek(max(size - FINGERPRINT_TAIL, 0))
+        h.update(f.read(FINGERPRINT_TAIL))
+    return h.hexdigest()
+
+
+def coalesce_patches(patches):
+    """
+    Sort (offset, bytes) patches and merge overlapping or adjacent ones into
+    contiguous runs, where ranges overlap the patch that came later wins
+    """
+    patches = [(offset, bytes(data)) for offset, data in patches if data]
+
+    # merge ranges first
+    spans = []
+    for offset, data in sorted(patches, key=lambda p: p[0]):
+        end = offset + len(data)
+        if spans and offset <= spans[-1][1]:
+            spans[-1][1] = max(spans[-1][1], end)
+        else:
+            spans.append([offset, end])
+
+    # then lay the patches down in their original order
+    starts = [start for start, _end in spans]
+    buffers = [bytearray(end - start) for start, end in spans]
+    for offset, data in patches:
+        i = bisect_right(starts, offset) - 1
+        rel = offset - starts[i]
+        buffers[i][rel:rel + len(data)] = data
+
+    return [(start, bytes(buf)) for start, buf in zip(starts, buffers)]
+
+
+def write_patches(path, patches, max_gap=0):
+    """
+    Write (offset, bytes) patches to a file in one pass, one seek/write per coalesced run
+
+    Runs separated by no more than max_gap bytes are joined by reading the gap
+    from the file, so strided tables go out as a single read-modify-write
+    """
+    runs = coalesce_patches(patches)
+    with open(path, "r+b") as f:
+        if max_gap:
+            joined = []
+            for offset, data in runs:
+                if joined and offset - (joined[-1][0] + len(joined[-1][1])) <= max_gap:
+                    start, buf = joined[-1]
+                    f.seek(start + len(buf))
+                    buf += f.read(offset - start - len(buf))
+                    buf += data
+                else:
+                    joined.append((offset, bytearray(data)))
+            runs = [(offset, bytes(buf)) for offset, buf in joined]
+
+        for offset, data in runs:
+            f.seek(offset)
+            f.write(data)
+    return runs
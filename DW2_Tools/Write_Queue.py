@@ -0,0 +1,99 @@
+# DW2_Tools/Write_Queue.py
+
+from .Utility import DW2_BIN, coalesce_patches, write_patches
+
+# How long after the last edit pending patches are written (ms)
+FLUSH_DELAY_MS = 2000
+
+# Pending runs this close together go out as one write, one raw sector trailer + header
+QUEUE_MAX_GAP = 0x140
+
+
+class WriteQueue:
+    """
+    Pending (offset, bytes) patches for DW2.bin, kept merged in memory
+
+    Overlapping and adjacent patches are merged as they are added (later
+    edits win), and everything is written in one pass either when no edit
+    arrived for FLUSH_DELAY_MS or on an explicit flush()
+
+    scheduler is any Tk widget, without one the queue only flushes when asked
+    Listeners are called with the queue whenever its dirty state may have changed,
+    flush listeners right before pending runs are written
+    """
+
+    def __init__(self, bin_path: str = DW2_BIN, scheduler=None, delay_ms: int = FLUSH_DELAY_MS):
+        self.bin_path = bin_path
+        self.scheduler = scheduler
+        self.delay_ms = delay_ms
+        self.runs: list[tuple[int, bytes]] = []
+        self.last_error: Exception | None = None
+        self.flushes = 0  # number of flushes that actually wrote to DW2.bin
+        self._after_id = None
+        self._listeners = []
+        self._flush_listeners = []
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self.runs)
+
+    @property
+    def pending_bytes(self) -> int:
+        return sum(len(data) for _offset, data in self.runs)
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def add_flush_listener(self, callback):
+        self._flush_listeners.append(callback)
+
+    def _notify(self):
+        for callback in list(self._listeners):
+            callback(self)
+
+    def add(self, patches):
+        """Queue patches and restart the debounce timer"""
+        patches = [(offset, bytes(data)) for offset, data in patches if data]
+        if not patches:
+            return
+        self.runs = coalesce_patches(self.runs + patches)
+        self._schedule()
+        self._notify()
+
+    def _schedule(self):
+        if self.scheduler is None:
+            return
+        if self._after_id is not None:
+            self.scheduler.after_cancel(self._after_id)
+        self._after_id = self.scheduler.after(self.delay_ms, self._flush_from_timer)
+
+    def _flush_from_timer(self):
+        self._after_id = None
+        try:
+            self.flush()
+        except Exception:
+            # kept pending, last_error is shown by the listeners, the next save retries
+            pass
+
+    def flush(self) -> int:
+        """Write every pending run to DW2.bin, returns the number of writes made"""
+        if self._after_id is not None and self.scheduler is not None:
+            self.scheduler.after_cancel(self._after_id)
+            self._after_id = None
+        if not self.runs:
+            return 0
+
+        for callback in list(self._flush_listeners):
+            callback(self)
+        try:
+            written = write_patches(self.bin_path, self.runs, max_gap=QUEUE_MAX_GAP)
+        except Exception as e:
+            self.last_error = e
+            self._notify()
+            raise
+
+        self.runs = []
+        self.last_error = None
+        self.flushes += 1
+        self._notify()
+        return len(written)
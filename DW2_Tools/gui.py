@@ -1,7 +1,8 @@
 # DW2_Tools/gui.py
 
+import os
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox, filedialog
 
 from .Stage_Editor import StageEditor
 from .Name_Editor import NameEditor
@@ -9,7 +10,11 @@ from .Unit_Editor import UnitEditor
 from .Item_Editor import ItemEditor
 from .DW2_Bodyguard_Progression import GuardTool
 from .Mod_Manager import DW2ModManager
-from .Utility import setup_lilac_styles, LILAC
+from .Image_Tools import ImageTools
+from .Image_Model import ImageModel
+from .Write_Queue import WriteQueue
+from .Image_Output import clone_image
+from .Utility import DW2_BIN, ROOT_DIR, setup_lilac_styles, LILAC
 
 class Core_Tools():
     def __init__(self, root):
@@ -22,15 +27,125 @@ class Core_Tools():
 
         self.tool_buttons = []
 
+        # one cached copy of DW2.bin's tables shared by every tool window,
+        # editor writes are queued and saved together shortly after the last edit
+        self.write_queue = WriteQueue(scheduler=self.root)
+        self.model = ImageModel(queue=self.write_queue)
+
         self.stage_editor_window = None
         self.name_editor_window = None
         self.unit_editor_window = None
         self.item_editor_window = None
         self.guard_editor_window = None
         self.mod_manager_window = None
+        self.image_tools_window = None
 
         self.gui_setup()
 
+        self.write_queue.add_listener(self.update_save_state)
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+    def update_save_state(self, queue=None):
+        """Show whether edits are still waiting to be written to DW2.bin"""
+        queue = queue or self.write_queue
+        if queue.last_error is not None:
+            self.save_label.config(text=f"Save failed: {queue.last_error}", foreground="red")
+        elif queue.dirty:
+            self.save_label.config(
+                text=f"Unsaved changes ({queue.pending_bytes} bytes)", foreground="red"
+            )
+        else:
+            self.save_label.config(text="All changes saved.", foreground="green")
+        self.save_btn.config(state="normal" if queue.dirty else "disabled")
+
+    def update_target_label(self):
+        """Show which image edits are written to"""
+        name = os.path.basename(self.model.bin_path)
+        in_place = os.path.abspath(self.model.bin_path) == os.path.abspath(DW2_BIN)
+        self.target_label.config(
+            text=f"Writing to: {name}" + ("" if in_place else f" ({os.path.basename(DW2_BIN)} untouched)")
+        )
+        self.save_btn.config(text=f"Save Changes to {name}")
+        self.base_btn.config(state="disabled" if in_place else "normal")
+
+    def new_output_image(self):
+        """
+        Clone the current image (reflink / copy_file_range where the filesystem
+        allows) and send every edit from now on to the clone
+        """
+        path = filedialog.asksaveasfilename(
+            parent=self.root,
+            initialdir=ROOT_DIR,
+            initialfile="DW2_mod.bin",
+            title="Write edits to a new image",
+            defaultextension=".bin",
+            filetypes=[("BIN images", "*.bin"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+
+        try:
+            self.model.flush()
+            method = clone_image(self.model.bin_path, path)
+            # a clone keeps the current image's layout
+            self.model.set_image(path, self.model.regions.values())
+            self.update_target_label()
+            self.status_label.config(
+                text=f"Created {os.path.basename(path)} ({method}).", foreground="green"
+            )
+        except Exception as e:
+            self.status_label.config(text=f"Error creating output image: {e}", foreground="red")
+
+    def open_other_image(self):
+        """
+        Edit another dump of the game in place, its tables are located through
+        the image's ISO9660 file system (another pregap or sector size)
+        """
+        path = filedialog.askopenfilename(
+            parent=self.root,
+            initialdir=ROOT_DIR,
+            title="Edit another image",
+            filetypes=[("BIN images", "*.bin"), ("ISO images", "*.iso"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+
+        try:
+            self.model.set_image(path)
+            self.update_target_label()
+            self.status_label.config(text=f"Editing {os.path.basename(path)}.", foreground="green")
+        except Exception as e:
+            self.status_label.config(text=f"Error opening image: {e}", foreground="red")
+
+    def use_base_image(self):
+        """Go back to writing edits into DW2.bin"""
+        try:
+            self.model.set_image(DW2_BIN)
+            self.update_target_label()
+            self.status_label.config(text="Editing DW2.bin again.", foreground="green")
+        except Exception as e:
+            self.status_label.config(text=f"Error switching image: {e}", foreground="red")
+
+    def save_changes(self):
+        """Write queued edits to DW2.bin now"""
+        try:
+            self.model.flush()
+        except Exception:
+            pass  # shown by update_save_state
+
+    def on_close(self):
+        """Write queued edits before the tools close"""
+        try:
+            self.model.flush()
+        except Exception as e:
+            if not messagebox.askyesno(
+                "Unsaved changes",
+                f"Could not write changes to DW2.bin: {e}\n\nClose anyway?",
+                parent=self.root,
+            ):
+                return
+        self.root.destroy()
+
     def open_stage_editor(self):
         """Function for calling Stage Editor"""
         # If window exists and hasn't been destroyed, focus it
@@ -46,7 +161,7 @@ class Core_Tools():
         self.stage_editor_window = win
 
         # create the editor in this window
-        StageEditor(win)
+        StageEditor(win, model=self.model)
 
         # when this window is closed, clear the reference
         def on_close():
@@ -72,7 +187,7 @@ class Core_Tools():
         self.name_editor_window = win
 
         # create the editor in this window
-        NameEditor(win)
+        NameEditor(win, model=self.model)
 
         # when this window is closed, clear the reference
         def on_close():
@@ -98,7 +213,7 @@ class Core_Tools():
         self.unit_editor_window = win
 
         # create the editor in this window
-        UnitEditor(win)
+        UnitEditor(win, model=self.model)
 
         # when this window is closed, clear the reference
         def on_close():
@@ -124,7 +239,7 @@ class Core_Tools():
         self.item_editor_window = win
 
         # create the editor in this window
-        ItemEditor(win)
+        ItemEditor(win, model=self.model)
 
         # when this window is closed, clear the reference
         def on_close():
@@ -150,7 +265,7 @@ class Core_Tools():
         self.guard_editor_window = win
 
         # create the editor in this window
-        GuardTool(win)
+        GuardTool(win, model=self.model)
 
         # when this window is closed, clear the reference
         def on_close():
@@ -176,7 +291,7 @@ class Core_Tools():
         self.mod_manager_window = win
 
         # create the editor in this window
-        DW2ModManager(win)
+        DW2ModManager(win, model=self.model)
 
         # when this window is closed, clear the reference
         def on_close():
@@ -184,6 +299,32 @@ class Core_Tools():
             win.destroy()
 
         win.protocol("WM_DELETE_WINDOW", on_close)
+
+    def open_image_tools(self):
+        """Function for calling Image Tools"""
+        # If window exists and hasn't been destroyed, focus it
+        if (
+            self.image_tools_window is not None
+            and self.image_tools_window.winfo_exists()
+        ):
+            self.image_tools_window.lift()
+            self.image_tools_window.focus_force()
+            return
+
+        # Otherwise, create a new Toplevel for Image Tools
+        win = tk.Toplevel(self.root)
+        win.title("Image Tools")
+        self.image_tools_window = win
+
+        # create the tools in this window
+        ImageTools(win, model=self.model, on_image_change=self.update_target_label)
+
+        # when this window is closed, clear the reference
+        def on_close():
+            self.image_tools_window = None
+            win.destroy()
+
+        win.protocol("WM_DELETE_WINDOW", on_close)
         
     def gui_setup(self):
         """Handles GUI designing"""
@@ -206,13 +347,66 @@ class Core_Tools():
         )
         self.status_label.place(x=400, y=24)
 
+        # Unsaved changes indicator + explicit save
+        self.save_label = ttk.Label(
+            self.bg,
+            text="All changes saved.",
+            style="Lilac.TLabel",
+            foreground="green"
+        )
+        self.save_label.place(x=50, y=60)
+
+        self.save_btn = ttk.Button(
+            self.bg,
+            text="Save Changes to DW2.bin",
+            command=self.save_changes,
+            width=30,
+            state="disabled",
+        )
+        self.save_btn.place(x=400, y=56)
+
+        # Output image, edits go to a clone instead of mutating DW2.bin
+        self.target_label = ttk.Label(
+            self.bg,
+            text="",
+            style="Lilac.TLabel",
+        )
+        self.target_label.place(x=50, y=100)
+
+        self.output_btn = ttk.Button(
+            self.bg,
+            text="Write to New Image...",
+            command=self.new_output_image,
+            width=30,
+        )
+        self.output_btn.place(x=400, y=96)
+
+        self.base_btn = ttk.Button(
+            self.bg,
+            text="Back to DW2.bin",
+            command=self.use_base_image,
+            width=20,
+            state="disabled",
+        )
+        self.base_btn.place(x=620, y=96)
+
+        self.open_btn = ttk.Button(
+            self.bg,
+            text="Edit Another Image...",
+            command=self.open_other_image,
+            width=20,
+        )
+        self.open_btn.place(x=780, y=96)
+        self.update_target_label()
+
         self.tools = [
                 "Stage Editor",
                 "Unit Editor",
                 "Item Editor",
                 "Name Editor",
                 "Bodyguard Editor",
-                "Mod Manager"
+                "Mod Manager",
+                "Image Tools"
             ]
 
         top_y = 150
@@ -248,4 +442,6 @@ class Core_Tools():
                 btn.config(command=self.open_guard_editor)
             elif tool == "Mod Manager":
                 btn.config(command=self.open_mod_manager)
+            elif tool == "Image Tools":
+                btn.config(command=self.open_image_tools)
             self.tool_buttons.append(btn)